@@ -0,0 +1,3 @@
+"""
+Shared helpers used across TIME BLOCK apps (no models)
+"""
@@ -0,0 +1,46 @@
+"""
+Conditional GET helpers (ETag / Last-Modified)
+
+Views compute their validators from a cheap query, answer 304 before doing
+any serialization, and stamp the same validators on full responses.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Strong ETag from the string form of parts"""
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(str(part).encode('utf-8'))
+        sha.update(b'\x00')
+    return quote_etag(sha.hexdigest()[:32])
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 response if the request's validators still match, else None
+
+    Args:
+        request: DRF or plain Django request
+        etag: quoted ETag for the current representation
+        last_modified: aware datetime of the last change
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    request = getattr(request, '_request', request)
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """Attach validators and ask clients to revalidate before reusing the copy"""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,210 @@
+"""
+Sparse fieldsets for read endpoints (?fields= / ?omit=)
+
+    ?omit=brain_dump,time_blocks.description
+    ?fields=id,date,time_blocks.title
+
+Dotted names select fields of nested serializers. The selection is applied
+to the serializer and pushed down into the queryset with defer(), so
+columns nobody asked for are never read from the database.
+"""
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+class FieldSelection:
+    """Parsed ?fields= / ?omit= for one serializer level"""
+
+    def __init__(self, include=None, omit=None, nested=None):
+        self.include = include  # None = every field
+        self.omit = omit or set()
+        self.nested = nested or {}
+
+    @classmethod
+    def parse(cls, fields=None, omit=None):
+        selection = cls()
+        for value, is_include in ((fields, True), (omit, False)):
+            for path in filter(None, (part.strip() for part in (value or '').split(','))):
+                selection._add(path.split('.'), is_include)
+        return selection
+
+    def _add(self, parts, is_include):
+        name, rest = parts[0], parts[1:]
+        if rest:
+            if is_include:
+                self.include = (self.include or set()) | {name}
+            self.nested.setdefault(name, FieldSelection())._add(rest, is_include)
+        elif is_include:
+            self.include = (self.include or set()) | {name}
+        else:
+            self.omit.add(name)
+
+    def __bool__(self):
+        return self.include is not None or bool(self.omit) or any(self.nested.values())
+
+    def child(self, name):
+        return self.nested.get(name, FieldSelection())
+
+    def keeps(self, name):
+        if name in self.omit:
+            return False
+        return self.include is None or name in self.include
+
+    def validate(self, available, path=''):
+        """Raise ValidationError for names the serializer does not have"""
+        requested = (self.include or set()) | self.omit | set(self.nested)
+        unknown = sorted(f'{path}{name}' for name in requested - set(available))
+        if unknown:
+            raise ValidationError({'fields': f'Unknown field(s): {", ".join(unknown)}'})
+
+
+def _nested_serializer(field):
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, FieldSelectionMixin):
+        return field
+    return None
+
+
+class FieldSelectionMixin:
+    """
+    Serializer mixin dropping fields per context['field_selection']
+
+    Meta.field_dependencies maps computed fields to the model columns they
+    read (e.g. {'execution_rate': ['planned_duration', 'actual_duration']}).
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = getattr(self, '_field_selection', None)
+        if selection is None:
+            selection = self.context.get('field_selection') or FieldSelection()
+
+        for name in list(fields):
+            if not selection.keeps(name):
+                del fields[name]
+                continue
+            nested = _nested_serializer(fields[name])
+            if nested is not None:
+                # Nested serializers share the root context; hand them their own part
+                nested._field_selection = selection.child(name)
+        return fields
+
+    @classmethod
+    def needed_columns(cls, selection, context=None):
+        """
+        Model columns the selected fields read
+
+        Returns:
+            tuple: (set of column names, {nested field name: (serializer, selection)})
+        """
+        context = dict(context or {}, field_selection=selection)
+        serializer = cls(context=context)
+        dependencies = getattr(cls.Meta, 'field_dependencies', {})
+
+        columns = set()
+        nested = {}
+        for name, field in serializer.fields.items():
+            columns.update(dependencies.get(name, ()))
+            child = _nested_serializer(field)
+            if child is not None:
+                nested[name] = (type(child), selection.child(name))
+                continue
+            if field.source != '*':
+                columns.add(field.source.split('.')[0])
+        return columns, nested
+
+    @classmethod
+    def deferred_columns(cls, selection, context=None, required=(), needed=None):
+        """
+        Concrete, non-key model columns the selected fields never read
+        needed: the needed_columns() result when the caller already has it
+        """
+        columns, _ = needed or cls.needed_columns(selection, context)
+        columns = columns | set(required)
+        deferred = []
+        for model_field in cls.Meta.model._meta.concrete_fields:
+            if model_field.primary_key or model_field.is_relation:
+                continue
+            if model_field.name not in columns:
+                deferred.append(model_field.name)
+        return deferred
+
+
+class FieldSelectionViewMixin:
+    """
+    ViewSet mixin parsing ?fields= / ?omit= on GET requests
+
+    Adds the selection to the serializer context and offers project() to
+    defer unread columns on a queryset (and its nested prefetches).
+    """
+
+    def get_field_selection(self):
+        if not hasattr(self, '_field_selection'):
+            params = self.request.query_params
+            if self.request.method != 'GET':
+                self._field_selection = FieldSelection()
+            else:
+                self._field_selection = FieldSelection.parse(params.get('fields'), params.get('omit'))
+        return self._field_selection
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['field_selection'] = self.get_field_selection()
+        return context
+
+    def validate_field_selection(self, serializer_class):
+        selection = self.get_field_selection()
+        if not selection:
+            return
+        # get_queryset() can run more than once per request (validators, then the object)
+        validated = self.__dict__.setdefault('_validated_serializers', set())
+        if serializer_class not in validated:
+            self._validate_level(serializer_class, selection, '')
+            validated.add(serializer_class)
+
+    def _validate_level(self, serializer_class, selection, path):
+        serializer = serializer_class(context=self.get_serializer_context())
+        # Validate against every field, not only the ones left after selection
+        serializer._field_selection = FieldSelection()
+        available = serializer.fields
+        selection.validate(available, path)
+        for name, child_selection in selection.nested.items():
+            child = _nested_serializer(available[name])
+            if child is None:
+                raise ValidationError({'fields': f'{path}{name} has no nested fields'})
+            self._validate_level(type(child), child_selection, f'{path}{name}.')
+
+    def project(self, queryset, serializer_class, required=(), prefetch=None, context=None):
+        """
+        Defer the columns serializer_class will not read for this request
+
+        Args:
+            queryset: queryset of serializer_class.Meta.model
+            required: columns the view itself reads (always loaded)
+            prefetch: {nested field name: (lookup, base queryset)} to project nested rows
+            context: serializer context (defaults to get_serializer_context())
+        """
+        selection = self.get_field_selection()
+        context = context if context is not None else self.get_serializer_context()
+        needed = serializer_class.needed_columns(selection, context)
+        deferred = serializer_class.deferred_columns(selection, context, required, needed=needed)
+        if deferred:
+            queryset = queryset.defer(*deferred)
+
+        if prefetch:
+            _, nested = needed
+            lookups = []
+            for name, (lookup, base) in prefetch.items():
+                if name not in nested:
+                    continue
+                child_class, child_selection = nested[name]
+                child_deferred = child_class.deferred_columns(child_selection, context)
+                if child_deferred:
+                    base = base.defer(*child_deferred)
+                lookups.append(Prefetch(lookup, queryset=base))
+            if lookups:
+                queryset = queryset.prefetch_related(*lookups)
+        return queryset
@@ -0,0 +1,189 @@
+"""
+Idempotency-Key support for mutating API actions
+
+Clients send an ``Idempotency-Key`` header with unsafe requests. The first
+response for a key is stored in the cache and replayed byte-for-byte for
+retries, without running the view again. While the first request is still
+running, duplicates wait on a cache lock instead of executing in parallel.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from django.http import HttpResponse
+from django.http.request import RawPostDataException
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05  # seconds between checks while waiting on the lock
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still being processed.'
+    default_code = 'idempotency_conflict'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used with a different request.'
+    default_code = 'idempotency_key_reused'
+
+
+class _Replay(Exception):
+    """Raised from initial() to short-circuit the handler with a stored response"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class IdempotentRequest:
+    """Cache bookkeeping for one (user, Idempotency-Key) pair"""
+
+    def __init__(self, request, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        self.cache_key = f'idempotency:{request.user.pk}:{digest}'
+        self.lock_key = f'{self.cache_key}:lock'
+        self.fingerprint = self._fingerprint(request)
+
+    @staticmethod
+    def _fingerprint(request):
+        """
+        Hash of method, path and payload so a reused key with a new payload is rejected
+
+        Multipart uploads are hashed from the parsed form (field values and
+        a chunked digest of each file) instead of reading the raw body,
+        which would load the whole upload into memory.
+        """
+        sha = hashlib.sha256()
+        sha.update(request.method.encode())
+        sha.update(request.get_full_path().encode())
+        if request.content_type.startswith('multipart/'):
+            for name, values in sorted(request.data.lists()):
+                sha.update(name.encode())
+                for value in values:
+                    if isinstance(value, UploadedFile):
+                        sha.update((value.name or '').encode())
+                        for chunk in value.chunks():
+                            sha.update(chunk)
+                        value.seek(0)
+                    else:
+                        sha.update(str(value).encode())
+            return sha.hexdigest()
+        try:
+            sha.update(request._request.body)
+        except RawPostDataException:
+            pass
+        return sha.hexdigest()
+
+    def _stored(self):
+        stored = cache.get(self.cache_key)
+        if stored is None:
+            return None
+        if stored['fingerprint'] != self.fingerprint:
+            raise IdempotencyKeyReused()
+        return self._build_response(stored)
+
+    @staticmethod
+    def _build_response(stored):
+        response = HttpResponse(stored['content'], status=stored['status'])
+        for header, value in stored['headers']:
+            response[header] = value
+        response[REPLAYED_HEADER] = 'true'
+        return response
+
+    def acquire(self):
+        """
+        Return the stored response for a retry, or take the lock and return None
+
+        Raises:
+            IdempotencyConflict: if another request holds the lock for too long
+        """
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            response = self._stored()
+            if response is not None:
+                return response
+            if cache.add(self.lock_key, self.fingerprint, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                # Re-check: the previous holder may have stored and released in between
+                try:
+                    response = self._stored()
+                except IdempotencyKeyReused:
+                    cache.delete(self.lock_key)
+                    raise
+                if response is not None:
+                    cache.delete(self.lock_key)
+                return response
+            if time.monotonic() >= deadline:
+                raise IdempotencyConflict()
+            time.sleep(POLL_INTERVAL)
+
+    def complete(self, response):
+        """Store the final response (unless it is a server error) and release the lock"""
+        try:
+            if response.status_code < 500 and not response.streaming:
+                if hasattr(response, 'render') and not response.is_rendered:
+                    response.render()
+                cache.set(self.cache_key, {
+                    'fingerprint': self.fingerprint,
+                    'status': response.status_code,
+                    'headers': list(response.items()),
+                    'content': response.content,
+                }, settings.IDEMPOTENCY_KEY_TTL)
+        finally:
+            cache.delete(self.lock_key)
+
+
+class IdempotencyMixin:
+    """
+    ViewSet mixin adding Idempotency-Key handling to unsafe methods
+
+    Keys are scoped per user; requests without the header are unaffected.
+    """
+
+    idempotent_methods = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._idempotent_request = None
+
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key or request.method not in self.idempotent_methods:
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({'Idempotency-Key': f'Must be at most {MAX_KEY_LENGTH} characters'})
+
+        idempotent_request = IdempotentRequest(request, key)
+        replay = idempotent_request.acquire()
+        if replay is not None:
+            raise _Replay(replay)
+        self._idempotent_request = idempotent_request
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _Replay):
+            return exc.response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # Uncaught errors are re-raised and never reach finalize_response:
+            # release the key so a retry runs again instead of waiting on the lock
+            idempotent_request = getattr(self, '_idempotent_request', None)
+            if idempotent_request is not None:
+                self._idempotent_request = None
+                cache.delete(idempotent_request.lock_key)
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        idempotent_request = getattr(self, '_idempotent_request', None)
+        if idempotent_request is not None:
+            self._idempotent_request = None
+            idempotent_request.complete(response)
+        return response
@@ -0,0 +1,86 @@
+"""Conditional GET: plan and block ETags, 304 answers and what changes the tag"""
+
+from datetime import date
+
+import pytest
+
+from apps.plans.models import DailyPlan, TimeBlock
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def plan(user):
+    plan = DailyPlan.objects.create(user=user, date=date(2025, 3, 1), brain_dump='notes')
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=9, title='Study')
+    return plan
+
+
+def plan_url(plan):
+    return f'/api/plans/daily-plans/{plan.pk}/'
+
+
+def test_matching_validators_get_304_without_serializing(api_client, plan, django_assert_max_num_queries):
+    response = api_client.get(plan_url(plan))
+    assert response.status_code == 200
+    etag, last_modified = response['ETag'], response['Last-Modified']
+    assert 'no-cache' in response['Cache-Control'] and 'private' in response['Cache-Control']
+
+    # One freshness aggregate (plus the session's user lookup); no plan/block payload
+    with django_assert_max_num_queries(2):
+        cached = api_client.get(plan_url(plan), HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == 304
+    assert cached.content == b''
+    assert cached['ETag'] == etag
+
+    assert api_client.get(plan_url(plan), HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+    assert api_client.get(plan_url(plan), HTTP_IF_NONE_MATCH='"stale"').status_code == 200
+
+
+def test_block_changes_invalidate_the_plan_etag(api_client, plan):
+    etag = api_client.get(plan_url(plan))['ETag']
+
+    block = plan.time_blocks.get()
+    block.title = 'Review'
+    block.save()
+    response = api_client.get(plan_url(plan), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()['time_blocks'][0]['title'] == 'Review'
+    assert response['ETag'] != etag
+
+    # Deleting the newest block moves no timestamp forward; the block count still changes the tag
+    etag = response['ETag']
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=10, title='Extra')
+    with_extra = api_client.get(plan_url(plan))['ETag']
+    TimeBlock.objects.get(title='Extra').delete()
+    DailyPlan.objects.filter(pk=plan.pk).update(updated_at=plan.updated_at)
+    response = api_client.get(plan_url(plan), HTTP_IF_NONE_MATCH=with_extra)
+    assert response.status_code == 200
+    assert response['ETag'] != with_extra
+    assert response['ETag'] == etag  # same plan and blocks as before the extra one
+
+
+def test_field_selection_changes_the_etag(api_client, plan):
+    full = api_client.get(plan_url(plan))
+    partial = api_client.get(plan_url(plan), {'fields': 'id,date'})
+
+    assert partial.json() == {'id': str(plan.pk), 'date': '2025-03-01'}
+    assert partial['ETag'] != full['ETag']
+    # A copy of the full plan is not a valid copy of the trimmed one
+    assert api_client.get(plan_url(plan), {'fields': 'id,date'}, HTTP_IF_NONE_MATCH=full['ETag']).status_code == 200
+    assert api_client.get(
+        plan_url(plan), {'fields': 'id,date'}, HTTP_IF_NONE_MATCH=partial['ETag']
+    ).status_code == 304
+
+
+def test_time_block_detail_etag(api_client, plan):
+    block = plan.time_blocks.get()
+    url = f'/api/plans/time-blocks/{block.pk}/'
+    etag = api_client.get(url)['ETag']
+
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    block.mark_completed()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()['is_completed'] is True
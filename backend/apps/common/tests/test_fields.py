@@ -0,0 +1,63 @@
+"""Sparse fieldsets (?fields= / ?omit=) on plan reads"""
+
+from datetime import date
+
+import pytest
+
+from apps.plans.models import DailyPlan, TimeBlock
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def plan(user):
+    plan = DailyPlan.objects.create(user=user, date=date(2025, 3, 1), brain_dump='notes')
+    TimeBlock.objects.create(
+        daily_plan=plan, period=TimeBlock.Period.AM, hour=9, title='Read', description='chapter 3'
+    )
+    return plan
+
+
+def plan_url(plan, query):
+    return f'/api/plans/daily-plans/{plan.pk}/?{query}'
+
+
+def plan_select(queries):
+    """SQL of the query loading the plan row (not the freshness aggregate)"""
+    return next(
+        query['sql'] for query in queries
+        if query['sql'].startswith('SELECT') and 'FROM "daily_plans"' in query['sql'] and 'MAX(' not in query['sql']
+    )
+
+
+def test_omit_drops_fields_and_their_columns(api_client, plan, django_assert_max_num_queries):
+    with django_assert_max_num_queries(10) as captured:
+        response = api_client.get(plan_url(plan, 'omit=brain_dump,time_blocks.description'))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert 'brain_dump' not in body
+    assert body['time_blocks'][0]['title'] == 'Read'
+    assert 'description' not in body['time_blocks'][0]
+    assert '"brain_dump"' not in plan_select(captured.captured_queries)
+
+
+def test_fields_keeps_only_the_selected_fields(api_client, plan):
+    response = api_client.get(plan_url(plan, 'fields=id,date,time_blocks.title'))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {'id', 'date', 'time_blocks'}
+    assert body['time_blocks'] == [{'title': 'Read'}]
+
+
+@pytest.mark.parametrize('query, message', [
+    ('fields=id,bogus', 'Unknown field(s): bogus'),
+    ('omit=time_blocks.nope', 'Unknown field(s): time_blocks.nope'),
+    ('fields=date.year', 'date has no nested fields'),
+])
+def test_unknown_field_names_are_rejected(api_client, plan, query, message):
+    response = api_client.get(plan_url(plan, query))
+
+    assert response.status_code == 400
+    assert response.json() == {'fields': message}
@@ -0,0 +1,104 @@
+"""Idempotency-Key: replays, reused keys, the in-flight lock and its release"""
+
+import hashlib
+
+import pytest
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.plans.models import DailyPlan
+from apps.plans.views import DailyPlanViewSet
+
+pytestmark = pytest.mark.django_db
+
+PLANS_URL = '/api/plans/daily-plans/'
+IMPORT_URL = '/api/plans/daily-plans/import-ics/'
+KEY = 'c0ffee-1'
+
+ICS = b"""BEGIN:VCALENDAR
+BEGIN:VEVENT
+UID:lecture@example.com
+DTSTART:20250303T000000Z
+DTEND:20250303T010000Z
+SUMMARY:Lecture
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def lock_key(user, key=KEY):
+    return f'idempotency:{user.pk}:{hashlib.sha256(key.encode()).hexdigest()}:lock'
+
+
+def create_plan(api_client, day='2025-03-01', key=KEY):
+    return api_client.post(PLANS_URL, {'date': day}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+
+def test_retry_replays_the_stored_response(api_client, user):
+    first = create_plan(api_client)
+    assert first.status_code == 201
+    assert 'Idempotent-Replayed' not in first
+
+    retry = create_plan(api_client)
+
+    assert retry.status_code == 201
+    assert retry['Idempotent-Replayed'] == 'true'
+    assert retry.content == first.content
+    assert DailyPlan.objects.filter(user=user).count() == 1
+
+
+def test_key_reused_with_another_payload_is_rejected(api_client, user):
+    assert create_plan(api_client).status_code == 201
+
+    response = create_plan(api_client, day='2025-03-02')
+
+    assert response.status_code == 422
+    assert DailyPlan.objects.filter(user=user).count() == 1
+
+
+def test_duplicate_of_a_running_request_gets_409(api_client, user, settings):
+    settings.IDEMPOTENCY_WAIT_TIMEOUT = 0.2
+    cache.add(lock_key(user), 'running', 30)  # the first request is still in flight
+
+    response = create_plan(api_client)
+
+    assert response.status_code == 409
+    assert not DailyPlan.objects.filter(user=user).exists()
+
+
+def test_multipart_uploads_are_fingerprinted_by_content(api_client, user):
+    def upload(content):
+        return api_client.post(
+            IMPORT_URL,
+            {'file': SimpleUploadedFile('calendar.ics', content)},
+            format='multipart',
+            HTTP_IDEMPOTENCY_KEY=KEY,
+        )
+
+    first = upload(ICS)
+    assert first.status_code == 201
+
+    retry = upload(ICS)
+    assert retry['Idempotent-Replayed'] == 'true'
+    assert retry.content == first.content
+
+    assert upload(ICS.replace(b'Lecture', b'Seminar')).status_code == 422
+
+
+def test_lock_is_released_after_an_unhandled_error(api_client, user, settings, monkeypatch):
+    settings.IDEMPOTENCY_WAIT_TIMEOUT = 0.2
+    create = DailyPlanViewSet.create
+
+    def crash(self, request, *args, **kwargs):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(DailyPlanViewSet, 'create', crash)
+    with pytest.raises(RuntimeError):
+        create_plan(api_client)
+    assert cache.get(lock_key(user)) is None
+
+    # Nothing was stored either: the retry runs the view again
+    monkeypatch.setattr(DailyPlanViewSet, 'create', create)
+    retry = create_plan(api_client)
+    assert retry.status_code == 201
+    assert 'Idempotent-Replayed' not in retry
@@ -3,15 +3,18 @@ Django admin configuration for plans app
 """
 
 from django.contrib import admin
-from .models import DailyPlan, TimeBlock
+from .models import DailyPlan, PlanTemplate, PlanTemplateBlock, TimeBlock, UserCategory
 
 
 class TimeBlockInline(admin.TabularInline):
     """Inline admin for TimeBlock"""
     model = TimeBlock
     extra = 0
-    fields = ('period', 'hour', 'title', 'category', 'planned_duration', 'actual_duration', 'is_completed')
-    readonly_fields = ('created_at', 'updated_at')
+    fields = (
+        'start_minute', 'end_minute', 'period', 'hour', 'title', 'category',
+        'planned_duration', 'actual_duration', 'is_completed',
+    )
+    readonly_fields = ('period', 'hour', 'created_at', 'updated_at')
 
 
 @admin.register(DailyPlan)
@@ -28,11 +31,11 @@ class DailyPlanAdmin(admin.ModelAdmin):
         (None, {'fields': ('user', 'date')}),
         ('Priorities', {'fields': ('priorities',)}),
         ('Brain Dump', {'fields': ('brain_dump',)}),
-        ('Statistics', {'fields': ('completion_rate',)}),
+        ('Statistics', {'fields': ('completion_rate', 'total_blocks', 'completed_blocks')}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
 
-    readonly_fields = ('completion_rate', 'created_at', 'updated_at')
+    readonly_fields = ('completion_rate', 'total_blocks', 'completed_blocks', 'created_at', 'updated_at')
     inlines = [TimeBlockInline]
 
     def get_queryset(self, request):
@@ -45,23 +48,72 @@ class DailyPlanAdmin(admin.ModelAdmin):
 class TimeBlockAdmin(admin.ModelAdmin):
     """TimeBlock admin"""
 
-    list_display = ('daily_plan', 'period', 'hour', 'title', 'category', 'is_completed', 'execution_rate')
+    list_display = (
+        'daily_plan', 'start_minute', 'end_minute', 'period', 'hour', 'title', 'category',
+        'is_completed', 'execution_rate',
+    )
     list_filter = ('period', 'is_completed', 'category', 'created_at')
     search_fields = ('title', 'description', 'daily_plan__user__email')
-    ordering = ('daily_plan__date', 'period', 'hour')
+    ordering = ('daily_plan__date', 'start_minute')
 
     fieldsets = (
         (None, {'fields': ('daily_plan',)}),
-        ('Time', {'fields': ('period', 'hour')}),
+        ('Time', {'fields': ('start_minute', 'end_minute', 'period', 'hour')}),
         ('Details', {'fields': ('title', 'description', 'category')}),
         ('Duration', {'fields': ('planned_duration', 'actual_duration')}),
         ('Status', {'fields': ('is_completed',)}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
 
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('period', 'hour', 'created_at', 'updated_at')
 
     def get_queryset(self, request):
         """Optimize queryset with select_related"""
         qs = super().get_queryset(request)
         return qs.select_related('daily_plan', 'daily_plan__user')
+
+
+class PlanTemplateBlockInline(admin.TabularInline):
+    """Inline admin for PlanTemplateBlock"""
+    model = PlanTemplateBlock
+    extra = 0
+    fields = ('period', 'hour', 'title', 'category', 'planned_duration')
+
+
+@admin.register(PlanTemplate)
+class PlanTemplateAdmin(admin.ModelAdmin):
+    """PlanTemplate admin with inline blocks"""
+
+    list_display = ('user', 'name', 'weekdays', 'start_date', 'end_date', 'created_at')
+    search_fields = ('user__email', 'name')
+    ordering = ('-created_at',)
+
+    fieldsets = (
+        (None, {'fields': ('user', 'name')}),
+        ('Plan', {'fields': ('priorities', 'brain_dump')}),
+        ('Recurrence', {'fields': ('weekdays', 'start_date', 'end_date')}),
+        ('Timestamps', {'fields': ('created_at', 'updated_at')}),
+    )
+
+    readonly_fields = ('created_at', 'updated_at')
+    inlines = [PlanTemplateBlockInline]
+
+    def get_queryset(self, request):
+        """Optimize queryset with select_related"""
+        qs = super().get_queryset(request)
+        return qs.select_related('user')
+
+
+@admin.register(UserCategory)
+class UserCategoryAdmin(admin.ModelAdmin):
+    """UserCategory admin"""
+
+    list_display = ('user', 'name', 'usage_count', 'last_used_at')
+    search_fields = ('user__email', 'name')
+    ordering = ('user', '-usage_count')
+    readonly_fields = ('usage_count', 'last_used_at')
+
+    def get_queryset(self, request):
+        """Optimize queryset with select_related"""
+        qs = super().get_queryset(request)
+        return qs.select_related('user')
@@ -0,0 +1,245 @@
+"""
+Delta autosave for DailyPlan.brain_dump
+
+Clients send text operations against the version they last saw instead of
+the whole brain dump:
+
+    {"version": 12, "ops": [{"offset": 40, "delete": 3, "insert": "abc"}]}
+
+Offsets and delete lengths count UTF-16 code units (JavaScript
+String.length) and are applied in order, each against the result of the
+previous one. Every accepted patch bumps the version by one.
+
+Bursts of patches are coalesced in the cache: the first patch after a
+quiet period is written to the database immediately, later patches within
+BRAIN_DUMP_COALESCE_SECONDS only update the cached text. Pending text is
+written by the next patch outside the window, by a patch sent with
+"flush": true, or by flush_pending() before the plan is read.
+
+Every write also stores DailyPlan.brain_dump_flush_by (write time + the
+window), the deadline by which text coalesced after it must reach the
+database. flush_due(), run by the flush_brain_dumps command, writes the
+pending text of plans past their deadline (and clears deadlines with
+nothing pending), so search, statistics, exports and the calendar feed
+lag by at most the window plus the command's interval, and only that
+much text is at risk if the cache loses an entry.
+"""
+
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import DailyPlan
+
+ENCODING = 'utf-16-le'
+UNIT = 2  # bytes per UTF-16 code unit
+MAX_OPS = 500
+POLL_INTERVAL = 0.02  # seconds between checks while waiting on the lock
+
+
+class BrainDumpBusy(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Another autosave for this plan is still being applied.'
+    default_code = 'brain_dump_busy'
+
+
+def _state_key(plan_id):
+    return f'brain_dump:{plan_id}'
+
+
+def _lock_key(plan_id):
+    return f'brain_dump:{plan_id}:lock'
+
+
+class _PlanLock:
+    """Short cache lock serializing patches to one plan across workers"""
+
+    def __init__(self, plan_id):
+        self.key = _lock_key(plan_id)
+
+    def __enter__(self):
+        deadline = time.monotonic() + settings.BRAIN_DUMP_LOCK_WAIT
+        while not cache.add(self.key, 1, settings.BRAIN_DUMP_LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                raise BrainDumpBusy()
+            time.sleep(POLL_INTERVAL)
+        return self
+
+    def __exit__(self, *exc_info):
+        cache.delete(self.key)
+
+
+def apply_ops(text, ops):
+    """
+    Apply a list of {offset, delete, insert} operations to text
+
+    Raises:
+        ValidationError: if an operation is malformed or out of range
+    """
+    if not isinstance(ops, list):
+        raise ValidationError({'ops': 'Must be a list of operations'})
+    if len(ops) > MAX_OPS:
+        raise ValidationError({'ops': f'At most {MAX_OPS} operations per patch'})
+
+    buffer = bytearray((text or '').encode(ENCODING))
+    for index, op in enumerate(ops):
+        if not isinstance(op, dict):
+            raise ValidationError({'ops': f'Operation {index} must be an object'})
+        offset = op.get('offset', 0)
+        delete = op.get('delete', 0)
+        insert = op.get('insert', '')
+        if not isinstance(offset, int) or not isinstance(delete, int) or offset < 0 or delete < 0:
+            raise ValidationError({'ops': f'Operation {index}: offset and delete must be non-negative integers'})
+        if not isinstance(insert, str):
+            raise ValidationError({'ops': f'Operation {index}: insert must be a string'})
+
+        start = offset * UNIT
+        end = start + delete * UNIT
+        if end > len(buffer):
+            raise ValidationError({'ops': f'Operation {index} is out of range'})
+        buffer[start:end] = insert.encode(ENCODING)
+
+    try:
+        return buffer.decode(ENCODING)
+    except UnicodeDecodeError:
+        raise ValidationError({'ops': 'Operations split a surrogate pair'})
+
+
+def _load_state(plan):
+    state = cache.get(_state_key(plan.pk))
+    if state is None:
+        state = {
+            'text': plan.brain_dump or '',
+            'version': plan.brain_dump_version,
+            'dirty': False,
+            'flushed_at': 0.0,
+        }
+    return state
+
+
+def _write(plan_id, state):
+    """
+    Persist the cached text; never overwrite a newer version
+
+    Patches in the next window are coalesced again, so the write records
+    the deadline by which they have to be flushed.
+    """
+    now = timezone.now()
+    DailyPlan.objects.filter(
+        pk=plan_id,
+        brain_dump_version__lt=state['version'],
+    ).update(
+        brain_dump=state['text'],
+        brain_dump_version=state['version'],
+        brain_dump_flush_by=now + timedelta(seconds=settings.BRAIN_DUMP_COALESCE_SECONDS),
+        updated_at=now,
+    )
+    state['dirty'] = False
+    state['flushed_at'] = time.time()
+
+
+def _store(plan_id, state):
+    cache.set(_state_key(plan_id), state, settings.BRAIN_DUMP_BUFFER_TTL)
+
+
+def apply_patch(plan, version, ops, flush=False):
+    """
+    Apply a client patch made against version
+
+    Returns:
+        tuple: (applied, state) - applied is False on a version mismatch,
+        in which case state holds the current text and version to rebase on
+    """
+    with _PlanLock(plan.pk):
+        state = _load_state(plan)
+        if version != state['version']:
+            return False, state
+
+        text = apply_ops(state['text'], ops)
+        if text != state['text']:
+            state['text'] = text
+            state['version'] += 1
+            state['dirty'] = True
+
+        quiet = time.time() - state['flushed_at'] >= settings.BRAIN_DUMP_COALESCE_SECONDS
+        if state['dirty'] and (flush or quiet):
+            _write(plan.pk, state)
+        _store(plan.pk, state)
+        return True, state
+
+
+def flush_pending(plan_ids):
+    """
+    Write coalesced text for the given plans to the database
+
+    Returns:
+        set: ids of the plans that were written
+    """
+    keys = {_state_key(plan_id): plan_id for plan_id in plan_ids}
+    written = set()
+    if not keys:
+        return written
+    for key, state in cache.get_many(list(keys)).items():
+        if not state['dirty']:
+            continue
+        plan_id = keys[key]
+        with _PlanLock(plan_id):
+            state = cache.get(key)
+            if state is not None and state['dirty']:
+                _write(plan_id, state)
+                _store(plan_id, state)
+                written.add(plan_id)
+    return written
+
+
+def flush_due(now=None):
+    """
+    Write pending text of plans whose flush deadline has passed
+
+    Plans past their deadline with nothing pending (or whose cached state
+    is gone) only get the deadline cleared. Plans locked by a patch are
+    left for the next run.
+
+    Returns:
+        tuple: (plans written, deadlines cleared)
+    """
+    now = now or timezone.now()
+    due = DailyPlan.objects.filter(brain_dump_flush_by__lte=now).values_list('pk', flat=True)
+    written = cleared = 0
+    for plan_id in list(due):
+        try:
+            with _PlanLock(plan_id):
+                state = cache.get(_state_key(plan_id))
+                if state is not None and state['dirty']:
+                    _write(plan_id, state)
+                    _store(plan_id, state)
+                    written += 1
+                else:
+                    cleared += DailyPlan.objects.filter(
+                        pk=plan_id,
+                        brain_dump_flush_by__lte=now,
+                    ).update(brain_dump_flush_by=None)
+        except BrainDumpBusy:
+            continue
+    return written, cleared
+
+
+@contextmanager
+def overwriting(plan):
+    """
+    Hold the plan lock around a full brain_dump overwrite
+
+    Yields the version the overwrite must store (one above every version
+    handed out so far); coalesced text is dropped once the block exits.
+    """
+    with _PlanLock(plan.pk):
+        state = cache.get(_state_key(plan.pk))
+        pending = state['version'] if state else 0
+        yield max(plan.brain_dump_version, pending) + 1
+        cache.delete(_state_key(plan.pk))
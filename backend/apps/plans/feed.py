@@ -0,0 +1,189 @@
+"""
+Read-only ICS subscription feed of a user's plans
+
+    GET /calendar/<token>.ics
+
+Calendar apps poll subscription URLs every few minutes, so a poll should
+almost never reach the database:
+
+    1. token -> user id is cached (TOKEN_TTL)
+    2. the rendered feed is cached per user with its ETag and Last-Modified,
+       tagged with the user's feed version. Writes that change what the
+       feed shows set a new version (invalidate_calendar_feed in models.py),
+       so a poll costs one cache round trip until the next write.
+    3. on a rebuild each plan's VEVENTs are a separately cached chunk keyed
+       by the plan's date and block version (count + latest update), so only
+       plans that changed or moved to another date are rendered again.
+
+Polls with a matching If-None-Match / If-Modified-Since get 304. The feed
+is also rebuilt after settings.CALENDAR_FEED_TTL seconds, to move the date
+window (FEED_PAST_DAYS .. FEED_FUTURE_DAYS) and to pick up writes that
+bypass the models (raw SQL, admin bulk deletes).
+"""
+
+import hashlib
+import uuid
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .ics import content_line, escape_text, format_utc
+from .models import DailyPlan, TimeBlock, calendar_feed_version_key
+
+User = get_user_model()
+
+FEED_PAST_DAYS = 31
+FEED_FUTURE_DAYS = 180
+TOKEN_TTL = 60 * 60  # seconds a token -> user lookup is cached
+CHUNK_TTL = 60 * 60 * 24 * 7  # seconds rendered plans (and feeds) stay cached
+
+BLOCK_FIELDS = ('id', 'daily_plan_id', 'start_minute', 'end_minute', 'title', 'description', 'category', 'updated_at')
+
+
+def _token_key(token):
+    return f'calendar_token:{token}'
+
+
+def _feed_key(user_id):
+    return f'calendar_feed:{user_id}'
+
+
+def user_for_token(token):
+    """Id of the active user owning a feed token, or None"""
+    user_id = cache.get(_token_key(token))
+    if user_id is None:
+        user_id = User.objects.filter(
+            calendar_token=token, is_active=True
+        ).values_list('pk', flat=True).first()
+        if user_id is not None:
+            cache.set(_token_key(token), user_id, TOKEN_TTL)
+    return user_id
+
+
+def forget_token(token):
+    """Stop serving a rotated or revoked token right away"""
+    if token:
+        cache.delete(_token_key(token))
+
+
+def get_feed(user_id, now=None):
+    """
+    Cached feed of a user, rebuilt when its version or age says so
+
+    Returns:
+        dict: {'body': bytes, 'etag': str, 'last_modified': datetime, ...}
+    """
+    now = now or timezone.now()
+    version_key = calendar_feed_version_key(user_id)
+    cached = cache.get_many([version_key, _feed_key(user_id)])
+    version = cached.get(version_key)
+    entry = cached.get(_feed_key(user_id))
+
+    if (
+        entry is not None
+        and version is not None
+        and entry['version'] == version
+        and now - entry['built_at'] < timedelta(seconds=settings.CALENDAR_FEED_TTL)
+    ):
+        return entry
+
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, None)
+        version = cache.get(version_key)
+
+    # The version is read before the data: a write committed during the
+    # build sets a new one, so this entry is rebuilt on the next poll
+    body = build_feed(user_id, now)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    last_modified = now
+    if entry is not None and entry['etag'] == etag:
+        last_modified = entry['last_modified']
+
+    entry = {
+        'version': version,
+        'built_at': now,
+        'etag': etag,
+        'last_modified': last_modified,
+        'body': body,
+    }
+    cache.set(_feed_key(user_id), entry, CHUNK_TTL)
+    return entry
+
+
+def build_feed(user_id, now):
+    """Render the VCALENDAR of a user's plans in the feed window"""
+    tz_name = User.objects.filter(pk=user_id).values_list('timezone', flat=True).first()
+    try:
+        tz = ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        tz_name, tz = 'UTC', ZoneInfo('UTC')
+    today = now.astimezone(tz).date()
+
+    plans = list(
+        DailyPlan.objects.filter(
+            user_id=user_id,
+            date__gte=today - timedelta(days=FEED_PAST_DAYS),
+            date__lte=today + timedelta(days=FEED_FUTURE_DAYS),
+        ).order_by('date').values('pk', 'date').annotate(
+            blocks=Count('time_blocks'),
+            blocks_updated_at=Max('time_blocks__updated_at'),
+        ).filter(blocks__gt=0)
+    )
+
+    keys = {
+        # The date is part of the key: moving a plan leaves its blocks untouched
+        plan['pk']: f'calendar_chunk:{plan["pk"]}:{plan["date"].isoformat()}:{tz_name}:{plan["blocks"]}:'
+                    f'{plan["blocks_updated_at"].timestamp()}'
+        for plan in plans
+    }
+    chunks = cache.get_many(list(keys.values()))
+
+    stale = {plan['pk']: plan['date'] for plan in plans if keys[plan['pk']] not in chunks}
+    if stale:
+        blocks = {plan_id: [] for plan_id in stale}
+        rows = TimeBlock.objects.filter(daily_plan_id__in=stale).order_by('start_minute').values(*BLOCK_FIELDS)
+        for row in rows:
+            blocks[row['daily_plan_id']].append(row)
+        rendered = {keys[plan_id]: render_plan(stale[plan_id], blocks[plan_id], tz) for plan_id in stale}
+        cache.set_many(rendered, CHUNK_TTL)
+        chunks.update(rendered)
+
+    refresh = f'PT{max(settings.CALENDAR_FEED_TTL // 60, 1)}M'
+    header = b''.join([
+        content_line('BEGIN', 'VCALENDAR'),
+        content_line('VERSION', '2.0'),
+        content_line('PRODID', '-//TIMELOCK//Daily Plans//EN'),
+        content_line('CALSCALE', 'GREGORIAN'),
+        content_line('METHOD', 'PUBLISH'),
+        content_line('X-WR-CALNAME', 'TIMELOCK'),
+        content_line('X-WR-TIMEZONE', tz_name),
+        content_line('REFRESH-INTERVAL;VALUE=DURATION', refresh),
+        content_line('X-PUBLISHED-TTL', refresh),
+    ])
+    return header + b''.join(chunks[keys[plan['pk']]] for plan in plans) + content_line('END', 'VCALENDAR')
+
+
+def render_plan(day, blocks, tz):
+    """VEVENTs of one plan's blocks (minute ranges are wall-clock times of the plan's day)"""
+    midnight = datetime.combine(day, time(), tzinfo=tz)
+    lines = []
+    for block in blocks:
+        lines += [
+            content_line('BEGIN', 'VEVENT'),
+            content_line('UID', f'{block["id"]}@timelock'),
+            content_line('DTSTAMP', format_utc(block['updated_at'])),
+            content_line('DTSTART', format_utc(midnight + timedelta(minutes=block['start_minute']))),
+            content_line('DTEND', format_utc(midnight + timedelta(minutes=block['end_minute']))),
+            content_line('SUMMARY', escape_text(block['title'] or 'Untitled')),
+        ]
+        if block['description']:
+            lines.append(content_line('DESCRIPTION', escape_text(block['description'])))
+        if block['category']:
+            lines.append(content_line('CATEGORIES', escape_text(block['category'])))
+        lines.append(content_line('END', 'VEVENT'))
+    return b''.join(lines)
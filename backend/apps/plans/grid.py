@@ -0,0 +1,116 @@
+"""
+Columnar encoding of a day's time-block grid (?layout=grid)
+
+A day has 21 fixed slots (AM 4-12, PM 1-12). Instead of one object per
+block, the grid layout returns parallel arrays indexed by slot:
+
+    {"ids": [...], "titles": [...], "categories": [...],
+     "planned": [...], "actual": [...], "present": 6, "completed": 2,
+     "extra": [...]}
+
+present/completed are bitmasks (bit i = slot i). With packed=1 the numeric
+columns are replaced by one base64 string holding, little-endian:
+
+    uint32 present, uint32 completed, uint16 planned[21], uint16 actual[21]
+
+Blocks that are not exactly one hourly slot (e.g. 09:00-09:25 or 09:00-11:00)
+have no column; they are listed in "extra" as one object each, by start time.
+"""
+
+import base64
+import struct
+
+SLOTS = tuple(('am', hour) for hour in range(4, 13)) + tuple(('pm', hour) for hour in range(1, 13))
+SLOT_INDEX = {slot: index for index, slot in enumerate(SLOTS)}
+SLOT_COUNT = len(SLOTS)
+
+PACKED_FORMAT = f'<II{SLOT_COUNT}H{SLOT_COUNT}H'
+UINT16_MAX = 0xFFFF
+
+# Block fields the encoder reads (for only() on the blocks query)
+BLOCK_FIELDS = (
+    'id',
+    'daily_plan_id',
+    'period',
+    'hour',
+    'start_minute',
+    'end_minute',
+    'title',
+    'category',
+    'planned_duration',
+    'actual_duration',
+    'is_completed',
+)
+
+
+def encode(blocks, packed=False):
+    """Encode an iterable of TimeBlocks into the grid layout"""
+    ids = [None] * SLOT_COUNT
+    titles = [None] * SLOT_COUNT
+    categories = [None] * SLOT_COUNT
+    planned = [0] * SLOT_COUNT
+    actual = [0] * SLOT_COUNT
+    present = 0
+    completed = 0
+    extra = []
+
+    for block in blocks:
+        index = SLOT_INDEX.get((block.period, block.hour))
+        if index is None:
+            extra.append({
+                'id': str(block.id),
+                'start_minute': block.start_minute,
+                'end_minute': block.end_minute,
+                'title': block.title,
+                'category': block.category,
+                'planned': block.planned_duration,
+                'actual': block.actual_duration,
+                'completed': block.is_completed,
+            })
+            continue
+        ids[index] = str(block.id)
+        titles[index] = block.title
+        categories[index] = block.category
+        planned[index] = block.planned_duration
+        actual[index] = block.actual_duration
+        present |= 1 << index
+        if block.is_completed:
+            completed |= 1 << index
+
+    grid = {
+        'ids': ids,
+        'titles': titles,
+        'categories': categories,
+    }
+    if packed:
+        grid['packed'] = pack(present, completed, planned, actual)
+    else:
+        grid.update({
+            'planned': planned,
+            'actual': actual,
+            'present': present,
+            'completed': completed,
+        })
+    grid['extra'] = sorted(extra, key=lambda item: item['start_minute'])
+    return grid
+
+
+def pack(present, completed, planned, actual):
+    """Pack the numeric columns into a base64 string (see module docstring)"""
+    data = struct.pack(
+        PACKED_FORMAT,
+        present,
+        completed,
+        *(min(value, UINT16_MAX) for value in planned),
+        *(min(value, UINT16_MAX) for value in actual),
+    )
+    return base64.b64encode(data).decode('ascii')
+
+
+def unpack(value):
+    """Inverse of pack(): (present, completed, planned, actual)"""
+    fields = struct.unpack(PACKED_FORMAT, base64.b64decode(value))
+    present, completed = fields[0], fields[1]
+    planned = list(fields[2:2 + SLOT_COUNT])
+    actual = list(fields[2 + SLOT_COUNT:])
+    return present, completed, planned, actual
@@ -0,0 +1,548 @@
+"""
+Streaming ICS (iCalendar, RFC 5545) import into daily plans
+
+    POST /api/plans/daily-plans/import-ics/   (multipart, field "file")
+
+The upload is never loaded as a whole: iter_events() reads it line by line,
+unfolds continuation lines and yields one VEVENT at a time. Every event
+(and every occurrence of a recurring one) becomes a minute-range TimeBlock
+on the plan of its local start date, in the user's timezone.
+
+Blocks are collected in batches of IMPORT_BATCH_SIZE. Each batch runs in
+one transaction with a fixed number of queries: load the blocks imported
+earlier from the batch's events, load the plans and already-planned ranges
+of the batch's new dates, bulk_create the missing plans, bulk_create the
+new blocks, bulk_update the changed ones, recount the touched plans.
+Memory is bounded by the batch plus one IntervalSet per imported date and
+one entry per imported event key.
+
+Re-imports are matched by event key (TimeBlock.ics_uid): the UID, plus the
+occurrence start (RECURRENCE-ID) for recurring events. A block imported
+from the same key is updated in place (moved, retitled) or skipped when
+nothing changed, so importing the same file twice adds nothing and an
+edited export updates what it imported before. Events without a UID are
+always added. An override replaces its occurrence of the recurring event
+(a first pass over a seekable upload collects the overridden keys).
+
+Problems never abort the import; they are reported per event:
+    all-day events, unknown TZID, events spanning more than a day,
+    ranges overlapping a block that is already planned.
+
+The writing helpers (content_line, escape_text) render the subscription
+feed in feed.py.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DailyPlan, TimeBlock, UserCategory, invalidate_calendar_feed
+from .slots import DAY_END_MINUTE, IntervalSet
+
+try:
+    from dateutil.rrule import rrulestr
+except ImportError:  # pragma: no cover - python-dateutil is in requirements.txt
+    rrulestr = None
+
+MAX_ICS_BYTES = 10 * 1024 * 1024
+IMPORT_BATCH_SIZE = 500
+MAX_OCCURRENCES = 366  # per recurring event
+MAX_IMPORT_BLOCKS = 20000  # per upload
+MAX_REPORTED_ERRORS = 100
+
+TITLE_MAX_LENGTH = TimeBlock._meta.get_field('title').max_length
+CATEGORY_MAX_LENGTH = TimeBlock._meta.get_field('category').max_length
+ICS_UID_MAX_LENGTH = TimeBlock._meta.get_field('ics_uid').max_length
+
+# Taken from the event; a re-import compares and updates these
+IMPORTED_FIELDS = ('start_minute', 'end_minute', 'title', 'description', 'category', 'planned_duration')
+
+DURATION_RE = re.compile(
+    r'^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?'
+    r'(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$'
+)
+TEXT_ESCAPES = {'n': '\n', 'N': '\n', ',': ',', ';': ';', '\\': '\\'}
+
+
+class EventError(ValueError):
+    """An event that cannot be imported; reported and skipped"""
+
+
+class Event:
+    """Properties of one VEVENT: {NAME: [(params, value), ...]}"""
+
+    def __init__(self, line):
+        self.line = line
+        self.properties = {}
+
+    def get(self, name):
+        values = self.properties.get(name)
+        return values[0] if values else (None, None)
+
+    def all(self, name):
+        return self.properties.get(name, [])
+
+    @property
+    def uid(self):
+        return self.get('UID')[1]
+
+    @property
+    def summary(self):
+        value = self.get('SUMMARY')[1]
+        return unescape_text(value) if value is not None else None
+
+
+# Parsing
+
+
+def unfold_lines(lines):
+    """
+    Join folded lines (continuations start with a space or tab)
+
+    Works on bytes so a UTF-8 sequence split by the fold is joined before
+    decoding. Yields (line number, text) for each logical line.
+    """
+    buffer = None
+    start = 0
+    for number, raw in enumerate(lines, start=1):
+        raw = raw.rstrip(b'\r\n')
+        if number == 1:
+            raw = raw.lstrip(b'\xef\xbb\xbf')  # UTF-8 BOM
+        if raw[:1] in (b' ', b'\t') and buffer is not None:
+            buffer += raw[1:]
+            continue
+        if buffer:
+            yield start, buffer.decode('utf-8', errors='replace')
+        buffer, start = raw, number
+    if buffer:
+        yield start, buffer.decode('utf-8', errors='replace')
+
+
+def parse_content_line(text):
+    """Split 'NAME;PARAM=a;PARAM="b:c":value' into (NAME, {PARAM: value}, value)"""
+    in_quotes = False
+    for index, char in enumerate(text):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ':' and not in_quotes:
+            head, value = text[:index], text[index + 1:]
+            break
+    else:
+        raise ValueError('missing ":"')
+
+    name, *raw_params = head.split(';')
+    params = {}
+    for raw_param in raw_params:
+        key, _, param_value = raw_param.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def iter_events(lines):
+    """
+    Yield an Event per VEVENT of an iterable of byte lines
+
+    Components nested in an event (VALARM) are skipped; malformed lines
+    are ignored like unknown properties.
+    """
+    event = None
+    depth = 0  # nesting inside the current VEVENT
+    for number, text in unfold_lines(lines):
+        try:
+            name, params, value = parse_content_line(text)
+        except ValueError:
+            continue
+
+        if name == 'BEGIN':
+            if event is not None:
+                depth += 1
+            elif value.upper() == 'VEVENT':
+                event = Event(number)
+        elif name == 'END':
+            if event is None:
+                continue
+            if depth:
+                depth -= 1
+            elif value.upper() == 'VEVENT':
+                yield event
+                event = None
+        elif event is not None and not depth:
+            event.properties.setdefault(name, []).append((params, value))
+
+
+def unescape_text(value):
+    return re.sub(r'\\(.)', lambda match: TEXT_ESCAPES.get(match.group(1), match.group(1)), value)
+
+
+def parse_duration(value):
+    match = DURATION_RE.match(value.strip())
+    if not match:
+        raise EventError(f'Invalid DURATION {value!r}')
+    parts = {key: int(part or 0) for key, part in match.groupdict().items() if key != 'sign'}
+    duration = timedelta(**parts)
+    return -duration if match.group('sign') == '-' else duration
+
+
+def parse_datetime(params, value, default_tz):
+    """
+    DTSTART/DTEND/EXDATE value as an aware datetime (a date for all-day values)
+
+    UTC ('Z') and TZID values keep their zone; floating times are taken in
+    default_tz.
+    """
+    value = value.strip()
+    try:
+        if params.get('VALUE', '').upper() == 'DATE' or len(value) == 8:
+            return datetime.strptime(value, '%Y%m%d').date()
+        if value.endswith('Z'):
+            return datetime.strptime(value, '%Y%m%dT%H%M%SZ').replace(tzinfo=dt_timezone.utc)
+        parsed = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    except ValueError:
+        raise EventError(f'Invalid date-time {value!r}')
+
+    if 'TZID' in params:
+        try:
+            tz = ZoneInfo(params['TZID'])
+        except (ZoneInfoNotFoundError, ValueError):
+            raise EventError(f'Unknown TZID {params["TZID"]!r}')
+    else:
+        tz = default_tz
+    return parsed.replace(tzinfo=tz)
+
+
+def event_occurrences(event, tz):
+    """Yield (start, end) aware datetimes of an event and its recurrences"""
+    params, value = event.get('DTSTART')
+    if value is None:
+        raise EventError('Missing DTSTART')
+    start = parse_datetime(params, value, tz)
+    if not isinstance(start, datetime):
+        raise EventError('All-day events are not imported')
+
+    params, value = event.get('DTEND')
+    if value is not None:
+        end = parse_datetime(params, value, tz)
+        if not isinstance(end, datetime):
+            raise EventError('Invalid DTEND')
+        duration = end - start
+    else:
+        params, value = event.get('DURATION')
+        duration = parse_duration(value) if value is not None else timedelta(0)
+
+    if duration <= timedelta(0):
+        raise EventError('Event has no duration')
+    if duration > timedelta(days=1):
+        raise EventError('Events longer than a day are not imported')
+
+    _, rule = event.get('RRULE')
+    if rule is None:
+        yield start, start + duration
+        return
+    if rrulestr is None:
+        raise EventError('Recurring events need python-dateutil')
+
+    excluded = {
+        parse_datetime(params, part, tz)
+        for params, value in event.all('EXDATE')
+        for part in value.split(',')
+    }
+    try:
+        recurrence = rrulestr(rule, dtstart=start)
+    except (ValueError, TypeError):
+        raise EventError(f'Invalid RRULE {rule!r}')
+
+    for count, occurrence in enumerate(recurrence):
+        if count >= MAX_OCCURRENCES:
+            break
+        if occurrence in excluded or occurrence.date() in excluded:
+            continue
+        yield occurrence, occurrence + duration
+
+
+def occurrence_key(event, start, tz):
+    """
+    TimeBlock.ics_uid of one occurrence, or None for events without a UID
+
+    Single events are keyed by UID; occurrences of a recurring event and
+    their overrides (RECURRENCE-ID) by UID and original start in UTC.
+    """
+    uid = (event.uid or '').strip()
+    if not uid:
+        return None
+    params, recurrence_id = event.get('RECURRENCE-ID')
+    if recurrence_id is not None:
+        original = parse_datetime(params, recurrence_id, tz)
+        key = f'{uid}/{format_utc(original) if isinstance(original, datetime) else original.strftime("%Y%m%d")}'
+    elif event.get('RRULE')[1] is not None:
+        key = f'{uid}/{format_utc(start)}'
+    else:
+        key = uid
+    if len(key) > ICS_UID_MAX_LENGTH:
+        key = 'sha256:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+    return key
+
+
+def local_range(start, end, tz):
+    """(plan date, start_minute, end_minute) of an occurrence in the user's timezone"""
+    local_start = start.astimezone(tz)
+    local_end = end.astimezone(tz)
+    start_minute = local_start.hour * 60 + local_start.minute
+    end_minute = start_minute + (local_end - local_start) // timedelta(minutes=1)
+    if end_minute == start_minute:
+        end_minute += 1  # sub-minute events still get a minute
+    # The plan's day ends at 01:00 of the next day (PM 12); later parts are cut off
+    return local_start.date(), start_minute, min(end_minute, DAY_END_MINUTE)
+
+
+# Writing (calendar feed)
+
+FOLD_OCTETS = 75
+
+
+def escape_text(value):
+    """TEXT value escaping (backslash, semicolon, comma, newline)"""
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def format_utc(value):
+    """Aware datetime as a UTC DATE-TIME ('20250101T000000Z')"""
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def content_line(name, value):
+    """'NAME:value' folded at 75 octets (never inside a UTF-8 sequence), CRLF terminated"""
+    data = f'{name}:{value}'.encode('utf-8')
+    if len(data) <= FOLD_OCTETS:
+        return data + b'\r\n'
+    parts = []
+    limit = FOLD_OCTETS
+    while len(data) > limit:
+        cut = limit
+        while cut and (data[cut] & 0xC0) == 0x80:  # continuation byte
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+        limit = FOLD_OCTETS - 1  # continuation lines start with a space
+    parts.append(data)
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+# Import
+
+
+class ICSImport:
+    """
+    Import events of one upload into a user's plans
+
+        result = ICSImport(user).run(uploaded_file)
+    """
+
+    def __init__(self, user, batch_size=IMPORT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        try:
+            self.tz = ZoneInfo(user.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            self.tz = dt_timezone.utc
+        self.plan_ids = {}  # date -> plan id
+        self.planned = {}  # date -> IntervalSet of the plan's blocks
+        self.imported = {}  # ics_uid -> [date, TimeBlock] of blocks imported from that key
+        self.overridden = set()  # ics_uid of occurrences replaced by a RECURRENCE-ID event
+        self.pending = []  # (date, TimeBlock, event) waiting for the next flush
+        self.result = {
+            'events': 0,
+            'created_plans': 0,
+            'created_blocks': 0,
+            'updated_blocks': 0,
+            'unchanged_blocks': 0,
+            'error_count': 0,
+            'errors': [],
+        }
+
+    def run(self, lines):
+        if hasattr(lines, 'seek'):
+            self.overridden = self.find_overrides(lines)
+            lines.seek(0)
+        for event in iter_events(lines):
+            self.result['events'] += 1
+            try:
+                self.add_event(event)
+            except EventError as exc:
+                self.error(event, str(exc))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+            if self.result['created_blocks'] + len(self.pending) >= MAX_IMPORT_BLOCKS:
+                self.error(event, f'Import stopped at {MAX_IMPORT_BLOCKS} blocks')
+                break
+        self.flush()
+        return self.result
+
+    def find_overrides(self, lines):
+        """Keys of the occurrences overridden by a RECURRENCE-ID event of the upload"""
+        keys = set()
+        for event in iter_events(lines):
+            if event.get('RECURRENCE-ID')[1] is not None:
+                try:
+                    keys.add(occurrence_key(event, None, self.tz))
+                except EventError:
+                    continue
+        keys.discard(None)
+        return keys
+
+    def error(self, event, detail, day=None):
+        self.result['error_count'] += 1
+        if len(self.result['errors']) < MAX_REPORTED_ERRORS:
+            self.result['errors'].append({
+                'line': event.line,
+                'uid': event.uid,
+                'summary': event.summary,
+                'date': day,
+                'detail': detail,
+            })
+
+    def add_event(self, event):
+        title = (event.summary or '')[:TITLE_MAX_LENGTH] or None
+        _, description = event.get('DESCRIPTION')
+        _, categories = event.get('CATEGORIES')
+        category = None
+        if categories:
+            category = unescape_text(re.split(r'(?<!\\),', categories)[0]).strip()[:CATEGORY_MAX_LENGTH] or None
+
+        override = event.get('RECURRENCE-ID')[1] is not None
+        for start, end in event_occurrences(event, self.tz):
+            key = occurrence_key(event, start, self.tz)
+            if override:
+                self.overridden.add(key)
+            elif key in self.overridden:
+                continue  # replaced by its RECURRENCE-ID event
+            day, start_minute, end_minute = local_range(start, end, self.tz)
+            if start_minute >= DAY_END_MINUTE:
+                continue
+            block = TimeBlock(
+                start_minute=start_minute,
+                end_minute=end_minute,
+                title=title,
+                description=unescape_text(description) if description else None,
+                category=category,
+                planned_duration=end_minute - start_minute,
+                ics_uid=key,
+            )
+            self.pending.append((day, block, event))
+            if self.result['created_blocks'] + len(self.pending) >= MAX_IMPORT_BLOCKS:
+                return
+
+    def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+
+        with transaction.atomic():
+            self.load_imported({block.ics_uid for _, block, _ in pending if block.ics_uid} - set(self.imported))
+            days = {day for day, _, _ in pending} | {entry[0] for entry in self.imported.values()}
+            self.load_dates(days - set(self.planned))
+
+            created = []  # [date, TimeBlock] entries, shared with self.imported
+            updated = {}  # pk -> [date, TimeBlock] of stored blocks that changed
+            for day, block, event in pending:
+                entry = self.imported.get(block.ics_uid) if block.ics_uid else None
+                if entry is None:
+                    if self.planned[day].overlapping(block.start_minute, block.end_minute) is not None:
+                        self.error(event, 'Overlaps a block that is already planned', day)
+                        continue
+                    self.planned[day].add(block.start_minute, block.end_minute)
+                    entry = [day, block]
+                    created.append(entry)
+                    if block.ics_uid:
+                        self.imported[block.ics_uid] = entry
+                    continue
+
+                old_day, old = entry
+                if (old_day, old.start_minute, old.end_minute) != (day, block.start_minute, block.end_minute):
+                    # Moved: the block's own previous range does not count as a conflict
+                    self.planned[old_day].remove(old.start_minute, old.end_minute)
+                    if self.planned[day].overlapping(block.start_minute, block.end_minute) is not None:
+                        self.planned[old_day].add(old.start_minute, old.end_minute)
+                        self.error(event, 'Overlaps a block that is already planned', day)
+                        continue
+                    self.planned[day].add(block.start_minute, block.end_minute)
+                elif all(getattr(old, field) == getattr(block, field) for field in IMPORTED_FIELDS):
+                    self.result['unchanged_blocks'] += 1
+                    continue
+
+                for field in IMPORTED_FIELDS:
+                    setattr(old, field, getattr(block, field))
+                entry[0] = day
+                if not old._state.adding:  # otherwise it is still in created
+                    updated[old.pk] = entry
+            if not created and not updated:
+                return
+
+            changed = created + list(updated.values())
+            missing = sorted({day for day, _ in changed if day not in self.plan_ids})
+            if missing:
+                DailyPlan.objects.bulk_create(
+                    [DailyPlan(user=self.user, date=day) for day in missing],
+                    ignore_conflicts=True,
+                )
+                new_plans = dict(
+                    DailyPlan.objects.filter(user=self.user, date__in=missing).values_list('date', 'pk')
+                )
+                self.plan_ids.update(new_plans)
+                self.result['created_plans'] += len(new_plans)
+
+            touched = {block.daily_plan_id for _, block in updated.values()}
+            now = timezone.now()
+            for day, block in changed:
+                block.daily_plan_id = self.plan_ids[day]
+                block.updated_at = now  # bulk_update skips auto_now
+            touched |= {block.daily_plan_id for _, block in changed}
+            TimeBlock.objects.bulk_create([block for _, block in created])
+            TimeBlock.objects.bulk_update(
+                [block for _, block in updated.values()], ['daily_plan', *IMPORTED_FIELDS, 'updated_at']
+            )
+            self.result['created_blocks'] += len(created)
+            self.result['updated_blocks'] += len(updated)
+
+            # bulk_create/bulk_update skip TimeBlock.save(); recount and record categories at once
+            DailyPlan.objects.filter(pk__in=touched).reconcile_block_counters()
+            UserCategory.objects.record(
+                self.user.pk, Counter(block.category for _, block in created if block.category)
+            )
+            invalidate_calendar_feed(self.user.pk)
+
+    def load_imported(self, keys):
+        """Cache date and block of events imported by an earlier upload"""
+        if not keys:
+            return
+        blocks = (
+            TimeBlock.objects.filter(daily_plan__user=self.user, ics_uid__in=keys)
+            .select_related('daily_plan')
+            .only('ics_uid', 'daily_plan__date', *IMPORTED_FIELDS)
+        )
+        for block in blocks:
+            self.imported[block.ics_uid] = [block.daily_plan.date, block]
+
+    def load_dates(self, days):
+        """Cache plan ids and planned ranges of dates seen for the first time"""
+        if not days:
+            return
+        plans = dict(
+            DailyPlan.objects.filter(user=self.user, date__in=days).values_list('pk', 'date')
+        )
+        for day in days:
+            self.planned[day] = IntervalSet()
+        for plan_id, day in plans.items():
+            self.plan_ids[day] = plan_id
+        ranges = TimeBlock.objects.filter(daily_plan_id__in=plans).values_list(
+            'daily_plan_id', 'start_minute', 'end_minute'
+        )
+        for plan_id, start, end in ranges:
+            self.planned[plans[plan_id]].add(start, end)
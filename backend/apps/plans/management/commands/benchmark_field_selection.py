@@ -0,0 +1,204 @@
+"""
+Benchmark plan and block reads with and without ?fields= / ?omit=
+
+Usage:
+    python manage.py benchmark_field_selection
+    python manage.py benchmark_field_selection --plans 60 --brain-dump-kb 16 --repeat 100
+
+Generates one user with a month of plans (long brain dumps, every hourly
+slot filled with a described block), then requests the read endpoints
+through the full DRF stack with the full representation and with the
+sparse fieldsets a client would use for a calendar or a checklist view.
+For each request it prints the response size (raw and gzipped), the
+number of queries and the p50/p95 time, and how much the selection saved
+over the full response.
+
+Everything runs in one transaction that is rolled back, so nothing is
+left in the database. Works on PostgreSQL and SQLite.
+"""
+
+import gzip
+import logging
+import random
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.plans.models import DailyPlan, TimeBlock
+
+User = get_user_model()
+
+WORDS = (
+    'review chapter essay physics problem set lecture notes mock exam vocabulary '
+    'library group project outline draft read summary formula lab report'
+).split()
+
+FIRST_DAY = date(2025, 3, 1)
+
+
+class Command(BaseCommand):
+    help = 'Compare response size and time of plan/block reads with and without ?fields=/?omit='
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', type=int, default=31, help='Consecutive daily plans (default: 31)')
+        parser.add_argument('--blocks', type=int, default=24, help='Blocks per plan, at most 24 (default: 24)')
+        parser.add_argument('--brain-dump-kb', type=int, default=8, help='Brain dump size in KB (default: 8)')
+        parser.add_argument(
+            '--description-chars', type=int, default=400, help='Block description length (default: 400)'
+        )
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per request (default: 50)')
+        parser.add_argument('--seed', type=int, default=40, help='Random seed for the generated text')
+
+    def handle(self, *args, **options):
+        for name in ('plans', 'blocks', 'repeat'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} must be >= 1')
+        if options['blocks'] > 24:
+            raise CommandError('--blocks must be <= 24 (one block per hourly slot)')
+        if options['plans'] > 62:
+            raise CommandError('--plans must be <= 62 (the range endpoint limit)')
+
+        self.random = random.Random(options['seed'])
+        self.repeat = options['repeat']
+
+        # SQL echoed by DEBUG logging would dominate the timings
+        sql_logger = logging.getLogger('django.db.backends')
+        sql_logger_disabled, sql_logger.disabled = sql_logger.disabled, True
+        try:
+            self.run(options)
+        finally:
+            sql_logger.disabled = sql_logger_disabled
+
+    def run(self, options):
+        with transaction.atomic():
+            user, plan = self.generate(options)
+            client = APIClient(HTTP_HOST='localhost')
+            client.force_authenticate(user)
+            self.stdout.write(
+                f'{options["plans"]} plans x {options["blocks"]} blocks, '
+                f'{options["brain_dump_kb"]} KB brain dumps, {options["description_chars"]}-char descriptions '
+                f'({connection.vendor})\n'
+            )
+            self.run_requests(client, plan, options['plans'])
+            transaction.set_rollback(True)
+
+    # Dataset
+
+    def text(self, length):
+        words = []
+        size = 0
+        while size < length:
+            word = self.random.choice(WORDS)
+            words.append(word)
+            size += len(word) + 1
+        return ' '.join(words)[:length]
+
+    def generate(self, options):
+        user = User.objects.create_user(
+            email=f'benchmark-{uuid.uuid4().hex[:12]}@example.com', username='benchmark'
+        )
+        plans = DailyPlan.objects.bulk_create([
+            DailyPlan(
+                user=user,
+                date=FIRST_DAY + timedelta(days=offset),
+                priorities=[self.text(40) for _ in range(3)],
+                brain_dump=self.text(options['brain_dump_kb'] * 1024),
+                total_blocks=options['blocks'],
+            )
+            for offset in range(options['plans'])
+        ])
+        slots = [(period, hour) for period in ('am', 'pm') for hour in range(1, 13)][:options['blocks']]
+        TimeBlock.objects.bulk_create(
+            [
+                TimeBlock(
+                    daily_plan=plan,
+                    period=period,
+                    hour=hour,
+                    title=self.text(30),
+                    description=self.text(options['description_chars']),
+                    category=self.random.choice(WORDS),
+                    planned_duration=60,
+                    actual_duration=self.random.randint(0, 60),
+                )
+                for plan in plans
+                for period, hour in slots
+            ],
+            batch_size=1000,
+        )
+        return user, plans[0]
+
+    # Requests
+
+    def run_requests(self, client, plan, days):
+        last_day = (FIRST_DAY + timedelta(days=days - 1)).isoformat()
+        detail = f'/api/plans/daily-plans/{plan.pk}/'
+        range_url = f'/api/plans/daily-plans/range/?from={FIRST_DAY.isoformat()}&to={last_day}'
+        blocks = f'/api/plans/time-blocks/?date={FIRST_DAY.isoformat()}'
+
+        groups = [
+            ('plan detail', [
+                ('full', detail),
+                ('omit=brain_dump,time_blocks.description',
+                 f'{detail}?omit=brain_dump,time_blocks.description'),
+                ('fields=id,date,time_blocks.title,time_blocks.is_completed',
+                 f'{detail}?fields=id,date,time_blocks.title,time_blocks.is_completed'),
+            ]),
+            (f'range ({days} days)', [
+                ('full', range_url),
+                ('compact=1', f'{range_url}&compact=1'),
+                ('fields=id,completion_rate', f'{range_url}&fields=id,completion_rate'),
+            ]),
+            ('time blocks of a day', [
+                ('full', blocks),
+                ('fields=id,title,is_completed', f'{blocks}&fields=id,title,is_completed'),
+            ]),
+        ]
+
+        header = f'{"request":<62}' + ''.join(
+            f'{column:>10}' for column in ('bytes', 'gzip', 'queries', 'p50', 'p95', 'saved')
+        )
+        for title, cases in groups:
+            self.stdout.write(f'\n{title}')
+            self.stdout.write(header)
+            self.stdout.write('-' * len(header))
+            timings = self.time_requests(client, [url for _, url in cases])
+            full_bytes = full_p50 = None
+            for (label, url), (p50, p95) in zip(cases, timings):
+                size, gzipped, queries = self.measure(client, url)
+                if full_bytes is None:
+                    full_bytes, full_p50 = size, p50
+                    saved = ''
+                else:
+                    saved = f'{100 - size * 100 / full_bytes:.0f}%/{100 - p50 * 100 / full_p50:.0f}%'
+                self.stdout.write(
+                    f'{label:<62}{size:>10}{gzipped:>10}{queries:>10}'
+                    f'{p50:>8.2f}ms{p95:>8.2f}ms{saved:>10}'
+                )
+        self.stdout.write('\nsaved: response bytes / p50 time compared with the full response of the same request')
+
+    def measure(self, client, url):
+        """Response size (raw, gzipped) and query count of one request"""
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} returned {response.status_code}: {response.content[:200]!r}')
+        return len(response.content), len(gzip.compress(response.content)), len(context.captured_queries)
+
+    def time_requests(self, client, urls):
+        """p50/p95 of each url; runs are interleaved so drift hits every variant alike"""
+        for url in urls:
+            client.get(url)  # warm up
+        timings = [[] for _ in urls]
+        for _ in range(self.repeat):
+            for index, url in enumerate(urls):
+                started = time.perf_counter()
+                client.get(url)
+                timings[index].append((time.perf_counter() - started) * 1000)
+        return [(statistics.median(runs), statistics.quantiles(runs, n=20)[-1]) for runs in timings]
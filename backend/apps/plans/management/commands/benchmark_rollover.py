@@ -0,0 +1,192 @@
+"""
+Benchmark the nightly rollover of unfinished blocks on a large user base
+
+Usage:
+    python manage.py benchmark_rollover
+    python manage.py benchmark_rollover --users 20000 --chunk-size 500 1000 2000 --repeat 3
+
+Generates --users opted-in users spread over a few timezones, each with
+yesterday's plan holding --blocks unfinished blocks and one completed
+block. --planned-today percent of them already planned today, in a slot
+that collides with a carried block, so the overlap check has work to do.
+Then runs rollover_unfinished_blocks() once per chunk size and prints the
+time, the number of queries and the users/s and blocks/s it achieved.
+
+Everything runs in one transaction that is rolled back (each run in a
+savepoint of its own), so nothing is left in the database. Opted-in users
+already in the database are rolled over too and show up in the totals.
+Works on PostgreSQL and SQLite; generating 100k users takes a while.
+"""
+
+import logging
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.plans.models import DailyPlan, TimeBlock
+from apps.plans.rollover import local_today, rollover_unfinished_blocks
+
+User = get_user_model()
+
+TIMEZONES = ('Asia/Seoul', 'UTC', 'Europe/Berlin', 'America/New_York')
+SLOTS = [(period, hour) for period in ('am', 'pm') for hour in range(1, 13)]
+BATCH = 2000  # users generated per round of bulk inserts
+
+
+class Command(BaseCommand):
+    help = 'Time rollover_unfinished_blocks() on generated users for one or more chunk sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help='Opted-in users (default: 100000)')
+        parser.add_argument(
+            '--blocks', type=int, default=3, help='Unfinished blocks per user yesterday, at most 23 (default: 3)'
+        )
+        parser.add_argument(
+            '--planned-today', type=int, default=10,
+            help='Percent of users who already planned a colliding block today (default: 10)',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, nargs='+',
+            default=sorted({250, settings.PLAN_ROLLOVER_CHUNK_SIZE, 4000}),
+            help=f'Users per transaction; several values are compared (default: 250 '
+                 f'{settings.PLAN_ROLLOVER_CHUNK_SIZE} 4000)',
+        )
+        parser.add_argument('--repeat', type=int, default=1, help='Timed runs per chunk size (default: 1)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated blocks')
+
+    def handle(self, *args, **options):
+        for name in ('users', 'blocks', 'repeat'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} must be >= 1')
+        if options['blocks'] > len(SLOTS) - 1:
+            raise CommandError(f'--blocks must be <= {len(SLOTS) - 1} (one slot stays for the completed block)')
+        if not 0 <= options['planned_today'] <= 100:
+            raise CommandError('--planned-today must be between 0 and 100')
+        if min(options['chunk_size']) < 1:
+            raise CommandError('--chunk-size must be >= 1')
+
+        self.random = random.Random(options['seed'])
+
+        # SQL echoed by DEBUG logging would dominate the timings
+        sql_logger = logging.getLogger('django.db.backends')
+        sql_logger_disabled, sql_logger.disabled = sql_logger.disabled, True
+        try:
+            self.run(options)
+        finally:
+            sql_logger.disabled = sql_logger_disabled
+
+    def run(self, options):
+        now = timezone.now()
+        with transaction.atomic():
+            started = time.perf_counter()
+            carried = self.generate(options, now)
+            self.stdout.write(
+                f'{options["users"]} users x {options["blocks"]} unfinished blocks, '
+                f'{options["planned_today"]}% planned today, {carried} blocks to carry over '
+                f'({connection.vendor}, generated in {time.perf_counter() - started:.1f}s)\n'
+            )
+
+            header = f'{"chunk size":>10}' + ''.join(
+                f'{column:>12}' for column in ('users', 'blocks', 'queries', 'seconds', 'users/s', 'blocks/s')
+            )
+            self.stdout.write(header)
+            self.stdout.write('-' * len(header))
+            for chunk_size in options['chunk_size']:
+                runs = [self.time_rollover(now, chunk_size) for _ in range(options['repeat'])]
+                totals, queries = runs[0][0], runs[0][1]
+                seconds = statistics.median(elapsed for _, _, elapsed in runs)
+                self.stdout.write(
+                    f'{chunk_size:>10}{totals["users"]:>12}{totals["blocks"]:>12}{queries:>12}{seconds:>12.2f}'
+                    f'{totals["users"] / seconds:>12.0f}{totals["blocks"] / seconds:>12.0f}'
+                )
+            transaction.set_rollback(True)
+
+        if options['repeat'] > 1:
+            self.stdout.write(f'\nseconds: median of {options["repeat"]} runs')
+
+    def time_rollover(self, now, chunk_size):
+        """(totals, queries, seconds) of one run, rolled back afterwards"""
+        savepoint = transaction.savepoint()
+        try:
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                totals = rollover_unfinished_blocks(now=now, chunk_size=chunk_size)
+                elapsed = time.perf_counter() - started
+        finally:
+            transaction.savepoint_rollback(savepoint)
+        return totals, len(context.captured_queries), elapsed
+
+    # Dataset
+
+    def generate(self, options, now):
+        """Create the users and their plans; returns the number of blocks that will be carried over"""
+        run = uuid.uuid4().hex[:8]
+        password = make_password(None)
+        today = {tz_name: local_today(tz_name, now) for tz_name in TIMEZONES}
+        carried = 0
+
+        for offset in range(0, options['users'], BATCH):
+            users = User.objects.bulk_create([
+                User(
+                    email=f'rollover-{run}-{index}@example.com',
+                    username='benchmark',
+                    password=password,
+                    timezone=TIMEZONES[index % len(TIMEZONES)],
+                    auto_rollover=True,
+                )
+                for index in range(offset, min(offset + BATCH, options['users']))
+            ])
+            yesterday_plans = DailyPlan.objects.bulk_create([
+                DailyPlan(
+                    user=user,
+                    date=today[user.timezone] - timedelta(days=1),
+                    total_blocks=options['blocks'] + 1,
+                    completed_blocks=1,
+                )
+                for user in users
+            ])
+            planners = [user for user in users if self.random.randrange(100) < options['planned_today']]
+            today_plans = dict(zip(
+                (user.pk for user in planners),
+                DailyPlan.objects.bulk_create([
+                    DailyPlan(user=user, date=today[user.timezone], total_blocks=1) for user in planners
+                ]),
+            ))
+
+            blocks = []
+            for user, plan in zip(users, yesterday_plans):
+                slots = self.random.sample(SLOTS, options['blocks'] + 1)
+                for index, (period, hour) in enumerate(slots):
+                    blocks.append(self.block(plan, period, hour, is_completed=index == 0))
+                carried += options['blocks']
+                if user.pk in today_plans:
+                    # Planned over the first unfinished block: that one stays behind
+                    period, hour = slots[1]
+                    blocks.append(self.block(today_plans[user.pk], period, hour, is_completed=False))
+                    carried -= 1
+            TimeBlock.objects.bulk_create(blocks, batch_size=5000)
+
+        return carried
+
+    def block(self, plan, period, hour, is_completed):
+        block = TimeBlock(
+            daily_plan=plan,
+            period=period,
+            hour=hour,
+            title=f'{period} {hour} task',
+            category=self.random.choice(('study', 'work', 'gym', 'reading')),
+            planned_duration=60,
+            is_completed=is_completed,
+        )
+        block.sync_slot()  # bulk_create skips save()
+        return block
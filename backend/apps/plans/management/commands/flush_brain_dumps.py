@@ -0,0 +1,42 @@
+"""
+Write coalesced brain dump autosaves whose flush deadline has passed
+
+Run every minute from cron, or keep it running with --every:
+    python manage.py flush_brain_dumps
+    python manage.py flush_brain_dumps --every 5
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.plans.autosave import flush_due
+
+
+class Command(BaseCommand):
+    help = 'Flush pending brain dump autosaves past their BRAIN_DUMP_COALESCE_SECONDS deadline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=None,
+            help='Keep running and flush every N seconds (default: flush once and exit)',
+        )
+
+    def handle(self, *args, **options):
+        every = options['every']
+        if every is not None and every < 1:
+            raise CommandError('--every must be >= 1')
+
+        while True:
+            written, cleared = flush_due()
+            if written or cleared or every is None:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Flushed {written} brain dumps, cleared {cleared} deadlines'
+                ))
+            if every is None:
+                return
+            time.sleep(every)
+            close_old_connections()
@@ -0,0 +1,37 @@
+"""
+Fix drift in DailyPlan.total_blocks / completed_blocks
+
+Usage:
+    python manage.py reconcile_plan_counters
+    python manage.py reconcile_plan_counters --since 2025-01-01
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.plans.models import DailyPlan
+
+
+class Command(BaseCommand):
+    help = 'Recount time blocks for daily plans whose denormalized counters drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            default=None,
+            help='Only check plans dated on or after YYYY-MM-DD (default: all plans)',
+        )
+
+    def handle(self, *args, **options):
+        plans = DailyPlan.objects.all()
+
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--since must be in YYYY-MM-DD format')
+            plans = plans.filter(date__gte=since)
+
+        fixed = plans.reconcile_block_counters()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {fixed} daily plans'))
@@ -0,0 +1,34 @@
+"""
+Copy yesterday's unfinished time blocks into today for opted-in users
+
+Run hourly so each timezone is handled shortly after its local midnight:
+    python manage.py rollover_unfinished_blocks
+    python manage.py rollover_unfinished_blocks --chunk-size 500
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.plans.rollover import rollover_unfinished_blocks
+
+
+class Command(BaseCommand):
+    help = 'Roll unfinished time blocks over into the new day for users with auto_rollover'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.PLAN_ROLLOVER_CHUNK_SIZE,
+            help=f'Users per transaction (default: {settings.PLAN_ROLLOVER_CHUNK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be >= 1')
+
+        totals = rollover_unfinished_blocks(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled over {totals['blocks']} time blocks into {totals['plans']} new daily plans "
+            f"for {totals['users']} users"
+        ))
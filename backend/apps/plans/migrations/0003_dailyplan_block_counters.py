@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_block_counters(apps, schema_editor):
+    DailyPlan = apps.get_model('plans', 'DailyPlan')
+    TimeBlock = apps.get_model('plans', 'TimeBlock')
+
+    blocks = TimeBlock.objects.filter(daily_plan=OuterRef('pk')).order_by().values('daily_plan')
+    DailyPlan.objects.update(
+        total_blocks=Coalesce(Subquery(blocks.annotate(c=Count('pk')).values('c')), 0),
+        completed_blocks=Coalesce(
+            Subquery(blocks.filter(is_completed=True).annotate(c=Count('pk')).values('c')), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyplan',
+            name='completed_blocks',
+            field=models.PositiveIntegerField(default=0, verbose_name='Completed Blocks'),
+        ),
+        migrations.AddField(
+            model_name='dailyplan',
+            name='total_blocks',
+            field=models.PositiveIntegerField(default=0, verbose_name='Total Blocks'),
+        ),
+        migrations.RunPython(backfill_block_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0003_dailyplan_block_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyplan',
+            name='brain_dump_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped on every brain dump change (delta autosave base version)', verbose_name='Brain Dump Version'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:55
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0004_dailyplan_brain_dump_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanTemplate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, verbose_name='Template Name')),
+                ('priorities', models.JSONField(blank=True, default=list, verbose_name='Priorities')),
+                ('brain_dump', models.TextField(blank=True, null=True, verbose_name='Brain Dump')),
+                ('weekdays', models.JSONField(blank=True, default=list, help_text='Days of week to repeat on (0=Monday ... 6=Sunday)', verbose_name='Weekdays')),
+                ('start_date', models.DateField(blank=True, null=True, verbose_name='Repeat From')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Repeat Until')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plan_templates', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Plan Template',
+                'verbose_name_plural': 'Plan Templates',
+                'db_table': 'plan_templates',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlanTemplateBlock',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('period', models.CharField(choices=[('am', 'AM'), ('pm', 'PM')], max_length=2, verbose_name='Period (AM/PM)')),
+                ('hour', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)], verbose_name='Hour (1-12)')),
+                ('title', models.CharField(blank=True, max_length=200, null=True, verbose_name='Block Title')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Description')),
+                ('category', models.CharField(blank=True, max_length=50, null=True, verbose_name='Category')),
+                ('planned_duration', models.IntegerField(default=60, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Planned Duration (minutes)')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='plans.plantemplate', verbose_name='Template')),
+            ],
+            options={
+                'verbose_name': 'Plan Template Block',
+                'verbose_name_plural': 'Plan Template Blocks',
+                'db_table': 'plan_template_blocks',
+                'ordering': ['period', 'hour'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='plantemplate',
+            index=models.Index(fields=['user', 'created_at'], name='idx_plan_template_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='plantemplateblock',
+            constraint=models.UniqueConstraint(fields=('template', 'period', 'hour'), name='unique_template_block_period_hour'),
+        ),
+    ]
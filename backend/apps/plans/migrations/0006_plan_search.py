@@ -0,0 +1,31 @@
+"""
+Full-text search over daily plans
+
+PostgreSQL gets a GIN-indexed tsvector column, SQLite an FTS5 table; both
+are maintained by triggers (see apps/plans/search.py). Neither is part of
+the Django model state.
+"""
+
+from django.db import migrations
+
+from apps.plans import search
+
+
+def install_search(apps, schema_editor):
+    search.install(schema_editor.connection)
+    search.rebuild(schema_editor.connection)
+
+
+def uninstall_search(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0005_plan_templates'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:00
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_user_categories(apps, schema_editor):
+    TimeBlock = apps.get_model('plans', 'TimeBlock')
+    UserCategory = apps.get_model('plans', 'UserCategory')
+
+    rows = (
+        TimeBlock.objects.exclude(category__isnull=True).exclude(category='')
+        .order_by()
+        .values('daily_plan__user_id', 'category')
+        .annotate(usage_count=Count('pk'), last_used_at=Max('updated_at'))
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+    for row in rows:
+        batch.append(UserCategory(
+            user_id=row['daily_plan__user_id'],
+            name=row['category'],
+            usage_count=row['usage_count'],
+            last_used_at=row['last_used_at'],
+        ))
+        if len(batch) >= 1000:
+            UserCategory.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    UserCategory.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0006_plan_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCategory',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50, verbose_name='Category')),
+                ('usage_count', models.PositiveIntegerField(default=0, verbose_name='Usage Count')),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Last Used At')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categories', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'User Category',
+                'verbose_name_plural': 'User Categories',
+                'db_table': 'user_categories',
+                'ordering': ['-usage_count', '-last_used_at'],
+                'indexes': [models.Index(fields=['user', '-usage_count', '-last_used_at'], name='idx_user_category_rank')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='usercategory',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_user_category'),
+        ),
+        migrations.RunPython(backfill_user_categories, migrations.RunPython.noop),
+    ]
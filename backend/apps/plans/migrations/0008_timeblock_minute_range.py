@@ -0,0 +1,96 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:30
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Case, F, Value, When
+
+from apps.plans import search, slots
+
+
+def backfill_minutes(apps, schema_editor):
+    TimeBlock = apps.get_model('plans', 'TimeBlock')
+    start = (F('hour') + Case(When(period='pm', then=Value(12)), default=Value(0))) * 60
+    TimeBlock.objects.update(start_minute=start, end_minute=start + slots.SLOT_MINUTES)
+
+
+def install_guard(apps, schema_editor):
+    slots.install(schema_editor.connection)
+
+
+def uninstall_guard(apps, schema_editor):
+    slots.uninstall(schema_editor.connection)
+
+
+# SQLite cannot rebuild time_blocks while the search triggers on daily_plans
+# reference it: drop the search objects first and rebuild them afterwards
+
+
+def suspend_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        search.uninstall(schema_editor.connection)
+
+
+def resume_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        search.install(schema_editor.connection)
+        search.rebuild(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0007_user_categories'),
+    ]
+
+    operations = [
+        migrations.RunPython(suspend_search, resume_search),
+        migrations.AddField(
+            model_name='timeblock',
+            name='start_minute',
+            field=models.PositiveSmallIntegerField(null=True, verbose_name='Start (minutes after midnight)'),
+        ),
+        migrations.AddField(
+            model_name='timeblock',
+            name='end_minute',
+            field=models.PositiveSmallIntegerField(null=True, verbose_name='End (minutes after midnight)'),
+        ),
+        migrations.RunPython(backfill_minutes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='timeblock',
+            name='start_minute',
+            field=models.PositiveSmallIntegerField(validators=[django.core.validators.MaxValueValidator(1499)], verbose_name='Start (minutes after midnight)'),
+        ),
+        migrations.AlterField(
+            model_name='timeblock',
+            name='end_minute',
+            field=models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1500)], verbose_name='End (minutes after midnight)'),
+        ),
+        migrations.AlterField(
+            model_name='timeblock',
+            name='period',
+            field=models.CharField(blank=True, choices=[('am', 'AM'), ('pm', 'PM')], max_length=2, null=True, verbose_name='Period (AM/PM)'),
+        ),
+        migrations.AlterField(
+            model_name='timeblock',
+            name='hour',
+            field=models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)], verbose_name='Hour (1-12)'),
+        ),
+        migrations.AlterModelOptions(
+            name='timeblock',
+            options={'ordering': ['start_minute'], 'verbose_name': 'Time Block', 'verbose_name_plural': 'Time Blocks'},
+        ),
+        migrations.RemoveIndex(
+            model_name='timeblock',
+            name='idx_timeblock_plan_time',
+        ),
+        migrations.AddIndex(
+            model_name='timeblock',
+            index=models.Index(fields=['daily_plan', 'start_minute'], name='idx_timeblock_plan_time'),
+        ),
+        migrations.AddConstraint(
+            model_name='timeblock',
+            constraint=models.CheckConstraint(check=models.Q(('end_minute__lte', 1500), ('start_minute__lt', models.F('end_minute'))), name='timeblock_minute_range'),
+        ),
+        migrations.RunPython(install_guard, uninstall_guard),
+        migrations.RunPython(resume_search, suspend_search),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0008_timeblock_minute_range'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyplan',
+            name='brain_dump_flush_by',
+            field=models.DateTimeField(blank=True, help_text='Coalesced autosave edits may be pending until then (flush_brain_dumps writes them)', null=True, verbose_name='Brain Dump Flush Deadline'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyplan',
+            index=models.Index(condition=models.Q(('brain_dump_flush_by__isnull', False)), fields=['brain_dump_flush_by'], name='idx_daily_plan_flush_by'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0009_dailyplan_brain_dump_flush_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeblock',
+            name='ics_uid',
+            field=models.CharField(blank=True, help_text='Re-importing an event with the same UID updates this block (see ics.py)', max_length=255, null=True, verbose_name='ICS Event UID'),
+        ),
+        migrations.AddIndex(
+            model_name='timeblock',
+            index=models.Index(condition=models.Q(('ics_uid__isnull', False)), fields=['ics_uid'], name='idx_timeblock_ics_uid'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+"""
+Re-index both plans when a time block moves to another plan
+
+Re-installs the search triggers (apps/plans/search.py) so an UPDATE of
+time_blocks.daily_plan_id refreshes the old plan's search document as well
+as the new one's. SQLite triggers cannot be replaced in place, so the
+block update trigger is dropped first.
+"""
+
+from django.db import migrations
+
+from apps.plans import search
+
+
+def reinstall_search(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER IF EXISTS time_blocks_search_update')
+    search.install(connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0010_timeblock_ics_uid'),
+    ]
+
+    operations = [
+        migrations.RunPython(reinstall_search, migrations.RunPython.noop),
+    ]
@@ -4,13 +4,103 @@ Based on database_erd.md specifications
 """
 
 import uuid
-from django.db import models
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import GreaterThan
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import slots
 
 User = get_user_model()
 
 
+def completion_rate_expression(total, completed):
+    """
+    SQL expression for completed / total * 100 rounded to 2 decimals
+    (0 when there are no blocks), matching DailyPlan.calculate_completion_rate
+    """
+    # Divide as floats first: SQLite keeps integer division on NUMERIC casts
+    ratio = Cast(completed, models.FloatField()) * Value(100.0) / total
+    rate = Round(Cast(ratio, models.DecimalField(max_digits=12, decimal_places=4)), 2)
+    return Case(
+        When(GreaterThan(total, 0), then=rate),
+        default=Value(Decimal('0.00')),
+        output_field=models.DecimalField(max_digits=5, decimal_places=2),
+    )
+
+
+# TimeBlock columns rendered into the calendar feed
+CALENDAR_FEED_FIELDS = frozenset({
+    'daily_plan', 'daily_plan_id', 'start_minute', 'end_minute', 'title', 'description', 'category',
+})
+
+
+def calendar_feed_version_key(user_id):
+    """Cache key of the version a user's cached ICS feed must match (see feed.py)"""
+    return f'calendar_feed_version:{user_id}'
+
+
+def invalidate_calendar_feed(*user_ids):
+    """
+    Give users' calendar feeds a new version once the current transaction commits
+    A random version (not a counter) never matches a feed built earlier,
+    even if the key was evicted in between.
+    """
+    keys = [calendar_feed_version_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.set_many({key: uuid.uuid4().hex for key in keys}, None))
+
+
+class DailyPlanQuerySet(models.QuerySet):
+    """QuerySet helpers for DailyPlan"""
+
+    def freshness(self):
+        """
+        Cheap rows for HTTP validators: one aggregate, no plan/block payload
+        Each row has pk, updated_at, total_blocks and blocks_updated_at
+        (latest block change, None without blocks).
+        """
+        return self.order_by().values('pk', 'updated_at', 'total_blocks').annotate(
+            blocks_updated_at=Max('time_blocks__updated_at'),
+        )
+
+    def reconcile_block_counters(self):
+        """
+        Recount total/completed blocks for plans whose counters drifted
+        Runs as a single set-based UPDATE.
+
+        Returns:
+            int: number of plans fixed
+        """
+        blocks = TimeBlock.objects.filter(daily_plan=OuterRef('pk')).order_by().values('daily_plan')
+        actual_total = Coalesce(
+            Subquery(blocks.annotate(c=Count('pk')).values('c')), 0
+        )
+        actual_completed = Coalesce(
+            Subquery(blocks.filter(is_completed=True).annotate(c=Count('pk')).values('c')), 0
+        )
+
+        drifted = self.alias(
+            actual_total=actual_total,
+            actual_completed=actual_completed,
+        ).filter(
+            ~Q(total_blocks=F('actual_total')) | ~Q(completed_blocks=F('actual_completed'))
+        )
+        return self.filter(pk__in=drifted.values('pk')).update(
+            total_blocks=actual_total,
+            completed_blocks=actual_completed,
+            completion_rate=completion_rate_expression(actual_total, actual_completed),
+            updated_at=timezone.now(),
+        )
+
+
 class DailyPlan(models.Model):
     """
     Daily plan with priorities and brain dump
@@ -37,6 +127,17 @@ class DailyPlan(models.Model):
 
     # Brain dump
     brain_dump = models.TextField(null=True, blank=True, verbose_name='Brain Dump')
+    brain_dump_version = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Brain Dump Version',
+        help_text='Bumped on every brain dump change (delta autosave base version)'
+    )
+    brain_dump_flush_by = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Brain Dump Flush Deadline',
+        help_text='Coalesced autosave edits may be pending until then (flush_brain_dumps writes them)'
+    )
 
     # Completion rate (0-100%)
     completion_rate = models.DecimalField(
@@ -47,10 +148,16 @@ class DailyPlan(models.Model):
         verbose_name='Completion Rate (%)'
     )
 
+    # Denormalized block counters (maintained by TimeBlock writes)
+    total_blocks = models.PositiveIntegerField(default=0, verbose_name='Total Blocks')
+    completed_blocks = models.PositiveIntegerField(default=0, verbose_name='Completed Blocks')
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created At')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Updated At')
 
+    objects = DailyPlanQuerySet.as_manager()
+
     class Meta:
         db_table = 'daily_plans'
         verbose_name = 'Daily Plan'
@@ -58,6 +165,11 @@ class DailyPlan(models.Model):
         indexes = [
             models.Index(fields=['user', 'date'], name='idx_daily_plan_user_date'),
             models.Index(fields=['date'], name='idx_daily_plan_date'),
+            models.Index(
+                fields=['brain_dump_flush_by'],
+                name='idx_daily_plan_flush_by',
+                condition=Q(brain_dump_flush_by__isnull=False),
+            ),
         ]
         constraints = [
             models.UniqueConstraint(fields=['user', 'date'], name='unique_user_date')
@@ -67,6 +179,19 @@ class DailyPlan(models.Model):
     def __str__(self):
         return f'{self.user.email} - {self.date}'
 
+    def save(self, *args, **kwargs):
+        """Save; a moved date changes the user's calendar feed"""
+        update_fields = kwargs.get('update_fields')
+        moved = not self._state.adding and (update_fields is None or 'date' in update_fields)
+        super().save(*args, **kwargs)
+        if moved:
+            invalidate_calendar_feed(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        """Delete (blocks cascade) and drop the user's cached calendar feed"""
+        invalidate_calendar_feed(self.user_id)
+        return super().delete(*args, **kwargs)
+
     def get_priorities(self):
         """Return priorities array (max 3 items)"""
         if isinstance(self.priorities, list):
@@ -78,27 +203,150 @@ class DailyPlan(models.Model):
         self.priorities = priorities_list[:3] if priorities_list else []
 
     def calculate_completion_rate(self):
-        """Calculate completion rate based on time blocks"""
-        time_blocks = self.time_blocks.all()
-        if not time_blocks.exists():
+        """Calculate completion rate from the block counters (no queries)"""
+        if not self.total_blocks:
             return 0.00
 
-        total_blocks = time_blocks.count()
-        completed_blocks = time_blocks.filter(is_completed=True).count()
-
-        return round((completed_blocks / total_blocks) * 100, 2)
+        return round((self.completed_blocks / self.total_blocks) * 100, 2)
 
     def update_completion_rate(self):
-        """Update and save completion rate"""
+        """Recount blocks with one aggregate query and save counters and completion rate"""
+        counts = self.time_blocks.aggregate(
+            total=Count('pk'),
+            completed=Count('pk', filter=Q(is_completed=True)),
+        )
+        self.total_blocks = counts['total']
+        self.completed_blocks = counts['completed']
         self.completion_rate = self.calculate_completion_rate()
-        self.save(update_fields=['completion_rate', 'updated_at'])
+        self.save(update_fields=['total_blocks', 'completed_blocks', 'completion_rate', 'updated_at'])
+
+    @classmethod
+    def apply_block_delta(cls, plan_id, total=0, completed=0):
+        """
+        Shift the block counters of a plan and refresh its completion rate
+        in a single UPDATE using F() expressions (safe under concurrency).
+        Call inside the transaction that creates/deletes/completes the block.
+        """
+        if not total and not completed:
+            return
+        new_total = F('total_blocks') + total
+        new_completed = F('completed_blocks') + completed
+        cls.objects.filter(pk=plan_id).update(
+            total_blocks=new_total,
+            completed_blocks=new_completed,
+            completion_rate=completion_rate_expression(new_total, new_completed),
+            updated_at=timezone.now(),
+        )
+
+    def replace_time_blocks(self, blocks):
+        """
+        Replace the whole time-block grid of this plan
+
+        Deletes the hourly-slot blocks that are not in the grid, upserts every
+        given slot with one INSERT ... ON CONFLICT on (daily_plan, period, hour)
+        and recalculates the completion rate once. Minute-range blocks (no
+        hourly slot, e.g. ICS imports) are not part of the grid and are kept.
+
+        Args:
+            blocks (list): validated dicts with period, hour and planning fields
+
+        Raises:
+            slots.TimeBlockOverlap: a given slot overlaps a kept minute-range block
+        """
+        grid = [TimeBlock(daily_plan=self, **block) for block in blocks]
+
+        with transaction.atomic():
+            previous = {
+                (period, hour): category
+                for period, hour, category in self.time_blocks.values_list('period', 'hour', 'category')
+            }
+            new_categories = Counter(
+                block.category for block in grid
+                if block.category and previous.get((block.period, block.hour)) != block.category
+            )
+            UserCategory.objects.record(self.user_id, new_categories)
+
+            kept_ranges = slots.IntervalSet(
+                (start, end, None) for start, end in
+                self.time_blocks.filter(period__isnull=True).values_list('start_minute', 'end_minute')
+            )
+            for block in grid:
+                block.sync_slot()
+                if kept_ranges.overlapping(block.start_minute, block.end_minute) is not None:
+                    raise slots.TimeBlockOverlap()
+
+            # Delete first: the upsert must not collide with a slot that is about to go
+            keep = models.Q(pk__in=[])
+            for block in blocks:
+                keep |= models.Q(period=block['period'], hour=block['hour'])
+            self.time_blocks.filter(period__isnull=False).exclude(keep).delete()
+
+            if grid:
+                TimeBlock.objects.bulk_create(
+                    grid,
+                    update_conflicts=True,
+                    unique_fields=['daily_plan', 'period', 'hour'],
+                    update_fields=['title', 'description', 'category', 'planned_duration', 'updated_at'],
+                )
+
+            self.update_completion_rate()
+            invalidate_calendar_feed(self.user_id)
+
+
+class TimeBlockQuerySet(models.QuerySet):
+    """QuerySet helpers for TimeBlock"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create that fills the minute range / hourly slot like save() does"""
+        objs = list(objs)
+        for obj in objs:
+            obj.sync_slot()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def mark_completed(self):
+        """
+        Mark every block in the queryset completed with one UPDATE
+
+        The matched rows are locked first, so blocks completed concurrently
+        are counted once. Each affected plan's counters and completion rate
+        are then shifted once (one UPDATE per distinct delta, usually one).
+
+        Returns:
+            tuple: (number of newly completed blocks, set of matched plan ids)
+        """
+        with transaction.atomic():
+            rows = list(
+                self.order_by().select_for_update(of=('self',)).values_list('pk', 'daily_plan_id', 'is_completed')
+            )
+            pending = [pk for pk, _, is_completed in rows if not is_completed]
+            if pending:
+                TimeBlock.objects.filter(pk__in=pending).update(
+                    is_completed=True,
+                    updated_at=timezone.now(),
+                )
+
+            deltas = Counter(plan_id for _, plan_id, is_completed in rows if not is_completed)
+            plans_by_delta = {}
+            for plan_id, delta in deltas.items():
+                plans_by_delta.setdefault(delta, []).append(plan_id)
+            for delta, plan_ids in plans_by_delta.items():
+                new_completed = F('completed_blocks') + delta
+                DailyPlan.objects.filter(pk__in=plan_ids).update(
+                    completed_blocks=new_completed,
+                    completion_rate=completion_rate_expression(F('total_blocks'), new_completed),
+                    updated_at=timezone.now(),
+                )
+
+        return len(pending), {plan_id for _, plan_id, _ in rows}
 
 
 class TimeBlock(models.Model):
     """
     Individual time block within a daily plan
-    Represents hourly blocks (4AM-12PM, 1PM-12AM)
+    Covers [start_minute, end_minute) of the plan's day; whole-hour blocks
+    also carry the hourly slot (4AM-12PM, 1PM-12AM) as period + hour
     UNIQUE constraint: daily_plan + period + hour
+    Blocks of a plan never overlap (enforced by the database, see slots.py)
     """
 
     class Period(models.TextChoices):
@@ -113,13 +361,27 @@ class TimeBlock(models.Model):
         verbose_name='Daily Plan'
     )
 
-    # Time period (AM: 4-12, PM: 1-12)
-    period = models.CharField(max_length=2, choices=Period.choices, verbose_name='Period (AM/PM)')
+    # Time period (AM: 4-12, PM: 1-12); NULL for blocks that are not one whole-hour slot
+    period = models.CharField(
+        max_length=2, choices=Period.choices, null=True, blank=True, verbose_name='Period (AM/PM)'
+    )
     hour = models.IntegerField(
+        null=True,
+        blank=True,
         validators=[MinValueValidator(1), MaxValueValidator(12)],
         verbose_name='Hour (1-12)'
     )
 
+    # Minute range [start, end) after midnight of the plan's date
+    start_minute = models.PositiveSmallIntegerField(
+        validators=[MaxValueValidator(slots.DAY_END_MINUTE - 1)],
+        verbose_name='Start (minutes after midnight)'
+    )
+    end_minute = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(slots.DAY_END_MINUTE)],
+        verbose_name='End (minutes after midnight)'
+    )
+
     # Block details
     title = models.CharField(max_length=200, null=True, blank=True, verbose_name='Block Title')
     description = models.TextField(null=True, blank=True, verbose_name='Description')
@@ -140,29 +402,123 @@ class TimeBlock(models.Model):
     # Completion status
     is_completed = models.BooleanField(default=False, verbose_name='Completed')
 
+    # Source event of an ICS import (UID, plus the occurrence for recurring events)
+    ics_uid = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        help_text='Re-importing an event with the same UID updates this block (see ics.py)',
+        verbose_name='ICS Event UID'
+    )
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created At')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Updated At')
 
+    objects = TimeBlockQuerySet.as_manager()
+
     class Meta:
         db_table = 'time_blocks'
         verbose_name = 'Time Block'
         verbose_name_plural = 'Time Blocks'
         indexes = [
-            models.Index(fields=['daily_plan', 'period', 'hour'], name='idx_timeblock_plan_time'),
+            models.Index(fields=['daily_plan', 'start_minute'], name='idx_timeblock_plan_time'),
             models.Index(fields=['category'], name='idx_timeblock_category'),
             models.Index(fields=['is_completed'], name='idx_timeblock_completed'),
+            models.Index(
+                fields=['ics_uid'], condition=Q(ics_uid__isnull=False), name='idx_timeblock_ics_uid'
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
                 fields=['daily_plan', 'period', 'hour'],
                 name='unique_timeblock_period_hour'
-            )
+            ),
+            models.CheckConstraint(
+                check=Q(start_minute__lt=F('end_minute'), end_minute__lte=slots.DAY_END_MINUTE),
+                name='timeblock_minute_range'
+            ),
         ]
-        ordering = ['period', 'hour']
+        ordering = ['start_minute']
 
     def __str__(self):
-        return f'{self.daily_plan.date} {self.period.upper()} {self.hour}:00 - {self.title or "Untitled"}'
+        start = f'{self.start_minute // 60:02d}:{self.start_minute % 60:02d}'
+        end = f'{self.end_minute // 60:02d}:{self.end_minute % 60:02d}'
+        return f'{self.daily_plan.date} {start}-{end} - {self.title or "Untitled"}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded completion state to compute counter deltas on save"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_completed = instance.__dict__.get('is_completed')
+        instance._loaded_category = instance.__dict__.get('category')
+        return instance
+
+    def sync_slot(self):
+        """
+        Keep the two time representations consistent
+        The minute range wins when set; otherwise it is taken from period/hour.
+        """
+        if self.start_minute is None and self.period and self.hour is not None:
+            self.start_minute, self.end_minute = slots.slot_range(self.period, self.hour)
+        if self.start_minute is not None and self.end_minute is not None:
+            self.period, self.hour = slots.range_slot(self.start_minute, self.end_minute)
+
+    def save(self, *args, **kwargs):
+        """Save and keep the parent plan's block counters and the category dictionary in sync"""
+        adding = self._state.adding
+        self.sync_slot()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'start_minute', 'end_minute'} & set(update_fields):
+            # The hourly slot follows the minute range
+            update_fields = kwargs['update_fields'] = set(update_fields) | {'period', 'hour'}
+        category_changed = self.category and (
+            adding
+            or (update_fields is None or 'category' in update_fields)
+            and self.category != getattr(self, '_loaded_category', None)
+        )
+        feed_changed = update_fields is None or bool(CALENDAR_FEED_FIELDS & set(update_fields))
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            if adding:
+                DailyPlan.apply_block_delta(
+                    self.daily_plan_id, total=1, completed=int(self.is_completed)
+                )
+            elif update_fields is None or 'is_completed' in update_fields:
+                previous = getattr(self, '_loaded_is_completed', None)
+                if previous is not None and previous != self.is_completed:
+                    DailyPlan.apply_block_delta(
+                        self.daily_plan_id, completed=1 if self.is_completed else -1
+                    )
+
+            if category_changed or feed_changed:
+                owner_id = self._owner_id()
+            if category_changed:
+                UserCategory.objects.record(owner_id, {self.category: 1})
+            if feed_changed:
+                invalidate_calendar_feed(owner_id)
+
+        self._loaded_is_completed = self.is_completed
+        self._loaded_category = self.category
+
+    def _owner_id(self):
+        """User id of the parent plan, without a query when the plan is cached"""
+        plan = self._state.fields_cache.get('daily_plan')
+        if plan is not None:
+            return plan.user_id
+        return DailyPlan.objects.filter(pk=self.daily_plan_id).values_list('user_id', flat=True).first()
+
+    def delete(self, *args, **kwargs):
+        """Delete and decrement the parent plan's block counters"""
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            DailyPlan.apply_block_delta(
+                self.daily_plan_id, total=-1, completed=-int(self.is_completed)
+            )
+            invalidate_calendar_feed(self._owner_id())
+        return result
 
     @property
     def execution_rate(self):
@@ -173,13 +529,261 @@ class TimeBlock(models.Model):
 
     def mark_completed(self):
         """Mark block as completed"""
-        self.is_completed = True
-        self.save(update_fields=['is_completed', 'updated_at'])
+        with transaction.atomic():
+            # Conditional UPDATE so concurrent calls count the block only once
+            changed = TimeBlock.objects.filter(pk=self.pk, is_completed=False).update(
+                is_completed=True,
+                updated_at=timezone.now(),
+            )
+            if changed:
+                # Update parent daily plan's counters and completion rate
+                DailyPlan.apply_block_delta(self.daily_plan_id, completed=1)
 
-        # Update parent daily plan's completion rate
-        self.daily_plan.update_completion_rate()
+        self.is_completed = True
+        self._loaded_is_completed = True
 
     def add_actual_time(self, minutes):
         """Add minutes to actual_duration"""
         self.actual_duration += minutes
         self.save(update_fields=['actual_duration', 'updated_at'])
+
+
+class PlanTemplate(models.Model):
+    """
+    Saved daily plan layout repeated on selected weekdays
+    Materialized into DailyPlan/TimeBlock rows ahead of time
+    weekdays: array of ints, 0=Monday ... 6=Sunday
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='plan_templates',
+        verbose_name='User'
+    )
+    name = models.CharField(max_length=100, verbose_name='Template Name')
+
+    # Copied into every materialized plan
+    priorities = models.JSONField(default=list, blank=True, verbose_name='Priorities')
+    brain_dump = models.TextField(null=True, blank=True, verbose_name='Brain Dump')
+
+    # Recurrence rule
+    weekdays = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Weekdays',
+        help_text='Days of week to repeat on (0=Monday ... 6=Sunday)'
+    )
+    start_date = models.DateField(null=True, blank=True, verbose_name='Repeat From')
+    end_date = models.DateField(null=True, blank=True, verbose_name='Repeat Until')
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created At')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Updated At')
+
+    class Meta:
+        db_table = 'plan_templates'
+        verbose_name = 'Plan Template'
+        verbose_name_plural = 'Plan Templates'
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='idx_plan_template_user'),
+        ]
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.user.email} - {self.name}'
+
+    def matching_dates(self, start_date, end_date):
+        """Dates between start_date and end_date (inclusive) allowed by the rule"""
+        if self.start_date and self.start_date > start_date:
+            start_date = self.start_date
+        if self.end_date and self.end_date < end_date:
+            end_date = self.end_date
+
+        weekdays = set(self.weekdays or range(7))
+        dates = []
+        day = start_date
+        while day <= end_date:
+            if day.weekday() in weekdays:
+                dates.append(day)
+            day += timedelta(days=1)
+        return dates
+
+    def materialize(self, start_date, end_date):
+        """
+        Create plans and blocks for every matching date without a plan yet
+
+        Existing plans are never touched. Plans are inserted with one
+        bulk_create that ignores (user, date) conflicts, so a concurrent
+        request creating the same day is skipped instead of failing.
+
+        Returns:
+            tuple: (created dates, skipped dates)
+        """
+        dates = self.matching_dates(start_date, end_date)
+        if not dates:
+            return [], []
+
+        existing = set(
+            DailyPlan.objects.filter(user_id=self.user_id, date__in=dates).values_list('date', flat=True)
+        )
+        blocks = list(self.blocks.all())
+
+        plans = [
+            DailyPlan(
+                user_id=self.user_id,
+                date=day,
+                priorities=list(self.priorities or []),
+                brain_dump=self.brain_dump,
+                total_blocks=len(blocks),
+            )
+            for day in dates
+            if day not in existing
+        ]
+
+        with transaction.atomic():
+            DailyPlan.objects.bulk_create(plans, batch_size=500, ignore_conflicts=True)
+
+            # Primary keys are generated client-side; rows lost to a conflict are absent
+            inserted = dict(
+                DailyPlan.objects.filter(pk__in=[plan.pk for plan in plans]).values_list('pk', 'date')
+            )
+
+            TimeBlock.objects.bulk_create(
+                [
+                    TimeBlock(
+                        daily_plan_id=plan_id,
+                        period=block.period,
+                        hour=block.hour,
+                        title=block.title,
+                        description=block.description,
+                        category=block.category,
+                        planned_duration=block.planned_duration,
+                    )
+                    for plan_id in inserted
+                    for block in blocks
+                ],
+                batch_size=1000,
+            )
+
+            UserCategory.objects.record(
+                self.user_id,
+                {name: count * len(inserted) for name, count in Counter(b.category for b in blocks).items()},
+            )
+            if inserted and blocks:
+                invalidate_calendar_feed(self.user_id)
+
+        created = sorted(inserted.values())
+        skipped = sorted(set(dates) - set(created))
+        return created, skipped
+
+
+class PlanTemplateBlock(models.Model):
+    """Time block slot of a PlanTemplate (same slot rules as TimeBlock)"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    template = models.ForeignKey(
+        PlanTemplate,
+        on_delete=models.CASCADE,
+        related_name='blocks',
+        verbose_name='Template'
+    )
+
+    period = models.CharField(max_length=2, choices=TimeBlock.Period.choices, verbose_name='Period (AM/PM)')
+    hour = models.IntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(12)],
+        verbose_name='Hour (1-12)'
+    )
+
+    title = models.CharField(max_length=200, null=True, blank=True, verbose_name='Block Title')
+    description = models.TextField(null=True, blank=True, verbose_name='Description')
+    category = models.CharField(max_length=50, null=True, blank=True, verbose_name='Category')
+    planned_duration = models.IntegerField(
+        default=60,
+        validators=[MinValueValidator(1)],
+        verbose_name='Planned Duration (minutes)'
+    )
+
+    class Meta:
+        db_table = 'plan_template_blocks'
+        verbose_name = 'Plan Template Block'
+        verbose_name_plural = 'Plan Template Blocks'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['template', 'period', 'hour'],
+                name='unique_template_block_period_hour'
+            )
+        ]
+        ordering = ['period', 'hour']
+
+    def __str__(self):
+        return f'{self.template.name} {self.period.upper()} {self.hour}:00 - {self.title or "Untitled"}'
+
+
+class UserCategoryQuerySet(models.QuerySet):
+    """QuerySet helpers for the per-user category dictionary"""
+
+    def record(self, user_id, counts, used_at=None):
+        """
+        Add usages to a user's categories, creating missing ones
+
+        Args:
+            user_id: owner of the categories
+            counts (dict): category name -> number of new usages
+        """
+        counts = {name: count for name, count in counts.items() if name and count > 0}
+        if not counts:
+            return
+        used_at = used_at or timezone.now()
+
+        self.bulk_create(
+            [UserCategory(user_id=user_id, name=name, usage_count=0, last_used_at=used_at) for name in counts],
+            ignore_conflicts=True,
+        )
+
+        # One UPDATE per distinct increment (usually just 1)
+        by_count = {}
+        for name, count in counts.items():
+            by_count.setdefault(count, []).append(name)
+        for count, names in by_count.items():
+            self.filter(user_id=user_id, name__in=names).update(
+                usage_count=F('usage_count') + count,
+                last_used_at=used_at,
+            )
+
+
+class UserCategory(models.Model):
+    """
+    Per-user dictionary of time block categories
+    usage_count counts every time a block was given the category,
+    maintained incrementally by TimeBlock writes
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='categories',
+        verbose_name='User'
+    )
+    name = models.CharField(max_length=50, verbose_name='Category')
+    usage_count = models.PositiveIntegerField(default=0, verbose_name='Usage Count')
+    last_used_at = models.DateTimeField(default=timezone.now, verbose_name='Last Used At')
+
+    objects = UserCategoryQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'user_categories'
+        verbose_name = 'User Category'
+        verbose_name_plural = 'User Categories'
+        indexes = [
+            models.Index(fields=['user', '-usage_count', '-last_used_at'], name='idx_user_category_rank'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='unique_user_category')
+        ]
+        ordering = ['-usage_count', '-last_used_at']
+
+    def __str__(self):
+        return f'{self.user.email} - {self.name} ({self.usage_count})'
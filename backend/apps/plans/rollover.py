@@ -0,0 +1,163 @@
+"""
+Nightly rollover of unfinished time blocks (User.auto_rollover)
+
+After a user's local midnight, the blocks of the previous day that were not
+completed are copied into the same slots of the new day. Meant to run
+hourly (cron), so every timezone is picked up shortly after its midnight:
+
+    python manage.py rollover_unfinished_blocks
+
+Users are processed per timezone in chunks of settings.PLAN_ROLLOVER_CHUNK_SIZE,
+one transaction per chunk, with set-based queries only:
+
+    1. SELECT the chunk's unfinished blocks of yesterday
+    2. INSERT the missing plans of today (ON CONFLICT DO NOTHING)
+    3. SELECT today's plan ids and the minute ranges already planned
+    4. INSERT the blocks that overlap nothing (what the user planned is kept)
+       and count the ones that were inserted
+    5. UPDATE the plans' block counters
+    6. UPDATE users.last_rollover_on (a rerun the same day skips them)
+"""
+
+import logging
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DailyPlan, TimeBlock, invalidate_calendar_feed
+from .slots import IntervalSet
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# Copied from the unfinished block; actual time and completion start over
+COPIED_FIELDS = (
+    'period', 'hour', 'start_minute', 'end_minute', 'title', 'description', 'category', 'planned_duration',
+)
+
+
+def local_today(tz_name, now=None):
+    """Current date in the given IANA timezone, or None if it is unknown"""
+    try:
+        tz = ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+    return (now or timezone.now()).astimezone(tz).date()
+
+
+def due_users(tz_name, today):
+    """Opted-in users of a timezone not rolled over into today yet"""
+    return User.objects.filter(
+        auto_rollover=True,
+        is_active=True,
+        timezone=tz_name,
+    ).filter(
+        Q(last_rollover_on__isnull=True) | Q(last_rollover_on__lt=today)
+    )
+
+
+def rollover_chunk(user_ids, today):
+    """
+    Roll yesterday's unfinished blocks of user_ids into today
+
+    Returns:
+        tuple: (plans created, blocks created)
+    """
+    yesterday = today - timedelta(days=1)
+
+    with transaction.atomic():
+        rows = list(
+            TimeBlock.objects.filter(
+                daily_plan__user_id__in=user_ids,
+                daily_plan__date=yesterday,
+                is_completed=False,
+            ).order_by().values('daily_plan__user_id', *COPIED_FIELDS)
+        )
+
+        plans_created = blocks_created = 0
+        if rows:
+            owners = {row['daily_plan__user_id'] for row in rows}
+            existing = set(
+                DailyPlan.objects.filter(user_id__in=owners, date=today).values_list('user_id', flat=True)
+            )
+            new_plans = [DailyPlan(user_id=user_id, date=today) for user_id in owners - existing]
+            DailyPlan.objects.bulk_create(new_plans, ignore_conflicts=True)
+            plan_ids = dict(
+                DailyPlan.objects.filter(user_id__in=owners, date=today).values_list('user_id', 'pk')
+            )
+            # A plan created concurrently keeps its own id; only ours count
+            plans_created = len({plan.pk for plan in new_plans} & set(plan_ids.values()))
+            occupied = {plan_id: IntervalSet() for plan_id in plan_ids.values()}
+            if existing:
+                planned = TimeBlock.objects.filter(
+                    daily_plan__user_id__in=existing, daily_plan__date=today
+                ).values_list('daily_plan_id', 'start_minute', 'end_minute')
+                for plan_id, start, end in planned:
+                    occupied[plan_id].add(start, end)
+
+            blocks = []
+            for row in rows:
+                plan_id = plan_ids[row['daily_plan__user_id']]
+                if occupied[plan_id].overlapping(row['start_minute'], row['end_minute']) is None:
+                    occupied[plan_id].add(row['start_minute'], row['end_minute'])
+                    blocks.append(TimeBlock(
+                        daily_plan_id=plan_id,
+                        **{field: row[field] for field in COPIED_FIELDS},
+                    ))
+            # ignore_conflicts only covers blocks added concurrently (those are not counted)
+            TimeBlock.objects.bulk_create(blocks, ignore_conflicts=True)
+            if blocks:
+                blocks_created = TimeBlock.objects.filter(pk__in=[block.pk for block in blocks]).count()
+
+            # bulk_create skips TimeBlock.save(); recount the touched plans at once
+            DailyPlan.objects.filter(pk__in=plan_ids.values()).reconcile_block_counters()
+            invalidate_calendar_feed(*owners)
+
+        User.objects.filter(pk__in=user_ids).update(last_rollover_on=today)
+
+    return plans_created, blocks_created
+
+
+def rollover_unfinished_blocks(now=None, chunk_size=None):
+    """
+    Roll over every opted-in user whose local day has started since their last run
+
+    Returns:
+        dict: {'users': n, 'plans': n, 'blocks': n} created
+    """
+    chunk_size = chunk_size or settings.PLAN_ROLLOVER_CHUNK_SIZE
+    now = now or timezone.now()
+    totals = {'users': 0, 'plans': 0, 'blocks': 0}
+
+    timezones = (
+        User.objects.filter(auto_rollover=True, is_active=True)
+        .order_by().values_list('timezone', flat=True).distinct()
+    )
+    for tz_name in list(timezones):
+        today = local_today(tz_name, now)
+        if today is None:
+            logger.warning('Skipping rollover for unknown timezone %r', tz_name)
+            continue
+
+        users = due_users(tz_name, today).order_by('pk').values_list('pk', flat=True)
+        last_pk = None
+        while True:
+            # Keyset pagination: processed users drop out of due_users() anyway,
+            # but the pk cursor keeps each chunk query on the primary key index
+            page = users if last_pk is None else users.filter(pk__gt=last_pk)
+            user_ids = list(page[:chunk_size])
+            if not user_ids:
+                break
+            plans, blocks = rollover_chunk(user_ids, today)
+            totals['users'] += len(user_ids)
+            totals['plans'] += plans
+            totals['blocks'] += blocks
+            last_pk = user_ids[-1]
+
+    return totals
@@ -0,0 +1,334 @@
+"""
+Full-text search over daily plans (brain dump, block titles and descriptions)
+
+PostgreSQL: daily_plans.search_vector (tsvector, GIN indexed) is kept in
+sync by triggers on daily_plans and time_blocks, so every write path
+(save, bulk_create, queryset.update) is covered. Block titles are weighted
+A, the brain dump B and block descriptions C. The 'simple' configuration
+is used because plans are mostly Korean, which has no built-in stemmer.
+
+SQLite (USE_SQLITE, local development): an FTS5 table daily_plans_fts is
+maintained by equivalent triggers and ranked with bm25().
+
+The search column, tables and triggers are not part of the Django model
+state; install() creates them and is safe to run again. SQLite cannot
+rebuild daily_plans or time_blocks while these triggers reference them, so
+migrations that alter those tables on SQLite must uninstall() first and
+install() + rebuild() afterwards (see 0008_timeblock_minute_range).
+Changing a trigger here needs a migration that re-installs the search
+objects (see 0011_plan_search_block_moves).
+"""
+
+import re
+import uuid
+
+from django.db import connection as default_connection
+
+from .models import DailyPlan
+
+MAX_TERMS = 10
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# PostgreSQL
+
+PG_INSTALL = (
+    'ALTER TABLE daily_plans ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    """
+    CREATE OR REPLACE FUNCTION daily_plan_search_document(p_plan_id uuid, p_brain_dump text)
+    RETURNS tsvector LANGUAGE sql STABLE AS $$
+        SELECT setweight(to_tsvector('simple', coalesce(string_agg(tb.title, ' '), '')), 'A')
+            || setweight(to_tsvector('simple', coalesce(p_brain_dump, '')), 'B')
+            || setweight(to_tsvector('simple', coalesce(string_agg(tb.description, ' '), '')), 'C')
+        FROM time_blocks tb
+        WHERE tb.daily_plan_id = p_plan_id
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION daily_plans_search_update() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.search_vector := daily_plan_search_document(NEW.id, NEW.brain_dump);
+        RETURN NEW;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION time_blocks_search_refresh() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE daily_plans dp
+        SET search_vector = daily_plan_search_document(dp.id, dp.brain_dump)
+        WHERE dp.id IN (SELECT DISTINCT daily_plan_id FROM changed_blocks);
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION time_blocks_search_row_refresh() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE daily_plans dp
+        SET search_vector = daily_plan_search_document(dp.id, dp.brain_dump)
+        WHERE dp.id IN (OLD.daily_plan_id, NEW.daily_plan_id);
+        RETURN NULL;
+    END
+    $$
+    """,
+    'DROP TRIGGER IF EXISTS daily_plans_search_update ON daily_plans',
+    """
+    CREATE TRIGGER daily_plans_search_update
+    BEFORE INSERT OR UPDATE OF brain_dump ON daily_plans
+    FOR EACH ROW EXECUTE FUNCTION daily_plans_search_update()
+    """,
+    # Statement-level with transition tables: one refresh per plan for bulk inserts/deletes
+    'DROP TRIGGER IF EXISTS time_blocks_search_insert ON time_blocks',
+    """
+    CREATE TRIGGER time_blocks_search_insert
+    AFTER INSERT ON time_blocks REFERENCING NEW TABLE AS changed_blocks
+    FOR EACH STATEMENT EXECUTE FUNCTION time_blocks_search_refresh()
+    """,
+    'DROP TRIGGER IF EXISTS time_blocks_search_delete ON time_blocks',
+    """
+    CREATE TRIGGER time_blocks_search_delete
+    AFTER DELETE ON time_blocks REFERENCING OLD TABLE AS changed_blocks
+    FOR EACH STATEMENT EXECUTE FUNCTION time_blocks_search_refresh()
+    """,
+    'DROP TRIGGER IF EXISTS time_blocks_search_update ON time_blocks',
+    """
+    CREATE TRIGGER time_blocks_search_update
+    AFTER UPDATE OF title, description, daily_plan_id ON time_blocks
+    FOR EACH ROW
+    WHEN (
+        OLD.title IS DISTINCT FROM NEW.title
+        OR OLD.description IS DISTINCT FROM NEW.description
+        OR OLD.daily_plan_id IS DISTINCT FROM NEW.daily_plan_id
+    )
+    EXECUTE FUNCTION time_blocks_search_row_refresh()
+    """,
+    'CREATE INDEX IF NOT EXISTS idx_daily_plan_search ON daily_plans USING gin (search_vector)',
+)
+
+PG_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS time_blocks_search_update ON time_blocks',
+    'DROP TRIGGER IF EXISTS time_blocks_search_delete ON time_blocks',
+    'DROP TRIGGER IF EXISTS time_blocks_search_insert ON time_blocks',
+    'DROP TRIGGER IF EXISTS daily_plans_search_update ON daily_plans',
+    'DROP FUNCTION IF EXISTS time_blocks_search_row_refresh()',
+    'DROP FUNCTION IF EXISTS time_blocks_search_refresh()',
+    'DROP FUNCTION IF EXISTS daily_plans_search_update()',
+    'DROP FUNCTION IF EXISTS daily_plan_search_document(uuid, text)',
+    'DROP INDEX IF EXISTS idx_daily_plan_search',
+    'ALTER TABLE daily_plans DROP COLUMN IF EXISTS search_vector',
+)
+
+PG_REBUILD = 'UPDATE daily_plans SET search_vector = daily_plan_search_document(id, brain_dump)'
+
+# SQLite
+
+SQLITE_REFRESH = """
+    DELETE FROM daily_plans_fts WHERE plan_id = {plan};
+    INSERT INTO daily_plans_fts (plan_id, titles, brain_dump, descriptions)
+    SELECT dp.id,
+           (SELECT group_concat(tb.title, ' ') FROM time_blocks tb WHERE tb.daily_plan_id = dp.id),
+           dp.brain_dump,
+           (SELECT group_concat(tb.description, ' ') FROM time_blocks tb WHERE tb.daily_plan_id = dp.id)
+    FROM daily_plans dp WHERE dp.id = {plan};
+"""
+
+SQLITE_INSTALL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS daily_plans_fts USING fts5(
+        plan_id UNINDEXED, titles, brain_dump, descriptions,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS daily_plans_search_insert AFTER INSERT ON daily_plans BEGIN
+    """ + SQLITE_REFRESH.format(plan='NEW.id') + ' END',
+    """
+    CREATE TRIGGER IF NOT EXISTS daily_plans_search_update AFTER UPDATE OF brain_dump ON daily_plans BEGIN
+    """ + SQLITE_REFRESH.format(plan='NEW.id') + ' END',
+    """
+    CREATE TRIGGER IF NOT EXISTS daily_plans_search_delete AFTER DELETE ON daily_plans BEGIN
+        DELETE FROM daily_plans_fts WHERE plan_id = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS time_blocks_search_insert AFTER INSERT ON time_blocks BEGIN
+    """ + SQLITE_REFRESH.format(plan='NEW.daily_plan_id') + ' END',
+    """
+    CREATE TRIGGER IF NOT EXISTS time_blocks_search_update
+    AFTER UPDATE OF title, description, daily_plan_id ON time_blocks
+    WHEN OLD.title IS NOT NEW.title OR OLD.description IS NOT NEW.description
+        OR OLD.daily_plan_id IS NOT NEW.daily_plan_id BEGIN
+    """ + SQLITE_REFRESH.format(plan='NEW.daily_plan_id')
+    + SQLITE_REFRESH.format(plan='OLD.daily_plan_id') + ' END',
+    """
+    CREATE TRIGGER IF NOT EXISTS time_blocks_search_delete AFTER DELETE ON time_blocks BEGIN
+    """ + SQLITE_REFRESH.format(plan='OLD.daily_plan_id') + ' END',
+)
+
+SQLITE_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS time_blocks_search_delete',
+    'DROP TRIGGER IF EXISTS time_blocks_search_update',
+    'DROP TRIGGER IF EXISTS time_blocks_search_insert',
+    'DROP TRIGGER IF EXISTS daily_plans_search_delete',
+    'DROP TRIGGER IF EXISTS daily_plans_search_update',
+    'DROP TRIGGER IF EXISTS daily_plans_search_insert',
+    'DROP TABLE IF EXISTS daily_plans_fts',
+)
+
+SQLITE_REBUILD = (
+    'DELETE FROM daily_plans_fts',
+    """
+    INSERT INTO daily_plans_fts (plan_id, titles, brain_dump, descriptions)
+    SELECT dp.id,
+           (SELECT group_concat(tb.title, ' ') FROM time_blocks tb WHERE tb.daily_plan_id = dp.id),
+           dp.brain_dump,
+           (SELECT group_concat(tb.description, ' ') FROM time_blocks tb WHERE tb.daily_plan_id = dp.id)
+    FROM daily_plans dp
+    """,
+)
+
+
+def is_supported(connection=None):
+    """Search needs PostgreSQL or SQLite with FTS5"""
+    connection = connection or default_connection
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def _execute_all(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(connection=None):
+    """Create (or re-create) the search column/table, triggers and index"""
+    connection = connection or default_connection
+    if connection.vendor == 'postgresql':
+        _execute_all(connection, PG_INSTALL)
+    elif connection.vendor == 'sqlite':
+        _execute_all(connection, SQLITE_INSTALL)
+
+
+def uninstall(connection=None):
+    """Drop everything install() created"""
+    connection = connection or default_connection
+    if connection.vendor == 'postgresql':
+        _execute_all(connection, PG_UNINSTALL)
+    elif connection.vendor == 'sqlite':
+        _execute_all(connection, SQLITE_UNINSTALL)
+
+
+def rebuild(connection=None):
+    """Recompute the search document of every plan"""
+    connection = connection or default_connection
+    if connection.vendor == 'postgresql':
+        _execute_all(connection, [PG_REBUILD])
+    elif connection.vendor == 'sqlite':
+        _execute_all(connection, SQLITE_REBUILD)
+
+
+def parse_terms(query):
+    """Split a user query into at most MAX_TERMS word tokens"""
+    return TERM_RE.findall(query or '')[:MAX_TERMS]
+
+
+class PlanSearchResults:
+    """
+    Lazy, sliceable result set for a user's search
+
+    Behaves like a queryset for pagination: count() runs one COUNT query,
+    slicing runs one ranked query for that page (LIMIT/OFFSET) and one
+    query loading the matching plans.
+    """
+
+    def __init__(self, user, terms, connection=None):
+        self.connection = connection or default_connection
+        self.user_id = DailyPlan._meta.get_field('user').get_db_prep_value(user.pk, self.connection)
+        self.terms = terms
+        self._count = None
+
+    # Query builders return (sql, params) without LIMIT/OFFSET
+
+    def _pg_match(self):
+        tsquery = ' & '.join(f'{term}:*' for term in self.terms)
+        return "to_tsquery('simple', %s)", [tsquery]
+
+    def _sqlite_match(self):
+        return ' '.join('"{}"*'.format(term.replace('"', '')) for term in self.terms)
+
+    def _count_sql(self):
+        if self.connection.vendor == 'postgresql':
+            match, params = self._pg_match()
+            return (
+                f'SELECT COUNT(*) FROM daily_plans '
+                f'WHERE user_id = %s AND search_vector @@ {match}',
+                [self.user_id, *params],
+            )
+        return (
+            'SELECT COUNT(*) FROM daily_plans_fts f '
+            'JOIN daily_plans dp ON dp.id = f.plan_id '
+            'WHERE daily_plans_fts MATCH %s AND dp.user_id = %s',
+            [self._sqlite_match(), self.user_id],
+        )
+
+    def _page_sql(self):
+        if self.connection.vendor == 'postgresql':
+            match, params = self._pg_match()
+            return (
+                f'SELECT dp.id, ts_rank_cd(dp.search_vector, q) AS rank, '
+                f"ts_headline('simple', concat_ws(' ', "
+                f"(SELECT string_agg(tb.title, ' ') FROM time_blocks tb WHERE tb.daily_plan_id = dp.id), "
+                f"dp.brain_dump), q, 'StartSel=\"\",StopSel=\"\",MaxWords=20,MinWords=5') AS snippet "
+                f'FROM daily_plans dp, {match} q '
+                f'WHERE dp.user_id = %s AND dp.search_vector @@ q '
+                f'ORDER BY rank DESC, dp.date DESC',
+                [*params, self.user_id],
+            )
+        # bm25() is lower-is-better; weights follow the column order of daily_plans_fts
+        return (
+            'SELECT f.plan_id, -bm25(daily_plans_fts, 0.0, 1.0, 0.4, 0.2) AS rank, '
+            "snippet(daily_plans_fts, -1, '', '', '...', 16) AS snippet "
+            'FROM daily_plans_fts f '
+            'JOIN daily_plans dp ON dp.id = f.plan_id '
+            'WHERE daily_plans_fts MATCH %s AND dp.user_id = %s '
+            'ORDER BY bm25(daily_plans_fts, 0.0, 1.0, 0.4, 0.2), dp.date DESC',
+            [self._sqlite_match(), self.user_id],
+        )
+
+    def count(self):
+        if self._count is None:
+            if not self.terms:
+                self._count = 0
+            else:
+                sql, params = self._count_sql()
+                with self.connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else self.count()
+        if not self.terms or stop <= start:
+            return []
+
+        sql, params = self._page_sql()
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'{sql} LIMIT %s OFFSET %s', [*params, stop - start, start])
+            rows = [(uuid.UUID(str(plan_id)), rank, snippet) for plan_id, rank, snippet in cursor.fetchall()]
+
+        plans = DailyPlan.objects.defer('brain_dump').in_bulk([plan_id for plan_id, _, _ in rows])
+        results = []
+        for plan_id, rank, snippet in rows:
+            plan = plans.get(plan_id)
+            if plan is None:
+                continue
+            plan.search_rank = round(float(rank), 6)
+            plan.search_snippet = snippet
+            results.append(plan)
+        return results
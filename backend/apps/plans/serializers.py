@@ -2,11 +2,17 @@
 Serializers for plans app
 """
 
+from django.db import transaction
 from rest_framework import serializers
-from .models import DailyPlan, TimeBlock
+from apps.common.fields import FieldSelectionMixin
+from . import grid, ics, slots
+from .models import DailyPlan, PlanTemplate, PlanTemplateBlock, TimeBlock, UserCategory
 
+MAX_MATERIALIZE_DAYS = 366
+MAX_BULK_BLOCKS = 100  # blocks per bulk mark-completed request
 
-class TimeBlockSerializer(serializers.ModelSerializer):
+
+class TimeBlockSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     """Serializer for TimeBlock model"""
 
     execution_rate = serializers.ReadOnlyField()
@@ -17,6 +23,8 @@ class TimeBlockSerializer(serializers.ModelSerializer):
             'id',
             'period',
             'hour',
+            'start_minute',
+            'end_minute',
             'title',
             'description',
             'category',
@@ -28,41 +36,115 @@ class TimeBlockSerializer(serializers.ModelSerializer):
             'updated_at',
         ]
         read_only_fields = ['id', 'execution_rate', 'created_at', 'updated_at']
+        extra_kwargs = {
+            'start_minute': {'required': False},
+            'end_minute': {'required': False},
+        }
+        field_dependencies = {'execution_rate': ['planned_duration', 'actual_duration']}
 
     def validate(self, data):
         """Validate time block constraints"""
-        period = data.get('period')
-        hour = data.get('hour')
+        period = data.get('period', getattr(self.instance, 'period', None))
+        hour = data.get('hour', getattr(self.instance, 'hour', None))
 
         # Validate hour range based on period
-        if period == 'am' and hour not in range(4, 13):
+        if period == 'am' and hour not in slots.AM_HOURS:
             raise serializers.ValidationError({
                 'hour': 'For AM period, hour must be between 4 and 12'
             })
-        elif period == 'pm' and hour not in range(1, 13):
+        elif period == 'pm' and hour not in slots.PM_HOURS:
             raise serializers.ValidationError({
                 'hour': 'For PM period, hour must be between 1 and 12'
             })
 
+        if 'start_minute' in self.fields:
+            self.validate_minute_range(data, period, hour)
+        return data
+
+    def validate_minute_range(self, data, period, hour):
+        """
+        Accept either the hourly slot or the minute range and fill in the other
+        (hourly clients keep sending period/hour; minute blocks have no slot)
+        """
+        if 'start_minute' in data or 'end_minute' in data:
+            start = data.get('start_minute', getattr(self.instance, 'start_minute', None))
+            end = data.get('end_minute', getattr(self.instance, 'end_minute', None))
+            if start is None or end is None:
+                raise serializers.ValidationError('start_minute and end_minute must be given together')
+            if start >= end:
+                raise serializers.ValidationError({'end_minute': 'end_minute must be after start_minute'})
+            slot = slots.range_slot(start, end)
+            if ('period' in data or 'hour' in data) and (period, hour) != slot:
+                raise serializers.ValidationError('period/hour do not match start_minute/end_minute')
+            data['period'], data['hour'] = slot
+            if self.instance is None and 'planned_duration' in self.fields:
+                data.setdefault('planned_duration', end - start)
+        elif 'period' in data or 'hour' in data:
+            if not period or hour is None:
+                raise serializers.ValidationError('period and hour must be given together')
+            data['start_minute'], data['end_minute'] = slots.slot_range(period, hour)
+        elif self.instance is None:
+            raise serializers.ValidationError('Either period and hour or start_minute and end_minute are required')
+
+
+class TimeBlockGridSerializer(TimeBlockSerializer):
+    """
+    One slot of a full-day grid (PUT /daily-plans/{id}/blocks/)
+    Only planning fields are writable; progress fields are left to timers
+    """
+
+    class Meta:
+        model = TimeBlock
+        fields = [
+            'period',
+            'hour',
+            'title',
+            'description',
+            'category',
+            'planned_duration',
+        ]
+        extra_kwargs = {
+            'period': {'required': True, 'allow_null': False},
+            'hour': {'required': True, 'allow_null': False},
+        }
+
+
+class TimeBlockGridListSerializer(serializers.ListSerializer):
+    """Validate a whole grid: at most one block per period/hour slot"""
+
+    child = TimeBlockGridSerializer()
+
+    def validate(self, data):
+        seen = set()
+        for block in data:
+            slot = (block['period'], block['hour'])
+            if slot in seen:
+                raise serializers.ValidationError(
+                    f'Duplicate slot: {block["period"].upper()} {block["hour"]}'
+                )
+            seen.add(slot)
         return data
 
 
-class TimeBlockCreateSerializer(serializers.ModelSerializer):
-    """Serializer for creating TimeBlock"""
+class TimeBlockCreateSerializer(TimeBlockSerializer):
+    """Serializer for creating TimeBlock (hourly slot or minute range)"""
 
     class Meta:
         model = TimeBlock
         fields = [
             'period',
             'hour',
+            'start_minute',
+            'end_minute',
             'title',
             'description',
             'category',
             'planned_duration',
         ]
+        extra_kwargs = TimeBlockSerializer.Meta.extra_kwargs
 
 
-class DailyPlanSerializer(serializers.ModelSerializer):
+class DailyPlanSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     """Serializer for DailyPlan model with nested TimeBlocks"""
 
     time_blocks = TimeBlockSerializer(many=True, read_only=True)
@@ -75,12 +157,18 @@ class DailyPlanSerializer(serializers.ModelSerializer):
             'date',
             'priorities',
             'brain_dump',
+            'brain_dump_version',
             'completion_rate',
+            'total_blocks',
+            'completed_blocks',
             'time_blocks',
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['id', 'user', 'completion_rate', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'user', 'brain_dump_version', 'completion_rate', 'total_blocks', 'completed_blocks',
+            'created_at', 'updated_at'
+        ]
 
     def validate_priorities(self, value):
         """Validate priorities array (max 3 items)"""
@@ -99,11 +187,48 @@ class DailyPlanSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class DailyPlanListSerializer(serializers.ModelSerializer):
+class TimeBlockCompactSerializer(TimeBlockSerializer):
+    """TimeBlock without description (compact range view)"""
+
+    class Meta(TimeBlockSerializer.Meta):
+        fields = [field for field in TimeBlockSerializer.Meta.fields if field != 'description']
+
+
+class DailyPlanCompactSerializer(DailyPlanSerializer):
+    """DailyPlan without brain_dump and block descriptions (compact range view)"""
+
+    time_blocks = TimeBlockCompactSerializer(many=True, read_only=True)
+
+    class Meta(DailyPlanSerializer.Meta):
+        fields = [field for field in DailyPlanSerializer.Meta.fields if field != 'brain_dump']
+
+
+class DailyPlanGridSerializer(DailyPlanSerializer):
+    """
+    DailyPlan with blocks in the columnar grid layout (?layout=grid)
+    Context: packed=True packs numeric columns, compact=True drops brain_dump
+    """
+
+    grid = serializers.SerializerMethodField()
+
+    class Meta(DailyPlanSerializer.Meta):
+        fields = [field for field in DailyPlanSerializer.Meta.fields if field != 'time_blocks'] + ['grid']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('compact'):
+            fields.pop('brain_dump', None)
+        return fields
+
+    def get_grid(self, obj):
+        return grid.encode(obj.time_blocks.all(), packed=self.context.get('packed', False))
+
+
+class DailyPlanListSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     """Lightweight serializer for list view"""
 
-    time_blocks_count = serializers.SerializerMethodField()
-    completed_blocks_count = serializers.SerializerMethodField()
+    time_blocks_count = serializers.IntegerField(source='total_blocks', read_only=True)
+    completed_blocks_count = serializers.IntegerField(source='completed_blocks', read_only=True)
 
     class Meta:
         model = DailyPlan
@@ -118,13 +243,15 @@ class DailyPlanListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'completion_rate', 'created_at']
 
-    def get_time_blocks_count(self, obj):
-        """Get total time blocks count"""
-        return obj.time_blocks.count()
 
-    def get_completed_blocks_count(self, obj):
-        """Get completed time blocks count"""
-        return obj.time_blocks.filter(is_completed=True).count()
+class DailyPlanSearchResultSerializer(DailyPlanListSerializer):
+    """Search hit: list fields plus relevance and a matching excerpt"""
+
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+    snippet = serializers.CharField(source='search_snippet', read_only=True)
+
+    class Meta(DailyPlanListSerializer.Meta):
+        fields = DailyPlanListSerializer.Meta.fields + ['rank', 'snippet']
 
 
 class DailyPlanUpdateSerializer(serializers.ModelSerializer):
@@ -132,7 +259,8 @@ class DailyPlanUpdateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = DailyPlan
-        fields = ['priorities', 'brain_dump']
+        fields = ['priorities', 'brain_dump', 'brain_dump_version']
+        read_only_fields = ['brain_dump_version']
 
     def validate_priorities(self, value):
         """Validate priorities array"""
@@ -143,3 +271,147 @@ class DailyPlanUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Maximum 3 priorities allowed')
 
         return value[:3]
+
+
+class BrainDumpPatchSerializer(serializers.Serializer):
+    """Serializer for a brain dump delta (see apps/plans/autosave.py)"""
+
+    version = serializers.IntegerField(min_value=0)
+    ops = serializers.ListField(child=serializers.DictField(), allow_empty=True)
+    flush = serializers.BooleanField(default=False)
+
+
+class TimeBlockBulkCompleteSerializer(serializers.Serializer):
+    """Serializer for bulk mark-completed (list of block ids)"""
+
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=MAX_BULK_BLOCKS,
+    )
+
+
+class ICSImportSerializer(serializers.Serializer):
+    """Serializer for the ICS upload (multipart field "file")"""
+
+    file = serializers.FileField(allow_empty_file=False)
+
+    def validate_file(self, value):
+        if value.size > ics.MAX_ICS_BYTES:
+            raise serializers.ValidationError(
+                f'ICS files are limited to {ics.MAX_ICS_BYTES // (1024 * 1024)} MB'
+            )
+        return value
+
+
+class PlanTemplateBlockSerializer(TimeBlockGridSerializer):
+    """Time block slot of a plan template"""
+
+    class Meta:
+        model = PlanTemplateBlock
+        fields = [
+            'period',
+            'hour',
+            'title',
+            'description',
+            'category',
+            'planned_duration',
+        ]
+        list_serializer_class = TimeBlockGridListSerializer
+
+
+class PlanTemplateSerializer(serializers.ModelSerializer):
+    """Serializer for PlanTemplate with its block slots (replaced as a whole on write)"""
+
+    blocks = PlanTemplateBlockSerializer(many=True, required=False)
+
+    class Meta:
+        model = PlanTemplate
+        fields = [
+            'id',
+            'name',
+            'priorities',
+            'brain_dump',
+            'weekdays',
+            'start_date',
+            'end_date',
+            'blocks',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate_priorities(self, value):
+        """Validate priorities array (max 3 items)"""
+        if not isinstance(value, list):
+            raise serializers.ValidationError('Priorities must be a list')
+        if len(value) > 3:
+            raise serializers.ValidationError('Maximum 3 priorities allowed')
+        return value
+
+    def validate_weekdays(self, value):
+        """Validate weekdays (0=Monday ... 6=Sunday)"""
+        if not isinstance(value, list) or not all(isinstance(day, int) and 0 <= day <= 6 for day in value):
+            raise serializers.ValidationError('Weekdays must be a list of integers between 0 and 6')
+        return sorted(set(value))
+
+    def validate(self, data):
+        """Validate the recurrence date range"""
+        start_date = data.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = data.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError({'end_date': 'end_date must be on or after start_date'})
+        return data
+
+    def _replace_blocks(self, template, blocks):
+        template.blocks.all().delete()
+        PlanTemplateBlock.objects.bulk_create(
+            [PlanTemplateBlock(template=template, **block) for block in blocks]
+        )
+
+    def create(self, validated_data):
+        blocks = validated_data.pop('blocks', [])
+        with transaction.atomic():
+            template = super().create(validated_data)
+            self._replace_blocks(template, blocks)
+        return template
+
+    def update(self, instance, validated_data):
+        blocks = validated_data.pop('blocks', None)
+        with transaction.atomic():
+            template = super().update(instance, validated_data)
+            if blocks is not None:
+                self._replace_blocks(template, blocks)
+        return template
+
+
+class PlanTemplateMaterializeSerializer(serializers.Serializer):
+    """Date range to materialize a template into (defaults to the template's own range)"""
+
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, data):
+        template = self.context['template']
+        start_date = data.get('start_date') or template.start_date
+        end_date = data.get('end_date') or template.end_date
+        if not start_date or not end_date:
+            raise serializers.ValidationError(
+                'start_date and end_date are required when the template has no date range'
+            )
+        if start_date > end_date:
+            raise serializers.ValidationError({'end_date': 'end_date must be on or after start_date'})
+        if (end_date - start_date).days >= MAX_MATERIALIZE_DAYS:
+            raise serializers.ValidationError(
+                f'At most {MAX_MATERIALIZE_DAYS} days can be materialized per request'
+            )
+        return {'start_date': start_date, 'end_date': end_date}
+
+
+class UserCategorySerializer(serializers.ModelSerializer):
+    """Serializer for a user's category dictionary entry"""
+
+    class Meta:
+        model = UserCategory
+        fields = ['id', 'name', 'usage_count', 'last_used_at']
+        read_only_fields = fields
@@ -0,0 +1,206 @@
+"""
+Minute ranges of time blocks and their non-overlap guarantee
+
+A block covers [start_minute, end_minute) minutes after midnight of its
+plan's date. The hourly slots of the original API are a view over that
+range: AM h is [h*60, h*60 + 60) (AM 12 = noon) and PM h is
+[(h + 12)*60, ...) (PM 12 = midnight, so a plan ends at 25:00).
+Blocks that are exactly one whole-hour slot also carry period/hour;
+other blocks (e.g. 09:00-09:25) have period = hour = NULL.
+
+Blocks of one plan never overlap. The database enforces it on every write
+path (save, bulk_create, queryset.update):
+
+    PostgreSQL: EXCLUDE USING gist (plan WITH =, int4range(start, end) WITH &&).
+        The plan id is mapped losslessly onto inet (both are 128 bits),
+        which has a built-in GiST operator class, so btree_gist is not needed.
+    SQLite: BEFORE INSERT/UPDATE triggers. Because a plan's intervals are
+        disjoint, only the block starting last before the new end can
+        overlap; it is found with one seek on (daily_plan, start_minute).
+
+install() creates the constraint/triggers and is safe to run again. SQLite
+drops a table's triggers when a migration rebuilds it, so migrations that
+alter time_blocks on SQLite must call install() again (see also search.py).
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.db import IntegrityError, connection as default_connection
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DAY_END_MINUTE = 25 * 60  # PM 12 ends at 01:00 of the next day
+SLOT_MINUTES = 60
+AM_HOURS = range(4, 13)
+PM_HOURS = range(1, 13)
+
+CONSTRAINT_NAME = 'time_blocks_no_overlap'
+UNIQUE_SLOT_NAME = 'unique_timeblock_period_hour'
+
+
+class TimeBlockOverlap(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The time block overlaps another block of this plan.'
+    default_code = 'time_block_overlap'
+
+
+def slot_range(period, hour):
+    """(start_minute, end_minute) of an hourly slot"""
+    start = (hour + (12 if period == 'pm' else 0)) * 60
+    return start, start + SLOT_MINUTES
+
+
+def range_slot(start_minute, end_minute):
+    """(period, hour) when the range is exactly one hourly slot, else (None, None)"""
+    if start_minute % 60 or end_minute - start_minute != SLOT_MINUTES:
+        return None, None
+    hour = start_minute // 60
+    if hour in AM_HOURS:
+        return 'am', hour
+    if hour - 12 in PM_HOURS:
+        return 'pm', hour - 12
+    return None, None
+
+
+class IntervalSet:
+    """
+    Disjoint half-open [start, end) intervals kept sorted by start
+
+    Overlap checks are one bisect (O(log n)): among disjoint intervals the
+    one starting last before `end` also ends last, so it is the only
+    candidate to check.
+    """
+
+    def __init__(self, intervals=()):
+        self._starts = []
+        self._items = []
+        for start, end, key in sorted(intervals, key=lambda item: item[:2]):
+            self.add(start, end, key)
+
+    def __len__(self):
+        return len(self._items)
+
+    def overlapping(self, start, end):
+        """(start, end, key) of an interval overlapping [start, end), or None"""
+        index = bisect_left(self._starts, end)
+        if index and self._items[index - 1][1] > start:
+            return self._items[index - 1]
+        return None
+
+    def add(self, start, end, key=None):
+        """Add [start, end); raises ValueError if it overlaps an interval of the set"""
+        if self.overlapping(start, end) is not None:
+            raise ValueError(f'[{start}, {end}) overlaps an existing interval')
+        index = bisect_left(self._starts, start)
+        self._starts.insert(index, start)
+        self._items.insert(index, (start, end, key))
+
+    def remove(self, start, end):
+        """Remove [start, end); raises ValueError if it is not an interval of the set"""
+        index = bisect_left(self._starts, start)
+        if index == len(self._items) or self._items[index][:2] != (start, end):
+            raise ValueError(f'[{start}, {end}) is not in the set')
+        del self._starts[index]
+        del self._items[index]
+
+
+def is_overlap_error(exc):
+    """Whether an IntegrityError comes from the overlap guard (or the equivalent slot constraint)"""
+    message = str(exc)
+    return CONSTRAINT_NAME in message or UNIQUE_SLOT_NAME in message or (
+        'UNIQUE constraint failed: time_blocks.daily_plan_id' in message
+    )
+
+
+@contextmanager
+def overlap_as_conflict():
+    """Turn overlap IntegrityErrors raised inside the block into TimeBlockOverlap (409)"""
+    try:
+        yield
+    except IntegrityError as exc:
+        if is_overlap_error(exc):
+            raise TimeBlockOverlap() from exc
+        raise
+
+
+# PostgreSQL
+
+PG_INSTALL = (
+    """
+    CREATE OR REPLACE FUNCTION time_block_plan_key(plan_id uuid) RETURNS inet
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT regexp_replace(replace(plan_id::text, '-', ''), '(....)(?!$)', '\\1:', 'g')::inet
+    $$
+    """,
+    f'ALTER TABLE time_blocks DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}',
+    f"""
+    ALTER TABLE time_blocks ADD CONSTRAINT {CONSTRAINT_NAME} EXCLUDE USING gist (
+        time_block_plan_key(daily_plan_id) inet_ops WITH =,
+        int4range(start_minute, end_minute) WITH &&
+    )
+    """,
+)
+
+PG_UNINSTALL = (
+    f'ALTER TABLE time_blocks DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}',
+    'DROP FUNCTION IF EXISTS time_block_plan_key(uuid)',
+)
+
+# SQLite
+
+# Same-slot rows are left to the unique (daily_plan, period, hour) constraint,
+# so INSERT ... ON CONFLICT (slot) DO UPDATE still works
+SQLITE_CHECK = f"""
+    SELECT RAISE(ABORT, '{CONSTRAINT_NAME}')
+    WHERE NEW.start_minute < (
+        SELECT tb.end_minute FROM time_blocks tb
+        WHERE tb.daily_plan_id = NEW.daily_plan_id
+          AND tb.start_minute < NEW.end_minute
+          AND tb.id != NEW.id
+          AND NOT (NEW.period IS NOT NULL AND tb.period IS NEW.period AND tb.hour IS NEW.hour)
+        ORDER BY tb.start_minute DESC
+        LIMIT 1
+    );
+"""
+
+SQLITE_INSTALL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {CONSTRAINT_NAME}_insert BEFORE INSERT ON time_blocks BEGIN
+    {SQLITE_CHECK} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {CONSTRAINT_NAME}_update
+    BEFORE UPDATE OF daily_plan_id, start_minute, end_minute ON time_blocks BEGIN
+    {SQLITE_CHECK} END
+    """,
+)
+
+SQLITE_UNINSTALL = (
+    f'DROP TRIGGER IF EXISTS {CONSTRAINT_NAME}_update',
+    f'DROP TRIGGER IF EXISTS {CONSTRAINT_NAME}_insert',
+)
+
+
+def _execute_all(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(connection=None):
+    """Create (or re-create) the non-overlap constraint/triggers"""
+    connection = connection or default_connection
+    if connection.vendor == 'postgresql':
+        _execute_all(connection, PG_INSTALL)
+    elif connection.vendor == 'sqlite':
+        _execute_all(connection, SQLITE_INSTALL)
+
+
+def uninstall(connection=None):
+    """Drop everything install() created"""
+    connection = connection or default_connection
+    if connection.vendor == 'postgresql':
+        _execute_all(connection, PG_UNINSTALL)
+    elif connection.vendor == 'sqlite':
+        _execute_all(connection, SQLITE_UNINSTALL)
@@ -0,0 +1,54 @@
+"""Brain dump autosave: coalesced patches reach the database by their deadline"""
+
+from datetime import date, timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.plans import autosave
+from apps.plans.models import DailyPlan
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def plan(user):
+    return DailyPlan.objects.create(user=user, date=date(2025, 3, 1), brain_dump='hello')
+
+
+def test_coalesced_patch_is_flushed_after_the_deadline(plan, settings):
+    settings.BRAIN_DUMP_COALESCE_SECONDS = 5
+
+    # First patch of a burst is written and sets the deadline
+    applied, state = autosave.apply_patch(plan, 0, [{'offset': 5, 'insert': ' world'}])
+    assert applied and not state['dirty']
+    plan.refresh_from_db()
+    assert plan.brain_dump == 'hello world'
+    assert plan.brain_dump_flush_by is not None
+    deadline = plan.brain_dump_flush_by
+
+    # The next one in the window only lives in the cache
+    applied, state = autosave.apply_patch(plan, 1, [{'offset': 11, 'insert': '!'}])
+    assert applied and state['dirty']
+    plan.refresh_from_db()
+    assert plan.brain_dump == 'hello world'
+
+    # Nothing is due before the deadline
+    assert autosave.flush_due(now=deadline - timedelta(seconds=1)) == (0, 0)
+
+    assert autosave.flush_due(now=deadline) == (1, 0)
+    plan.refresh_from_db()
+    assert (plan.brain_dump, plan.brain_dump_version) == ('hello world!', 2)
+
+    # The flush sets a new deadline; with nothing pending it is cleared
+    assert autosave.flush_due(now=timezone.now() + timedelta(seconds=10)) == (0, 1)
+    plan.refresh_from_db()
+    assert plan.brain_dump_flush_by is None
+
+
+def test_deadline_is_cleared_when_the_cached_state_is_gone(plan, settings):
+    applied, state = autosave.apply_patch(plan, 0, [{'offset': 0, 'insert': '> '}])
+    autosave.cache.delete(autosave._state_key(plan.pk))
+
+    assert autosave.flush_due(now=timezone.now() + timedelta(seconds=settings.BRAIN_DUMP_COALESCE_SECONDS)) == (0, 1)
+    assert not DailyPlan.objects.filter(brain_dump_flush_by__isnull=False).exists()
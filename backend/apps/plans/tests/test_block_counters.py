@@ -0,0 +1,150 @@
+"""DailyPlan.total_blocks/completed_blocks stay in step with the blocks on every write path"""
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.plans.models import DailyPlan, PlanTemplate, PlanTemplateBlock, TimeBlock
+from apps.plans.rollover import rollover_unfinished_blocks
+
+pytestmark = pytest.mark.django_db
+
+DAY = date(2025, 3, 1)
+
+
+def counters(plan):
+    """(total_blocks, completed_blocks, completion_rate) as stored"""
+    plan.refresh_from_db()
+    return plan.total_blocks, plan.completed_blocks, float(plan.completion_rate)
+
+
+def recount(plan):
+    """The same triple computed from the blocks themselves"""
+    blocks = TimeBlock.objects.filter(daily_plan=plan)
+    total, completed = blocks.count(), blocks.filter(is_completed=True).count()
+    return total, completed, round(completed / total * 100, 2) if total else 0.0
+
+
+@pytest.fixture
+def plan(user):
+    return DailyPlan.objects.create(user=user, date=DAY)
+
+
+def test_block_save_and_delete(plan):
+    first = TimeBlock.objects.create(daily_plan=plan, period='am', hour=9)
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=10, is_completed=True)
+    assert counters(plan) == (2, 1, 50.0)
+
+    first.is_completed = True
+    first.save()
+    assert counters(plan) == (2, 2, 100.0)
+
+    # Saving again without a change does not count twice
+    first.save()
+    assert counters(plan) == (2, 2, 100.0)
+
+    first.delete()
+    assert counters(plan) == (1, 1, 100.0) == recount(plan)
+
+
+def test_mark_completed_on_block_and_queryset(plan):
+    blocks = [TimeBlock.objects.create(daily_plan=plan, period='am', hour=hour) for hour in (8, 9, 10, 11)]
+
+    blocks[0].mark_completed()
+    blocks[0].mark_completed()
+    assert counters(plan) == (4, 1, 25.0)
+
+    completed, plan_ids = TimeBlock.objects.filter(pk__in=[b.pk for b in blocks[:3]]).mark_completed()
+    assert (completed, plan_ids) == (2, {plan.pk})
+    assert counters(plan) == (4, 3, 75.0) == recount(plan)
+
+
+def test_grid_replace(api_client, plan):
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=9, is_completed=True)
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=10)
+    TimeBlock.objects.create(daily_plan=plan, start_minute=13 * 60, end_minute=13 * 60 + 30, is_completed=True)
+
+    response = api_client.put(
+        f'/api/plans/daily-plans/{plan.pk}/blocks/',
+        [{'period': 'am', 'hour': 9, 'title': 'kept'}, {'period': 'pm', 'hour': 3, 'title': 'new'}],
+        format='json',
+    )
+
+    assert response.status_code == 200
+    # am 10 deleted, pm 3 added, am 9 keeps its completion, the minute block is untouched
+    assert counters(plan) == (3, 2, 66.67) == recount(plan)
+
+
+def test_template_materialize(user):
+    template = PlanTemplate.objects.create(user=user, name='Weekday', weekdays=[])
+    for hour in (9, 10):
+        PlanTemplateBlock.objects.create(template=template, period='am', hour=hour, title='Study')
+
+    created, _ = template.materialize(DAY, date(2025, 3, 3))
+
+    assert len(created) == 3
+    for plan in DailyPlan.objects.filter(user=user):
+        assert counters(plan) == (2, 0, 0.0) == recount(plan)
+
+
+def test_rollover(user):
+    user.auto_rollover = True
+    user.save()
+    yesterday = DailyPlan.objects.create(user=user, date=DAY)
+    TimeBlock.objects.create(daily_plan=yesterday, period='am', hour=9)
+    TimeBlock.objects.create(daily_plan=yesterday, period='am', hour=10, is_completed=True)
+    today = DailyPlan.objects.create(user=user, date=date(2025, 3, 2))
+    TimeBlock.objects.create(daily_plan=today, period='pm', hour=1, is_completed=True)
+
+    rollover_unfinished_blocks(now=datetime(2025, 3, 2, 0, 30, tzinfo=ZoneInfo('Asia/Seoul')))
+
+    assert counters(today) == (2, 1, 50.0) == recount(today)
+    assert counters(yesterday) == (2, 1, 50.0)
+
+
+def test_ics_import(api_client, plan):
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=8, is_completed=True)
+    # 09:00-10:00 and 11:00-11:30 in Asia/Seoul
+    content = b"""BEGIN:VCALENDAR
+BEGIN:VEVENT
+UID:lecture@example.com
+DTSTART:20250301T000000Z
+DTEND:20250301T010000Z
+SUMMARY:Lecture
+END:VEVENT
+BEGIN:VEVENT
+UID:club@example.com
+DTSTART:20250301T020000Z
+DTEND:20250301T023000Z
+SUMMARY:Club
+END:VEVENT
+END:VCALENDAR
+"""
+    response = api_client.post(
+        '/api/plans/daily-plans/import-ics/',
+        {'file': SimpleUploadedFile('calendar.ics', content)},
+        format='multipart',
+    )
+
+    assert response.json()['created_blocks'] == 2
+    assert counters(plan) == (3, 1, 33.33) == recount(plan)
+
+
+def test_reconcile_repairs_drift(user, plan):
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=9, is_completed=True)
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=10)
+    in_step = DailyPlan.objects.create(user=user, date=date(2025, 3, 2))
+    TimeBlock.objects.create(daily_plan=in_step, period='am', hour=9)
+
+    # Writes that bypass the model (raw updates, restores) leave the counters behind
+    DailyPlan.objects.filter(pk=plan.pk).update(total_blocks=7, completed_blocks=0, completion_rate=0)
+    TimeBlock.objects.filter(daily_plan=plan, hour=10).update(is_completed=True)
+
+    assert DailyPlan.objects.filter(user=user).reconcile_block_counters() == 1
+    assert counters(plan) == (2, 2, 100.0) == recount(plan)
+    assert counters(in_step) == (1, 0, 0.0)
+
+    # Nothing left to fix
+    assert DailyPlan.objects.filter(user=user).reconcile_block_counters() == 0
@@ -0,0 +1,86 @@
+"""Bulk mark-completed: one UPDATE for the blocks, one counter rollup per plan"""
+
+import uuid
+from datetime import date
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.plans.models import DailyPlan, TimeBlock
+from apps.plans.serializers import MAX_BULK_BLOCKS
+
+pytestmark = pytest.mark.django_db
+
+BULK_URL = '/api/plans/time-blocks/bulk-mark-completed/'
+
+
+def make_blocks(plan, count, **extra):
+    return [TimeBlock.objects.create(daily_plan=plan, period='am', hour=hour, **extra) for hour in range(1, count + 1)]
+
+
+def ids(*blocks):
+    return [str(block.pk) for block in blocks]
+
+
+def test_blocks_of_several_plans_are_completed_with_one_rollup(api_client, user):
+    monday = DailyPlan.objects.create(user=user, date=date(2025, 3, 3))
+    tuesday = DailyPlan.objects.create(user=user, date=date(2025, 3, 4))
+    monday_blocks = make_blocks(monday, 3)
+    done = TimeBlock.objects.create(daily_plan=monday, period='pm', hour=1, is_completed=True)
+    tuesday_blocks = make_blocks(tuesday, 2)
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.post(
+            BULK_URL, {'ids': ids(*monday_blocks[:2], done, *tuesday_blocks)}, format='json'
+        )
+
+    assert response.status_code == 200
+    body = response.json()
+    # The block that was already completed is not counted again
+    assert body['completed'] == 4
+    assert [(plan['date'], plan['completed_blocks_count'], plan['completion_rate']) for plan in body['plans']] == [
+        ('2025-03-03', 3, '75.00'), ('2025-03-04', 2, '100.00'),
+    ]
+
+    updates = [q['sql'] for q in context.captured_queries if q['sql'].startswith('UPDATE')]
+    # One UPDATE for the blocks, one for both plans (each gained 2 completed blocks)
+    assert len([sql for sql in updates if sql.startswith('UPDATE "time_blocks"')]) == 1
+    assert len([sql for sql in updates if sql.startswith('UPDATE "daily_plans"')]) == 1
+
+    # Repeating the request changes nothing
+    assert api_client.post(BULK_URL, {'ids': ids(*monday_blocks[:2])}, format='json').json()['completed'] == 0
+    monday.refresh_from_db()
+    assert monday.completed_blocks == 3
+
+
+def test_other_users_blocks_are_ignored(api_client, user, django_user_model):
+    other = django_user_model.objects.create_user(email='other@example.com', username='other')
+    theirs = make_blocks(DailyPlan.objects.create(user=other, date=date(2025, 3, 3)), 1)
+    mine = make_blocks(DailyPlan.objects.create(user=user, date=date(2025, 3, 3)), 1)
+
+    response = api_client.post(BULK_URL, {'ids': ids(*theirs, *mine) + [str(uuid.uuid4())]}, format='json')
+
+    assert response.json()['completed'] == 1
+    assert [plan['date'] for plan in response.json()['plans']] == ['2025-03-03']
+    assert TimeBlock.objects.get(pk=theirs[0].pk).is_completed is False
+    assert DailyPlan.objects.get(user=other).completed_blocks == 0
+
+
+@pytest.mark.parametrize('body', [
+    {'ids': []},
+    {'ids': ['not-a-uuid']},
+    {'ids': [str(uuid.uuid4()) for _ in range(MAX_BULK_BLOCKS + 1)]},
+])
+def test_invalid_id_lists_are_rejected(api_client, body):
+    assert api_client.post(BULK_URL, body, format='json').status_code == 400
+
+
+def test_largest_id_list_is_accepted(api_client, user):
+    plans = [DailyPlan.objects.create(user=user, date=date(2025, 3, day)) for day in range(1, 10)]
+    blocks = [block for plan in plans for block in make_blocks(plan, 12)][:MAX_BULK_BLOCKS]
+
+    response = api_client.post(BULK_URL, {'ids': ids(*blocks)}, format='json')
+
+    assert response.json()['completed'] == MAX_BULK_BLOCKS
+    assert sum(plan['completed_blocks_count'] for plan in response.json()['plans']) == MAX_BULK_BLOCKS
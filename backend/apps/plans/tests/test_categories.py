@@ -0,0 +1,91 @@
+"""Category dictionary: usage counts kept by block writes and the autocomplete ranking"""
+
+from datetime import date, timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from apps.plans.models import DailyPlan, PlanTemplate, PlanTemplateBlock, TimeBlock, UserCategory
+
+pytestmark = pytest.mark.django_db
+
+CATEGORIES_URL = '/api/plans/categories/'
+
+
+def usage(user):
+    return dict(UserCategory.objects.filter(user=user).values_list('name', 'usage_count'))
+
+
+def test_record_adds_usages_and_creates_missing_categories(user, django_user_model):
+    UserCategory.objects.record(user.pk, {'study': 2, 'gym': 1, '': 4, 'rest': 0})
+    UserCategory.objects.record(user.pk, {'study': 1, 'reading': 3})
+    other = django_user_model.objects.create_user(email='other@example.com', username='other')
+    UserCategory.objects.record(other.pk, {'study': 5})
+
+    assert usage(user) == {'study': 3, 'gym': 1, 'reading': 3}
+    assert usage(other) == {'study': 5}
+
+
+def test_autocomplete_ranks_by_usage_then_recency(api_client, user):
+    now = timezone.now()
+    UserCategory.objects.record(user.pk, {'Study': 5, 'studio': 2}, used_at=now - timedelta(days=2))
+    UserCategory.objects.record(user.pk, {'stretching': 2, 'gym': 9}, used_at=now)
+
+    names = [c['name'] for c in api_client.get(CATEGORIES_URL, {'q': 'st'}).json()]
+
+    # Case-insensitive prefix match; ties go to the most recently used
+    assert names == ['Study', 'stretching', 'studio']
+    assert [c['name'] for c in api_client.get(CATEGORIES_URL).json()][:2] == ['gym', 'Study']
+
+
+def test_autocomplete_limit_is_capped(api_client, user):
+    UserCategory.objects.record(user.pk, {f'category {i:02d}': i + 1 for i in range(60)})
+
+    assert len(api_client.get(CATEGORIES_URL).json()) == 10
+    assert len(api_client.get(CATEGORIES_URL, {'limit': 3}).json()) == 3
+    assert len(api_client.get(CATEGORIES_URL, {'limit': 500}).json()) == 50
+    assert len(api_client.get(CATEGORIES_URL, {'limit': 0}).json()) == 1
+    assert len(api_client.get(CATEGORIES_URL, {'limit': 'many'}).json()) == 10
+
+
+def test_block_writes_count_new_categories(api_client, user):
+    plan = DailyPlan.objects.create(user=user, date=date(2025, 3, 1))
+    block = TimeBlock.objects.create(daily_plan=plan, period='am', hour=8, category='study')
+    block.title = 'Renamed'
+    block.save()  # same category: not counted again
+    assert usage(user) == {'study': 1}
+
+    # Grid save: only slots whose category changed are counted
+    response = api_client.put(f'/api/plans/daily-plans/{plan.pk}/blocks/', [
+        {'period': 'am', 'hour': 8, 'category': 'study'},
+        {'period': 'am', 'hour': 9, 'category': 'study'},
+        {'period': 'am', 'hour': 10, 'category': 'gym'},
+    ], format='json')
+    assert response.status_code == 200
+    assert usage(user) == {'study': 2, 'gym': 1}
+
+    # ICS import: the first CATEGORIES value of each created block
+    content = b"""BEGIN:VCALENDAR
+BEGIN:VEVENT
+UID:lecture@example.com
+DTSTART:20250302T000000Z
+DTEND:20250302T010000Z
+SUMMARY:Lecture
+CATEGORIES:lecture,school
+END:VEVENT
+END:VCALENDAR
+"""
+    api_client.post(
+        '/api/plans/daily-plans/import-ics/',
+        {'file': SimpleUploadedFile('calendar.ics', content)},
+        format='multipart',
+    )
+    assert usage(user) == {'study': 2, 'gym': 1, 'lecture': 1}
+
+    # Materialize: once per created block
+    template = PlanTemplate.objects.create(user=user, name='Gym days', weekdays=[])
+    PlanTemplateBlock.objects.create(template=template, period='pm', hour=6, category='gym')
+    created, _ = template.materialize(date(2025, 3, 3), date(2025, 3, 5))
+    assert len(created) == 3
+    assert usage(user) == {'study': 2, 'gym': 4, 'lecture': 1}
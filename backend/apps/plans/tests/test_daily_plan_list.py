@@ -0,0 +1,34 @@
+"""DailyPlan list: block counts come from the plan rows, not per-plan queries"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from apps.plans.models import DailyPlan, TimeBlock
+
+pytestmark = pytest.mark.django_db
+
+LIST_URL = '/api/plans/daily-plans/'
+PLANS = 12
+QUERY_BUDGET = 2  # page count + page rows, whatever the number of plans
+
+
+def create_plans(user, count):
+    for offset in range(count):
+        plan = DailyPlan.objects.create(user=user, date=date(2025, 1, 1) + timedelta(days=offset))
+        for hour in (9, 10, 11):
+            TimeBlock.objects.create(
+                daily_plan=plan, period=TimeBlock.Period.AM, hour=hour, is_completed=hour == 9
+            )
+
+
+def test_list_counts_blocks_without_per_row_queries(api_client, user, django_assert_max_num_queries):
+    create_plans(user, PLANS)
+
+    with django_assert_max_num_queries(QUERY_BUDGET):
+        response = api_client.get(LIST_URL)
+
+    assert response.status_code == 200
+    rows = response.json()['results']
+    assert len(rows) == PLANS
+    assert {(row['time_blocks_count'], row['completed_blocks_count']) for row in rows} == {(3, 1)}
@@ -0,0 +1,29 @@
+"""Calendar feed: cached plan chunks follow the plan to its new date"""
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from apps.plans import feed
+from apps.plans.models import DailyPlan, TimeBlock
+
+pytestmark = pytest.mark.django_db
+
+NOW = datetime(2025, 3, 1, 12, 0, tzinfo=ZoneInfo('Asia/Seoul'))
+
+
+def test_moved_plan_is_rendered_on_its_new_date(user, django_capture_on_commit_callbacks):
+    plan = DailyPlan.objects.create(user=user, date=date(2025, 3, 3))
+    TimeBlock.objects.create(daily_plan=plan, period=TimeBlock.Period.AM, hour=9, title='Lecture')
+
+    # 09:00 in Asia/Seoul is 00:00Z
+    assert b'DTSTART:20250303T000000Z' in feed.get_feed(user.pk, now=NOW)['body']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        plan.date = date(2025, 3, 4)
+        plan.save(update_fields=['date'])
+
+    body = feed.get_feed(user.pk, now=NOW)['body']
+    assert b'DTSTART:20250304T000000Z' in body
+    assert b'DTSTART:20250303T000000Z' not in body
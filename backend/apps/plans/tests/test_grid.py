@@ -0,0 +1,133 @@
+"""Grid layout and grid save: hourly slots next to minute-range blocks"""
+
+from datetime import date
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.plans import grid
+from apps.plans.models import DailyPlan, TimeBlock
+
+pytestmark = pytest.mark.django_db
+
+
+def test_off_the_hour_blocks_are_listed_in_extra(api_client, user):
+    plan = DailyPlan.objects.create(user=user, date=date(2025, 3, 1))
+    hourly = TimeBlock.objects.create(daily_plan=plan, period=TimeBlock.Period.AM, hour=9, title='Study')
+    pomodoro = TimeBlock.objects.create(
+        daily_plan=plan, start_minute=13 * 60, end_minute=13 * 60 + 25, title='Pomodoro', planned_duration=25
+    )
+    long_block = TimeBlock.objects.create(daily_plan=plan, start_minute=10 * 60, end_minute=12 * 60, title='Exam')
+
+    for packed in ('0', '1'):
+        response = api_client.get(f'/api/plans/daily-plans/{plan.pk}/', {'layout': 'grid', 'packed': packed})
+
+        assert response.status_code == 200
+        body = response.json()['grid']
+        assert body['ids'][grid.SLOT_INDEX[('am', 9)]] == str(hourly.pk)
+        assert [item['id'] for item in body['extra']] == [str(long_block.pk), str(pomodoro.pk)]
+        assert body['extra'][1] == {
+            'id': str(pomodoro.pk),
+            'start_minute': 780,
+            'end_minute': 805,
+            'title': 'Pomodoro',
+            'category': None,
+            'planned': 25,
+            'actual': 0,
+            'completed': False,
+        }
+
+
+ICS_EVENT = b"""BEGIN:VCALENDAR
+BEGIN:VEVENT
+UID:seminar@example.com
+DTSTART:20250301T060000Z
+DTEND:20250301T063000Z
+SUMMARY:Seminar
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def test_grid_save_keeps_minute_range_and_imported_blocks(api_client, user):
+    # 15:00-15:30 in Asia/Seoul, on a plan the import creates
+    response = api_client.post(
+        '/api/plans/daily-plans/import-ics/',
+        {'file': SimpleUploadedFile('calendar.ics', ICS_EVENT)},
+        format='multipart',
+    )
+    assert response.json()['created_blocks'] == 1
+    plan = DailyPlan.objects.get(user=user, date=date(2025, 3, 1))
+    pomodoro = TimeBlock.objects.create(daily_plan=plan, start_minute=13 * 60 + 30, end_minute=13 * 60 + 55)
+    TimeBlock.objects.create(daily_plan=plan, period=TimeBlock.Period.AM, hour=9, title='Study')
+    TimeBlock.objects.create(daily_plan=plan, period=TimeBlock.Period.AM, hour=10, title='Dropped')
+    url = f'/api/plans/daily-plans/{plan.pk}/blocks/'
+
+    response = api_client.put(url, [{'period': 'am', 'hour': 9, 'title': 'Physics'}], format='json')
+
+    assert response.status_code == 200, response.content
+    assert sorted(
+        plan.time_blocks.values_list('start_minute', 'title')
+    ) == [(9 * 60, 'Physics'), (13 * 60 + 30, None), (15 * 60, 'Seminar')]
+
+    # PM 1 (13:00-14:00) would overlap the kept 13:30 block: 409, nothing changes
+    response = api_client.put(
+        url, [{'period': 'am', 'hour': 9, 'title': 'Physics'}, {'period': 'pm', 'hour': 1}], format='json'
+    )
+    assert response.status_code == 409
+    assert plan.time_blocks.count() == 3
+    assert TimeBlock.objects.filter(pk=pomodoro.pk).exists()
+    plan.refresh_from_db()
+    assert plan.total_blocks == 3
+
+
+def test_grid_save_upserts_slots_and_deletes_stale_ones(api_client, user):
+    plan = DailyPlan.objects.create(user=user, date=date(2025, 3, 1))
+    kept = TimeBlock.objects.create(
+        daily_plan=plan, period='am', hour=9, title='Study', actual_duration=40, is_completed=True
+    )
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=10, title='Stale', is_completed=True)
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=11, title='Stale')
+    body = [
+        {'period': 'am', 'hour': 9, 'title': 'Physics', 'category': 'study', 'planned_duration': 50},
+        {'period': 'pm', 'hour': 2, 'title': 'Gym'},
+        {'period': 'pm', 'hour': 3, 'title': 'Essay'},
+    ]
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.put(f'/api/plans/daily-plans/{plan.pk}/blocks/', body, format='json')
+
+    assert response.status_code == 200, response.content
+    slots = {(b.period, b.hour): b for b in plan.time_blocks.all()}
+    assert set(slots) == {('am', 9), ('pm', 2), ('pm', 3)}
+
+    # Upsert on (plan, period, hour): same row, planning fields replaced, progress kept
+    block = slots[('am', 9)]
+    assert block.pk == kept.pk
+    assert (block.title, block.category, block.planned_duration) == ('Physics', 'study', 50)
+    assert (block.actual_duration, block.is_completed) == (40, True)
+
+    # Counters and completion rate are written once, after every slot changed
+    plan_updates = [q['sql'] for q in context.captured_queries if q['sql'].startswith('UPDATE "daily_plans"')]
+    assert len(plan_updates) == 1
+    plan.refresh_from_db()
+    assert (plan.total_blocks, plan.completed_blocks, float(plan.completion_rate)) == (3, 1, 33.33)
+    assert response.json()['completion_rate'] == '33.33'
+
+
+@pytest.mark.parametrize('body, error', [
+    ([{'period': 'am', 'hour': 9, 'title': 'A'}, {'period': 'am', 'hour': 9, 'title': 'B'}], 'Duplicate slot: AM 9'),
+    ([{'period': 'am', 'hour': 13}], 'hour'),
+    ([{'title': 'No slot'}], 'period'),
+])
+def test_invalid_grids_are_rejected_without_changes(api_client, user, body, error):
+    plan = DailyPlan.objects.create(user=user, date=date(2025, 3, 1))
+    TimeBlock.objects.create(daily_plan=plan, period='am', hour=8, title='Kept')
+
+    response = api_client.put(f'/api/plans/daily-plans/{plan.pk}/blocks/', body, format='json')
+
+    assert response.status_code == 400
+    assert error in response.content.decode()
+    assert list(plan.time_blocks.values_list('title', flat=True)) == ['Kept']
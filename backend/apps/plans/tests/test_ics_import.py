@@ -0,0 +1,106 @@
+"""ICS import: re-importing a calendar updates what it imported before"""
+
+from datetime import date
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.plans.models import DailyPlan, TimeBlock
+
+pytestmark = pytest.mark.django_db
+
+IMPORT_URL = '/api/plans/daily-plans/import-ics/'
+
+# Asia/Seoul is the users' default timezone; 00:00Z is 09:00 there
+EXPORT = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+UID:lecture@example.com
+DTSTART:20250303T000000Z
+DTEND:20250303T010000Z
+SUMMARY:Lecture
+END:VEVENT
+BEGIN:VEVENT
+UID:club@example.com
+DTSTART:20250303T050000Z
+DTEND:20250303T053000Z
+SUMMARY:Club
+END:VEVENT
+BEGIN:VEVENT
+UID:daily@example.com
+DTSTART:20250304T030000Z
+DTEND:20250304T033000Z
+RRULE:FREQ=DAILY;COUNT=3
+SUMMARY:Standup
+END:VEVENT
+END:VCALENDAR
+"""
+
+# Lecture moved by an hour, club renamed, one standup occurrence overridden
+EDITED = EXPORT.replace(
+    'DTSTART:20250303T000000Z\nDTEND:20250303T010000Z', 'DTSTART:20250303T010000Z\nDTEND:20250303T020000Z'
+).replace('SUMMARY:Club', 'SUMMARY:Chess club').replace('END:VCALENDAR', """BEGIN:VEVENT
+UID:daily@example.com
+RECURRENCE-ID:20250305T030000Z
+DTSTART:20250305T040000Z
+DTEND:20250305T043000Z
+SUMMARY:Standup (late)
+END:VEVENT
+END:VCALENDAR""")
+
+
+def upload(api_client, content):
+    response = api_client.post(
+        IMPORT_URL, {'file': SimpleUploadedFile('calendar.ics', content.encode())}, format='multipart'
+    )
+    assert response.status_code in (200, 201), response.content
+    return response.json()
+
+
+def blocks(user):
+    return list(
+        TimeBlock.objects.filter(daily_plan__user=user)
+        .order_by('daily_plan__date', 'start_minute')
+        .values_list('daily_plan__date', 'start_minute', 'end_minute', 'title')
+    )
+
+
+def test_reimport_matches_events_by_uid(api_client, user):
+    first = upload(api_client, EXPORT)
+    assert (first['created_blocks'], first['updated_blocks'], first['error_count']) == (5, 0, 0)
+    imported = blocks(user)
+
+    # The same file again: nothing added, nothing reported as overlapping
+    again = upload(api_client, EXPORT)
+    assert (again['created_blocks'], again['updated_blocks'], again['unchanged_blocks']) == (0, 0, 5)
+    assert again['error_count'] == 0
+    assert blocks(user) == imported
+
+    # An edited export updates the blocks in place, even where the new time
+    # overlaps the block's own previous range
+    edited = upload(api_client, EDITED)
+    assert (edited['created_blocks'], edited['updated_blocks'], edited['unchanged_blocks']) == (0, 3, 2)
+    assert edited['error_count'] == 0
+    again = upload(api_client, EDITED)
+    assert (again['created_blocks'], again['updated_blocks'], again['unchanged_blocks']) == (0, 0, 5)
+    assert blocks(user) == [
+        (date(2025, 3, 3), 10 * 60, 11 * 60, 'Lecture'),
+        (date(2025, 3, 3), 14 * 60, 14 * 60 + 30, 'Chess club'),
+        (date(2025, 3, 4), 12 * 60, 12 * 60 + 30, 'Standup'),
+        (date(2025, 3, 5), 13 * 60, 13 * 60 + 30, 'Standup (late)'),
+        (date(2025, 3, 6), 12 * 60, 12 * 60 + 30, 'Standup'),
+    ]
+    plan = DailyPlan.objects.get(user=user, date=date(2025, 3, 3))
+    assert plan.total_blocks == 2
+
+
+def test_overlap_with_a_block_planned_by_hand_is_still_reported(api_client, user):
+    plan = DailyPlan.objects.create(user=user, date=date(2025, 3, 3))
+    TimeBlock.objects.create(daily_plan=plan, start_minute=9 * 60 + 30, end_minute=10 * 60, title='Gym')
+
+    result = upload(api_client, EXPORT)
+
+    assert result['created_blocks'] == 4
+    assert [(error['uid'], error['detail']) for error in result['errors']] == [
+        ('lecture@example.com', 'Overlaps a block that is already planned')
+    ]
@@ -0,0 +1,75 @@
+"""Range view: every day of a window in a fixed number of queries"""
+
+from datetime import date
+
+import pytest
+
+from apps.plans.models import DailyPlan, TimeBlock
+from apps.plans.views import MAX_RANGE_DAYS
+
+pytestmark = pytest.mark.django_db
+
+RANGE_URL = '/api/plans/daily-plans/range/'
+
+
+def make_plan(user, day, blocks=2):
+    plan = DailyPlan.objects.create(user=user, date=day, brain_dump=f'notes {day}')
+    for hour in range(1, blocks + 1):
+        TimeBlock.objects.create(daily_plan=plan, period='am', hour=hour, title='Study', description='chapter 3')
+    return plan
+
+
+@pytest.mark.parametrize('compact', ['0', '1'])
+def test_range_uses_two_queries_however_many_plans(api_client, user, django_assert_num_queries, compact):
+    for day in range(1, 29):
+        make_plan(user, date(2025, 2, day), blocks=day % 4)
+
+    with django_assert_num_queries(2):
+        response = api_client.get(RANGE_URL, {'from': '2025-02-01', 'to': '2025-03-31', 'compact': compact})
+
+    assert response.status_code == 200
+    assert len(response.json()['days']) == 59
+
+
+def test_days_without_a_plan_are_filled_in(api_client, user, django_user_model):
+    make_plan(user, date(2025, 3, 2))
+    other = django_user_model.objects.create_user(email='other@example.com', username='other')
+    make_plan(other, date(2025, 3, 3))
+
+    body = api_client.get(RANGE_URL, {'from': '2025-03-01', 'to': '2025-03-03'}).json()
+
+    assert (body['from'], body['to']) == ('2025-03-01', '2025-03-03')
+    assert [day['date'] for day in body['days']] == ['2025-03-01', '2025-03-02', '2025-03-03']
+    # Other users' plans are never included
+    assert body['days'][0]['plan'] is None and body['days'][2]['plan'] is None
+    plan = body['days'][1]['plan']
+    assert plan['brain_dump'] == 'notes 2025-03-02'
+    assert [block['description'] for block in plan['time_blocks']] == ['chapter 3', 'chapter 3']
+
+
+def test_compact_leaves_out_long_text(api_client, user):
+    make_plan(user, date(2025, 3, 1))
+
+    response = api_client.get(RANGE_URL, {'from': '2025-03-01', 'to': '2025-03-01', 'compact': '1'})
+    plan = response.json()['days'][0]['plan']
+
+    assert 'brain_dump' not in plan
+    assert len(plan['time_blocks']) == 2
+    assert all('description' not in block and block['title'] == 'Study' for block in plan['time_blocks'])
+
+
+@pytest.mark.parametrize('params', [
+    {'from': '2025-03-01'},
+    {'from': '2025-03-01', 'to': '2025-02-28'},
+    {'from': '2025-03-01', 'to': 'tomorrow'},
+    {'from': '2025-01-01', 'to': '2025-03-04'},  # 63 days
+])
+def test_invalid_ranges_are_rejected(api_client, params):
+    assert api_client.get(RANGE_URL, params).status_code == 400
+
+
+def test_longest_range_is_accepted(api_client):
+    response = api_client.get(RANGE_URL, {'from': '2025-01-01', 'to': '2025-03-03'})
+
+    assert response.status_code == 200
+    assert len(response.json()['days']) == MAX_RANGE_DAYS
@@ -0,0 +1,84 @@
+"""Nightly rollover: unfinished blocks move into today's plan without clobbering it"""
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from apps.plans.models import DailyPlan, TimeBlock
+from apps.plans.rollover import rollover_unfinished_blocks
+
+pytestmark = pytest.mark.django_db
+
+YESTERDAY, TODAY = date(2025, 3, 1), date(2025, 3, 2)
+# Shortly after midnight in the users' (default) timezone
+NOW = datetime(2025, 3, 2, 0, 30, tzinfo=ZoneInfo('Asia/Seoul'))
+
+
+def make_user(django_user_model, name, **extra):
+    return django_user_model.objects.create_user(
+        email=f'{name}@example.com', username=name, auto_rollover=True, **extra
+    )
+
+
+def add_block(plan, hour, title, **extra):
+    return TimeBlock.objects.create(daily_plan=plan, period='am', hour=hour, title=title, **extra)
+
+
+def titles(user, day):
+    return list(TimeBlock.objects.filter(daily_plan__user=user, daily_plan__date=day).values_list('title', flat=True))
+
+
+def test_rollover_carries_over_skips_conflicts_and_respects_opt_out(django_user_model):
+    planner = make_user(django_user_model, 'planner')
+    yesterday = DailyPlan.objects.create(user=planner, date=YESTERDAY)
+    add_block(yesterday, 9, 'unfinished')
+    add_block(yesterday, 10, 'done', is_completed=True)
+    add_block(yesterday, 11, 'clashes')
+    today = DailyPlan.objects.create(user=planner, date=TODAY)
+    TimeBlock.objects.create(daily_plan=today, start_minute=11 * 60 + 15, end_minute=11 * 60 + 45, title='meeting')
+
+    newcomer = make_user(django_user_model, 'newcomer')
+    add_block(DailyPlan.objects.create(user=newcomer, date=YESTERDAY), 9, 'carried')
+
+    opted_out = make_user(django_user_model, 'opted-out')
+    opted_out.auto_rollover = False
+    opted_out.save()
+    add_block(DailyPlan.objects.create(user=opted_out, date=YESTERDAY), 9, 'left behind')
+
+    totals = rollover_unfinished_blocks(now=NOW)
+
+    # Only the newcomer's plan is new; the planner's existing plan is not counted
+    assert totals == {'users': 2, 'plans': 1, 'blocks': 2}
+
+    # Carry-over: the unfinished block moves, the completed one stays behind,
+    # and the block overlapping the meeting already planned today is skipped
+    assert sorted(titles(planner, TODAY)) == ['meeting', 'unfinished']
+    assert titles(newcomer, TODAY) == ['carried']
+    today.refresh_from_db()
+    assert (today.total_blocks, today.completed_blocks) == (2, 0)
+
+    # Opt-out: no plan, no blocks, no marker
+    assert not DailyPlan.objects.filter(user=opted_out, date=TODAY).exists()
+    opted_out.refresh_from_db()
+    assert opted_out.last_rollover_on is None
+
+    # A rerun the same day has nothing left to do
+    assert rollover_unfinished_blocks(now=NOW) == {'users': 0, 'plans': 0, 'blocks': 0}
+
+
+def test_plan_created_concurrently_is_not_counted(django_user_model, monkeypatch):
+    user = make_user(django_user_model, 'racer')
+    add_block(DailyPlan.objects.create(user=user, date=YESTERDAY), 9, 'carried')
+
+    bulk_create = DailyPlan.objects.bulk_create
+
+    def racing_bulk_create(objs, **kwargs):
+        # Another request creates today's plan between the existence check and the insert
+        DailyPlan.objects.create(user=user, date=TODAY)
+        return bulk_create(objs, **kwargs)
+
+    monkeypatch.setattr(DailyPlan.objects, 'bulk_create', racing_bulk_create)
+
+    assert rollover_unfinished_blocks(now=NOW) == {'users': 1, 'plans': 0, 'blocks': 1}
+    assert titles(user, TODAY) == ['carried']
@@ -0,0 +1,79 @@
+"""Plan search: ranking, snippets, index upkeep by the triggers and user scoping"""
+
+from datetime import date
+
+import pytest
+
+from apps.plans.models import DailyPlan, TimeBlock
+
+pytestmark = pytest.mark.django_db
+
+SEARCH_URL = '/api/plans/daily-plans/search/'
+
+
+def search(api_client, q):
+    response = api_client.get(SEARCH_URL, {'q': q})
+    assert response.status_code == 200, response.content
+    return response.json()['results']
+
+
+def found(api_client, q):
+    return [hit['date'] for hit in search(api_client, q)]
+
+
+def test_results_are_ranked_with_a_snippet(api_client, user):
+    # Block titles weigh more than the brain dump, the brain dump more than descriptions
+    described = DailyPlan.objects.create(user=user, date=date(2025, 3, 3))
+    TimeBlock.objects.create(daily_plan=described, period='am', hour=9, title='Review', description='physics notes')
+    DailyPlan.objects.create(user=user, date=date(2025, 3, 2), brain_dump='buy physics workbook')
+    titled = DailyPlan.objects.create(user=user, date=date(2025, 3, 1))
+    TimeBlock.objects.create(daily_plan=titled, period='am', hour=9, title='Physics mock exam')
+
+    hits = search(api_client, 'physics')
+
+    assert [hit['date'] for hit in hits] == ['2025-03-01', '2025-03-02', '2025-03-03']
+    # Ties would fall back to the newest date first, so the order above comes from the rank
+    assert hits[0]['rank'] >= hits[1]['rank'] >= hits[2]['rank']
+    assert 'Physics mock exam' in hits[0]['snippet']
+    assert 'physics workbook' in hits[1]['snippet']
+
+    # Every term must match (prefixes included)
+    assert found(api_client, 'phys mock') == ['2025-03-01']
+    assert api_client.get(SEARCH_URL).status_code == 400
+
+
+def test_index_follows_block_insert_update_and_delete(api_client, user):
+    plan = DailyPlan.objects.create(user=user, date=date(2025, 3, 1))
+    block = TimeBlock.objects.create(daily_plan=plan, period='am', hour=9, title='Chemistry')
+    assert found(api_client, 'chemistry') == ['2025-03-01']
+
+    block.title = 'Biology'
+    block.save()
+    assert found(api_client, 'chemistry') == []
+    assert found(api_client, 'biology') == ['2025-03-01']
+
+    # Queryset writes bypass save() and are covered by the triggers too
+    TimeBlock.objects.filter(pk=block.pk).update(description='cell division')
+    assert found(api_client, 'division') == ['2025-03-01']
+
+    block.delete()
+    assert found(api_client, 'biology') == []
+
+
+def test_block_moved_to_another_plan_reindexes_both(api_client, user):
+    source = DailyPlan.objects.create(user=user, date=date(2025, 3, 1))
+    target = DailyPlan.objects.create(user=user, date=date(2025, 3, 2))
+    block = TimeBlock.objects.create(daily_plan=source, period='am', hour=9, title='Algebra')
+
+    TimeBlock.objects.filter(pk=block.pk).update(daily_plan=target)
+
+    assert found(api_client, 'algebra') == ['2025-03-02']
+
+
+def test_other_users_plans_are_not_searched(api_client, user, django_user_model):
+    other = django_user_model.objects.create_user(email='other@example.com', username='other')
+    DailyPlan.objects.create(user=other, date=date(2025, 3, 1), brain_dump='secret essay')
+    DailyPlan.objects.create(user=user, date=date(2025, 3, 2), brain_dump='my essay')
+
+    assert found(api_client, 'essay') == ['2025-03-02']
+    assert found(api_client, 'secret') == []
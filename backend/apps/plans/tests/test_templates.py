@@ -0,0 +1,82 @@
+"""Plan templates: materializing a date range into plans and blocks"""
+
+from datetime import date
+
+import pytest
+
+from apps.plans.models import DailyPlan, PlanTemplate, PlanTemplateBlock, TimeBlock
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def template(user):
+    # Mondays and Wednesdays of March 2025
+    template = PlanTemplate.objects.create(
+        user=user, name='Lectures', priorities=['Read', 'Review'], brain_dump='bring notes',
+        weekdays=[0, 2], start_date=date(2025, 3, 1), end_date=date(2025, 3, 31),
+    )
+    PlanTemplateBlock.objects.create(template=template, period='am', hour=9, title='Lecture', category='study')
+    PlanTemplateBlock.objects.create(template=template, period='pm', hour=2, title='Lab', planned_duration=90)
+    return template
+
+
+def materialize(api_client, template, **body):
+    return api_client.post(f'/api/plans/templates/{template.pk}/materialize/', body, format='json')
+
+
+def test_materialize_creates_matching_days_and_skips_existing_plans(api_client, user, template):
+    existing = DailyPlan.objects.create(user=user, date=date(2025, 3, 5), brain_dump='my own day')
+    TimeBlock.objects.create(daily_plan=existing, period='am', hour=8, title='Dentist')
+
+    # The requested range starts before the template's own range
+    response = materialize(api_client, template, start_date='2025-02-24', end_date='2025-03-12')
+
+    assert response.status_code == 201
+    assert response.json()['created'] == ['2025-03-03', '2025-03-10', '2025-03-12']
+    assert response.json()['skipped'] == ['2025-03-05']
+
+    for plan in DailyPlan.objects.filter(user=user).exclude(pk=existing.pk):
+        assert plan.priorities == ['Read', 'Review']
+        assert plan.brain_dump == 'bring notes'
+        assert sorted(plan.time_blocks.values_list('title', 'category', 'planned_duration')) == [
+            ('Lab', None, 90), ('Lecture', 'study', 60),
+        ]
+        assert (plan.total_blocks, plan.completed_blocks, float(plan.completion_rate)) == (2, 0, 0.0)
+
+    # The existing plan is left as it was
+    existing.refresh_from_db()
+    assert existing.brain_dump == 'my own day'
+    assert list(existing.time_blocks.values_list('title', flat=True)) == ['Dentist']
+    assert existing.total_blocks == 1
+
+
+def test_materialize_again_creates_nothing(api_client, user, template):
+    assert materialize(api_client, template).status_code == 201
+    assert DailyPlan.objects.filter(user=user).count() == 9
+
+    response = materialize(api_client, template)
+
+    assert response.status_code == 200
+    assert response.json()['created'] == []
+    assert len(response.json()['skipped']) == 9
+    assert TimeBlock.objects.filter(daily_plan__user=user).count() == 18
+
+
+@pytest.mark.parametrize('body', [
+    {'start_date': '2025-03-10', 'end_date': '2025-03-01'},
+    {'start_date': '2025-01-01', 'end_date': '2026-01-02'},
+])
+def test_invalid_ranges_are_rejected(api_client, user, template, body):
+    assert materialize(api_client, template, **body).status_code == 400
+    assert not DailyPlan.objects.filter(user=user).exists()
+
+
+def test_template_without_a_range_needs_dates(api_client, user, template):
+    template.start_date = template.end_date = None
+    template.save()
+
+    assert materialize(api_client, template).status_code == 400
+    assert materialize(api_client, template, start_date='2025-04-07', end_date='2025-04-07').json()['created'] == [
+        '2025-04-07',
+    ]
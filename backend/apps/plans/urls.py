@@ -5,13 +5,22 @@ URL configuration for plans app
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import DailyPlanViewSet, TimeBlockViewSet
+from .views import (
+    CalendarFeedTokenView,
+    DailyPlanViewSet,
+    PlanTemplateViewSet,
+    TimeBlockViewSet,
+    UserCategoryViewSet,
+)
 
 # Create router
 router = DefaultRouter()
 router.register(r'daily-plans', DailyPlanViewSet, basename='daily-plan')
 router.register(r'time-blocks', TimeBlockViewSet, basename='time-block')
+router.register(r'templates', PlanTemplateViewSet, basename='plan-template')
+router.register(r'categories', UserCategoryViewSet, basename='category')
 
 urlpatterns = [
+    path('calendar-feed/', CalendarFeedTokenView.as_view(), name='calendar_feed_token'),
     path('', include(router.urls)),
 ]
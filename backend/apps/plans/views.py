@@ -2,23 +2,49 @@
 Views for plans app
 """
 
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
-from datetime import datetime, date
-
-from .models import DailyPlan, TimeBlock
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+from datetime import datetime, date, timedelta
+
+from apps.common.conditional import make_etag, not_modified, set_validators
+from apps.common.fields import FieldSelectionViewMixin
+from apps.common.idempotency import IdempotencyMixin
+from . import autosave, feed, grid, ics, slots
+from .models import DailyPlan, PlanTemplate, TimeBlock, UserCategory
+from .search import PlanSearchResults, parse_terms
 from .serializers import (
+    BrainDumpPatchSerializer,
     DailyPlanSerializer,
+    DailyPlanCompactSerializer,
+    DailyPlanGridSerializer,
     DailyPlanListSerializer,
+    DailyPlanSearchResultSerializer,
     DailyPlanUpdateSerializer,
+    ICSImportSerializer,
+    PlanTemplateSerializer,
+    PlanTemplateMaterializeSerializer,
     TimeBlockSerializer,
+    TimeBlockBulkCompleteSerializer,
     TimeBlockCreateSerializer,
+    TimeBlockGridListSerializer,
+    UserCategorySerializer,
 )
 
+MAX_RANGE_DAYS = 62  # days returned by one /daily-plans/range/ request
+CATEGORY_LIMIT = 10  # default number of autocomplete suggestions
+MAX_CATEGORY_LIMIT = 50
+
 
-class DailyPlanViewSet(viewsets.ModelViewSet):
+class DailyPlanViewSet(IdempotencyMixin, FieldSelectionViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for DailyPlan model
     Provides CRUD operations for daily plans
@@ -31,7 +57,14 @@ class DailyPlanViewSet(viewsets.ModelViewSet):
         """Return only current user's plans with prefetch"""
         queryset = DailyPlan.objects.filter(
             user=self.request.user
-        ).prefetch_related('time_blocks').order_by('-date')
+        ).order_by('-date')
+
+        # Reads load only the columns (and blocks) the response serializes;
+        # list rows read the denormalized block counters, not the blocks
+        if self.action in ('list', 'retrieve'):
+            queryset = self.read_queryset(queryset)
+        else:
+            queryset = queryset.prefetch_related('time_blocks')
 
         # Filter by date if provided
         date_param = self.request.query_params.get('date')
@@ -50,12 +83,148 @@ class DailyPlanViewSet(viewsets.ModelViewSet):
             return DailyPlanListSerializer
         elif self.action in ['update', 'partial_update']:
             return DailyPlanUpdateSerializer
+        elif self.is_grid_layout():
+            return DailyPlanGridSerializer
         return DailyPlanSerializer
 
+    def get_serializer_context(self):
+        """Add grid packing flag (?layout=grid&packed=1)"""
+        context = super().get_serializer_context()
+        context['packed'] = self.request.query_params.get('packed') in ('1', 'true')
+        return context
+
+    def is_grid_layout(self):
+        """Whether plan reads should use the columnar grid layout"""
+        return self.request.query_params.get('layout') == 'grid'
+
+    def get_read_serializer(self, compact=False):
+        """Return (serializer class, context) for read actions in the requested layout"""
+        context = self.get_serializer_context()
+        if self.is_grid_layout():
+            context['compact'] = compact
+            return DailyPlanGridSerializer, context
+        if compact:
+            return DailyPlanCompactSerializer, context
+        if self.action == 'list':
+            return DailyPlanListSerializer, context
+        return DailyPlanSerializer, context
+
+    def read_queryset(self, queryset, compact=False, required=()):
+        """
+        Project a plan queryset for a read action
+        Columns and blocks the layout and ?fields=/?omit= leave out are not loaded
+        """
+        serializer_class, context = self.get_read_serializer(compact)
+        self.validate_field_selection(serializer_class)
+
+        blocks = TimeBlock.objects.order_by('start_minute')
+        if self.is_grid_layout():
+            queryset = self.project(queryset, serializer_class, required, context=context)
+            if not self.get_field_selection().keeps('grid'):
+                return queryset
+            return queryset.prefetch_related(Prefetch('time_blocks', queryset=blocks.only(*grid.BLOCK_FIELDS)))
+        return self.project(
+            queryset,
+            serializer_class,
+            required,
+            prefetch={'time_blocks': ('time_blocks', blocks)},
+            context=context,
+        )
+
+    def serialize_plan(self, plan, compact=False):
+        """Serialize a plan for read actions in the requested layout"""
+        serializer_class, context = self.get_read_serializer(compact)
+        return serializer_class(plan, context=context).data
+
+    def get_object(self):
+        """Return the plan with any coalesced brain dump edits written first"""
+        plan = super().get_object()
+        if self.action != 'brain_dump' and autosave.flush_pending([plan.pk]):
+            plan.refresh_from_db(fields=['brain_dump', 'brain_dump_version', 'updated_at'])
+        return plan
+
+    def get_validators(self, queryset, **lookup):
+        """
+        Return (etag, last_modified) for the plan matching lookup, or None
+        Computed from one aggregate over the plan and its blocks.
+        """
+        try:
+            queryset = queryset.filter(**lookup)
+            row = queryset.freshness().first()
+        except DjangoValidationError:
+            return None
+        if row is None:
+            return None
+        if autosave.flush_pending([row['pk']]):
+            row = queryset.freshness().first()
+
+        last_modified = max(filter(None, [row['updated_at'], row['blocks_updated_at']]))
+        etag = make_etag(
+            row['pk'],
+            last_modified.isoformat(),
+            row['total_blocks'],
+            self.request.query_params.urlencode(),
+        )
+        return etag, last_modified
+
+    def retrieve(self, request, *args, **kwargs):
+        """Plan detail; answers If-None-Match / If-Modified-Since with 304"""
+        validators = self.get_validators(self.get_queryset(), pk=kwargs['pk'])
+        if validators:
+            response = not_modified(request, *validators)
+            if response is not None:
+                return response
+
+        response = super().retrieve(request, *args, **kwargs)
+        if validators:
+            set_validators(response, *validators)
+        return response
+
     def perform_create(self, serializer):
         """Create plan with current user"""
         serializer.save(user=self.request.user)
 
+    def perform_update(self, serializer):
+        """Bump brain_dump_version when the full brain dump is replaced"""
+        if 'brain_dump' not in serializer.validated_data:
+            serializer.save()
+            return
+        with autosave.overwriting(serializer.instance) as version:
+            serializer.save(brain_dump_version=version)
+
+    @action(detail=True, methods=['post'], url_path='brain-dump')
+    def brain_dump(self, request, pk=None):
+        """
+        Apply a delta to the brain dump (autosave)
+        POST /api/plans/daily-plans/{id}/brain-dump/
+        Body: {"version": 12, "ops": [{"offset": 40, "delete": 3, "insert": "abc"}], "flush": false}
+        Returns 409 with the current version and text when version is stale
+        """
+        plan = self.get_object()
+        serializer = BrainDumpPatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        applied, state = autosave.apply_patch(
+            plan,
+            serializer.validated_data['version'],
+            serializer.validated_data['ops'],
+            flush=serializer.validated_data['flush'],
+        )
+        if not applied:
+            return Response(
+                {
+                    'detail': 'Brain dump version mismatch',
+                    'version': state['version'],
+                    'brain_dump': state['text'],
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({
+            'version': state['version'],
+            'saved': not state['dirty'],
+        })
+
     @action(detail=True, methods=['post'], url_path='recalculate')
     def recalculate_completion(self, request, pk=None):
         """
@@ -70,6 +239,54 @@ class DailyPlanViewSet(viewsets.ModelViewSet):
             'detail': 'Completion rate updated'
         })
 
+    @action(detail=True, methods=['put'], url_path='blocks')
+    def blocks(self, request, pk=None):
+        """
+        Save the whole time-block grid of a plan in one request
+        PUT /api/plans/daily-plans/{id}/blocks/
+        Body: [{"period": "am", "hour": 9, "title": "...", ...}, ...]
+        Hourly slots missing from the body are deleted (minute-range blocks
+        are kept); actual_duration and is_completed of kept slots are preserved
+        """
+        plan = self.get_object()
+
+        data = request.data
+        if isinstance(data, dict):
+            data = data.get('blocks', [])
+
+        serializer = TimeBlockGridListSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        with slots.overlap_as_conflict():
+            plan.replace_time_blocks(serializer.validated_data)
+
+        plan = DailyPlan.objects.prefetch_related('time_blocks').get(pk=plan.pk)
+        return Response(DailyPlanSerializer(plan).data)
+
+    @action(detail=False, methods=['post'], url_path='import-ics', parser_classes=[MultiPartParser])
+    def import_ics(self, request):
+        """
+        Import an ICS calendar (Google Calendar, school timetables) as time blocks
+        POST /api/plans/daily-plans/import-ics/
+        Body (multipart): file=<calendar.ics>
+        Each event becomes a minute-range block on the plan of its local date;
+        events imported before (same UID) are updated or left unchanged;
+        events that cannot be imported are reported in errors
+        """
+        serializer = ICSImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with slots.overlap_as_conflict():
+            result = ics.ICSImport(request.user).run(serializer.validated_data['file'])
+
+        result['detail'] = (
+            f'{result["created_blocks"]} time block(s) imported, {result["updated_blocks"]} updated'
+        )
+        return Response(
+            result,
+            status=status.HTTP_201_CREATED if result['created_blocks'] else status.HTTP_200_OK
+        )
+
     @action(detail=False, methods=['get'], url_path='today')
     def today(self, request):
         """
@@ -77,22 +294,105 @@ class DailyPlanViewSet(viewsets.ModelViewSet):
         GET /api/plans/today/
         """
         today = date.today()
-        plan = DailyPlan.objects.filter(
+        queryset = DailyPlan.objects.filter(
             user=request.user,
             date=today
-        ).prefetch_related('time_blocks').first()
+        )
 
-        if not plan:
+        # Flushes pending brain dump edits before the validators are taken
+        validators = self.get_validators(queryset)
+        if not validators:
             return Response(
                 {'detail': 'No plan found for today'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        serializer = DailyPlanSerializer(plan)
-        return Response(serializer.data)
+        response = not_modified(request, *validators)
+        if response is not None:
+            return response
+
+        plan = self.read_queryset(queryset).first()
+        return set_validators(Response(self.serialize_plan(plan)), *validators)
+
+    @action(detail=False, methods=['get'], url_path='range')
+    def range(self, request):
+        """
+        Get every day of a date range with its plan and blocks
+        GET /api/plans/daily-plans/range/?from=2025-12-15&to=2025-12-21&compact=1
+        Days without a plan are returned with "plan": null
+        compact leaves out brain_dump and block descriptions
+        """
+        dates = {}
+        for param in ('from', 'to'):
+            value = request.query_params.get(param)
+            try:
+                dates[param] = datetime.strptime(value or '', '%Y-%m-%d').date()
+            except ValueError:
+                return Response(
+                    {'detail': f'Invalid or missing {param} date. Use YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        start_date, end_date = dates['from'], dates['to']
+        if start_date > end_date:
+            return Response(
+                {'detail': 'from must be on or before to'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (end_date - start_date).days >= MAX_RANGE_DAYS:
+            return Response(
+                {'detail': f'Range is limited to {MAX_RANGE_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        compact = request.query_params.get('compact') in ('1', 'true')
+        plans = DailyPlan.objects.filter(
+            user=request.user,
+            date__range=(start_date, end_date)
+        )
+
+        # Exactly two queries: plans, then all of their blocks
+        plans = list(self.read_queryset(plans, compact, required=('date',)))
+        if not compact and autosave.flush_pending([plan.pk for plan in plans]):
+            plans = list(self.read_queryset(
+                DailyPlan.objects.filter(pk__in=[plan.pk for plan in plans]),
+                compact,
+                required=('date',),
+            ))
+
+        by_date = {plan.date: self.serialize_plan(plan, compact=compact) for plan in plans}
+        days = []
+        day = start_date
+        while day <= end_date:
+            days.append({'date': day.isoformat(), 'plan': by_date.get(day)})
+            day += timedelta(days=1)
+
+        return Response({
+            'from': start_date.isoformat(),
+            'to': end_date.isoformat(),
+            'days': days,
+        })
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Full-text search over brain dumps and block titles/descriptions
+        GET /api/plans/daily-plans/search/?q=physics mock exam
+        Results are ranked by relevance and paginated
+        """
+        terms = parse_terms(request.query_params.get('q'))
+        if not terms:
+            return Response(
+                {'detail': 'q is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        page = self.paginate_queryset(PlanSearchResults(request.user, terms))
+        serializer = DailyPlanSearchResultSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
-class TimeBlockViewSet(viewsets.ModelViewSet):
+class TimeBlockViewSet(IdempotencyMixin, FieldSelectionViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for TimeBlock model
     Provides CRUD operations for time blocks
@@ -105,7 +405,7 @@ class TimeBlockViewSet(viewsets.ModelViewSet):
         """Return time blocks for current user's plans"""
         queryset = TimeBlock.objects.filter(
             daily_plan__user=self.request.user
-        ).select_related('daily_plan').order_by('period', 'hour')
+        ).select_related('daily_plan').order_by('start_minute')
 
         # Filter by daily_plan if provided
         plan_id = self.request.query_params.get('daily_plan')
@@ -121,8 +421,29 @@ class TimeBlockViewSet(viewsets.ModelViewSet):
             except ValueError:
                 pass
 
+        # Reads load only the block columns ?fields=/?omit= keep, not the
+        # parent plan (updated_at feeds the detail ETag)
+        if self.action in ('list', 'retrieve'):
+            self.validate_field_selection(TimeBlockSerializer)
+            required = ('updated_at',) if self.action == 'retrieve' else ()
+            queryset = self.project(queryset.select_related(None), TimeBlockSerializer, required)
+
         return queryset
 
+    def retrieve(self, request, *args, **kwargs):
+        """Time block detail; answers If-None-Match / If-Modified-Since with 304"""
+        time_block = self.get_object()
+        validators = (
+            make_etag(time_block.pk, time_block.updated_at.isoformat(), request.query_params.urlencode()),
+            time_block.updated_at,
+        )
+        response = not_modified(request, *validators)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(time_block)
+        return set_validators(Response(serializer.data), *validators)
+
     def get_serializer_class(self):
         """Return appropriate serializer"""
         if self.action == 'create':
@@ -143,7 +464,14 @@ class TimeBlockViewSet(viewsets.ModelViewSet):
             user=self.request.user
         )
 
-        serializer.save(daily_plan=daily_plan)
+        # Overlapping blocks are rejected by the database (409)
+        with slots.overlap_as_conflict():
+            serializer.save(daily_plan=daily_plan)
+
+    def perform_update(self, serializer):
+        """Update time block; overlapping another block of the plan is a 409"""
+        with slots.overlap_as_conflict():
+            serializer.save()
 
     @action(detail=True, methods=['post'], url_path='mark-completed')
     def mark_completed(self, request, pk=None):
@@ -159,6 +487,28 @@ class TimeBlockViewSet(viewsets.ModelViewSet):
             'detail': 'Time block marked as completed'
         })
 
+    @action(detail=False, methods=['post'], url_path='bulk-mark-completed')
+    def bulk_mark_completed(self, request):
+        """
+        Mark several time blocks as completed
+        POST /api/time-blocks/bulk-mark-completed/
+        Body: {"ids": ["uuid", ...]}
+        """
+        serializer = TimeBlockBulkCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        completed, plan_ids = TimeBlock.objects.filter(
+            daily_plan__user=request.user,
+            pk__in=serializer.validated_data['ids'],
+        ).mark_completed()
+
+        plans = DailyPlan.objects.filter(pk__in=plan_ids).defer('brain_dump').order_by('date')
+        return Response({
+            'completed': completed,
+            'plans': DailyPlanListSerializer(plans, many=True).data,
+            'detail': f'{completed} time block(s) marked as completed'
+        })
+
     @action(detail=True, methods=['post'], url_path='add-time')
     def add_time(self, request, pk=None):
         """
@@ -182,3 +532,129 @@ class TimeBlockViewSet(viewsets.ModelViewSet):
             'execution_rate': time_block.execution_rate,
             'detail': f'Added {minutes} minutes to actual duration'
         })
+
+
+class PlanTemplateViewSet(IdempotencyMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for PlanTemplate model
+    Provides CRUD operations for recurring plan templates
+    """
+
+    serializer_class = PlanTemplateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """Return only current user's templates with their blocks"""
+        return PlanTemplate.objects.filter(
+            user=self.request.user
+        ).prefetch_related('blocks')
+
+    def perform_create(self, serializer):
+        """Create template with current user"""
+        serializer.save(user=self.request.user)
+
+    @action(detail=True, methods=['post'], url_path='materialize')
+    def materialize(self, request, pk=None):
+        """
+        Create plans and blocks from the template for a date range
+        POST /api/plans/templates/{id}/materialize/
+        Body: {"start_date": "2025-12-22", "end_date": "2026-01-31"}
+        Days that already have a plan are skipped
+        """
+        template = self.get_object()
+        serializer = PlanTemplateMaterializeSerializer(
+            data=request.data,
+            context={'template': template}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        created, skipped = template.materialize(
+            serializer.validated_data['start_date'],
+            serializer.validated_data['end_date'],
+        )
+
+        return Response({
+            'created': created,
+            'skipped': skipped,
+            'detail': f'{len(created)} plans created'
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+class UserCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Category autocomplete from the per-user category dictionary
+    GET /api/plans/categories/?q=stu&limit=10
+    Ranked by usage count, then most recently used; never scans time_blocks
+    """
+
+    serializer_class = UserCategorySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        """Return current user's categories, filtered by prefix and limited to top-k on list"""
+        queryset = UserCategory.objects.filter(user=self.request.user)
+
+        prefix = self.request.query_params.get('q', '').strip()
+        if prefix:
+            queryset = queryset.filter(name__istartswith=prefix)
+
+        if self.action == 'list':
+            try:
+                limit = int(self.request.query_params.get('limit', CATEGORY_LIMIT))
+            except ValueError:
+                limit = CATEGORY_LIMIT
+            queryset = queryset[:max(1, min(limit, MAX_CATEGORY_LIMIT))]
+
+        return queryset
+
+
+class CalendarFeedTokenView(APIView):
+    """
+    Manage the ICS subscription URL of the current user
+    GET /api/plans/calendar-feed/ - Current feed URL (null when disabled)
+    POST /api/plans/calendar-feed/ - Issue a new URL (the old one stops working)
+    DELETE /api/plans/calendar-feed/ - Disable the feed
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def feed_url(self, request):
+        token = request.user.calendar_token
+        if not token:
+            return None
+        return request.build_absolute_uri(reverse('calendar_feed', args=[token]))
+
+    def get(self, request):
+        return Response({'url': self.feed_url(request)})
+
+    def post(self, request):
+        feed.forget_token(request.user.calendar_token)
+        request.user.rotate_calendar_token()
+        return Response({'url': self.feed_url(request)}, status=status.HTTP_201_CREATED)
+
+    def delete(self, request):
+        feed.forget_token(request.user.calendar_token)
+        request.user.disable_calendar_feed()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@require_safe
+def calendar_feed(request, token):
+    """
+    Read-only ICS feed of a user's plans for calendar apps (the token is the credential)
+    GET /calendar/<token>.ics
+    Served from the cache; If-None-Match / If-Modified-Since get 304
+    """
+    user_id = feed.user_for_token(token)
+    if user_id is None:
+        raise Http404('Unknown calendar feed')
+
+    entry = feed.get_feed(user_id)
+    response = not_modified(request, entry['etag'], entry['last_modified'])
+    if response is not None:
+        return response
+
+    response = HttpResponse(entry['body'], content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="timelock.ics"'
+    return set_validators(response, entry['etag'], entry['last_modified'])
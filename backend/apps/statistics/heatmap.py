@@ -12,6 +12,7 @@ from matplotlib.colors import LinearSegmentedColormap
 import numpy as np
 from django.db.models import Sum
 
+from apps.timers import archive
 from apps.timers.models import TimerSession
 
 
@@ -35,21 +36,22 @@ def generate_github_heatmap(user, year):
         start_date -= timedelta(days=1)
 
     # Get all timer sessions for the year
-    sessions = TimerSession.objects.filter(
-        user=user,
-        started_at__date__gte=start_date,
-        started_at__date__lte=end_date,
-        status='completed'
-    ).values('started_at__date').annotate(
+    completed = TimerSession.objects.filter(user=user, status='completed')
+    sessions = completed.started_between(start_date, end_date).values('started_at__date').annotate(
         total_seconds=Sum('elapsed_time')
     )
 
-    # Create dictionary of date -> focus_time (minutes)
-    focus_data = {}
+    # Add archived months when the range reaches into the cold archive
+    # (sessions still in the table are counted from the table only)
+    focus_seconds = archive.daily_focus_seconds(user.id, start_date, end_date, live=completed)
     for session in sessions:
         date = session['started_at__date']
-        minutes = (session['total_seconds'] or 0) // 60
-        focus_data[date] = minutes
+        focus_seconds[date] = focus_seconds.get(date, 0) + (session['total_seconds'] or 0)
+
+    # Create dictionary of date -> focus_time (minutes)
+    focus_data = {}
+    for date, seconds in focus_seconds.items():
+        focus_data[date] = seconds // 60
 
     # Create 7x52 matrix (weeks x days)
     num_weeks = 52
@@ -9,6 +9,7 @@ from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from apps.timers import archive
 from apps.timers.models import TimerSession
 from apps.plans.models import DailyPlan, TimeBlock
 from .serializers import DailyStatsSerializer, WeeklyStatsSerializer, MonthlyStatsSerializer
@@ -38,9 +39,8 @@ class DailyStatsView(APIView):
                 )
 
         # Get timer sessions for the date
-        sessions = TimerSession.objects.filter(
+        sessions = TimerSession.objects.started_on(target_date).filter(
             user=request.user,
-            started_at__date=target_date,
             status__in=['completed', 'cancelled']
         )
 
@@ -57,11 +57,15 @@ class DailyStatsView(APIView):
         total_focus_seconds = completed_sessions.aggregate(
             total=Sum('elapsed_time')
         )['total'] or 0
+        archived_seconds = archive.daily_focus_seconds(
+            request.user.id, target_date, target_date, live=completed_sessions
+        )
+        total_focus_seconds += archived_seconds.get(target_date, 0)
         total_focus_time = total_focus_seconds // 60  # Convert to minutes
 
-        # Calculate block statistics
-        total_blocks = time_blocks.count()
-        completed_blocks = time_blocks.filter(is_completed=True).count()
+        # Calculate block statistics (denormalized counters on the plan)
+        total_blocks = daily_plan.total_blocks if daily_plan else 0
+        completed_blocks = daily_plan.completed_blocks if daily_plan else 0
 
         if total_blocks > 0:
             block_completion_rate = (completed_blocks / total_blocks) * 100
@@ -153,9 +157,13 @@ class WeeklyStatsView(APIView):
             daily_plan__in=daily_plans
         )
 
-        # Calculate totals
-        total_blocks = time_blocks.count()
-        completed_blocks = time_blocks.filter(is_completed=True).count()
+        # Calculate totals (denormalized counters on the plans)
+        block_counts = daily_plans.aggregate(
+            total=Sum('total_blocks'),
+            completed=Sum('completed_blocks'),
+        )
+        total_blocks = block_counts['total'] or 0
+        completed_blocks = block_counts['completed'] or 0
 
         total_focus_time = sum(block.actual_duration or 0 for block in time_blocks)
         average_daily_focus = total_focus_time // 7 if total_focus_time > 0 else 0
@@ -167,16 +175,18 @@ class WeeklyStatsView(APIView):
         execution_rate = (actual_duration / planned_duration * 100) if planned_duration > 0 else 0
 
         # Daily breakdown
+        plans_by_date = {plan.date: plan for plan in daily_plans}
         daily_breakdown = []
         for i in range(7):
             day = start_date + timedelta(days=i)
+            day_plan = plans_by_date.get(day)
             day_blocks = time_blocks.filter(daily_plan__date=day)
             day_focus = sum(block.actual_duration or 0 for block in day_blocks)
             daily_breakdown.append({
                 'date': day.isoformat(),
                 'focus_time': day_focus,
-                'blocks': day_blocks.count(),
-                'completed_blocks': day_blocks.filter(is_completed=True).count()
+                'blocks': day_plan.total_blocks if day_plan else 0,
+                'completed_blocks': day_plan.completed_blocks if day_plan else 0
             })
 
         # Category breakdown
@@ -243,9 +253,13 @@ class MonthlyStatsView(APIView):
             daily_plan__in=daily_plans
         )
 
-        # Calculate totals
-        total_blocks = time_blocks.count()
-        completed_blocks = time_blocks.filter(is_completed=True).count()
+        # Calculate totals (denormalized counters on the plans)
+        block_counts = daily_plans.aggregate(
+            total=Sum('total_blocks'),
+            completed=Sum('completed_blocks'),
+        )
+        total_blocks = block_counts['total'] or 0
+        completed_blocks = block_counts['completed'] or 0
 
         total_focus_time = sum(block.actual_duration or 0 for block in time_blocks)
 
@@ -307,8 +321,9 @@ class MonthlyStatsView(APIView):
                     day_of_week = block.daily_plan.date.weekday()
                     day_totals[day_of_week] += block.actual_duration
 
-                    # Hour
-                    hour_totals[block.hour] += block.actual_duration
+                    # Hour (blocks off the hourly grid have no slot hour)
+                    if block.hour is not None:
+                        hour_totals[block.hour] += block.actual_duration
 
             if day_totals:
                 most_productive_day_num = max(day_totals, key=day_totals.get)
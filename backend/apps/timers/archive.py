@@ -0,0 +1,396 @@
+"""
+Cold archive for old timer sessions
+
+Finished sessions older than settings.TIMER_ARCHIVE_AFTER_DAYS are moved
+out of timer_sessions into one compressed file per user-month:
+
+    <TIMER_ARCHIVE_ROOT>/<user_id>/<YYYY-MM>.parquet     (pyarrow installed)
+    <TIMER_ARCHIVE_ROOT>/<user_id>/<YYYY-MM>.ndjson.gz   (fallback)
+
+Archived months are only needed for aggregate reads (heatmaps, totals,
+exports), so readers scan the files with memory mapping instead of
+keeping the rows in the hot table and its indexes. Daily totals are
+computed on the Arrow columns (pyarrow.compute); record readers decode
+BATCH_SIZE rows at a time, so a month is never held as Python objects.
+"""
+
+import gzip
+import json
+import mmap
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TimerSession
+from .partitions import iter_months, month_bounds, month_start
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pc = pq = None
+
+PARQUET_SUFFIX = '.parquet'
+NDJSON_SUFFIX = '.ndjson.gz'
+BATCH_SIZE = 4096  # records decoded at a time from an archive file
+
+FIELDS = (
+    'id',
+    'user_id',
+    'time_block_id',
+    'scheduled_duration',
+    'elapsed_time',
+    'status',
+    'started_at',
+    'paused_at',
+    'completed_at',
+    'created_at',
+    'updated_at',
+)
+# Only finished sessions are archived; running/paused ones stay in the table
+FINISHED_STATUSES = (TimerSession.Status.COMPLETED, TimerSession.Status.CANCELLED)
+
+DATETIME_FIELDS = ('started_at', 'paused_at', 'completed_at', 'created_at', 'updated_at')
+UUID_FIELDS = ('id', 'user_id', 'time_block_id')
+
+if pa is not None:
+    SCHEMA = pa.schema([
+        ('id', pa.string()),
+        ('user_id', pa.string()),
+        ('time_block_id', pa.string()),
+        ('scheduled_duration', pa.int32()),
+        ('elapsed_time', pa.int32()),
+        ('status', pa.string()),
+        ('started_at', pa.timestamp('us', tz='UTC')),
+        ('paused_at', pa.timestamp('us', tz='UTC')),
+        ('completed_at', pa.timestamp('us', tz='UTC')),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+        ('updated_at', pa.timestamp('us', tz='UTC')),
+    ])
+
+
+def archive_root():
+    """Root directory of the archive"""
+    return Path(settings.TIMER_ARCHIVE_ROOT)
+
+
+def archive_cutoff(days=None, now=None):
+    """
+    Return the aware datetime before which finished sessions are archived
+    The cutoff is aligned to a local month start so that a month is never
+    split between two archive runs.
+    """
+    days = settings.TIMER_ARCHIVE_AFTER_DAYS if days is None else days
+    now = now or timezone.now()
+    horizon = timezone.localtime(now).date() - timedelta(days=days)
+    return timezone.make_aware(datetime.combine(month_start(horizon), time.min))
+
+
+def _month_dir(user_id):
+    return archive_root() / str(user_id)
+
+
+def _month_stem(month):
+    return f'{month.year:04d}-{month.month:02d}'
+
+
+def find_month_file(user_id, month):
+    """Return the archive file for a user-month, or None"""
+    base = _month_dir(user_id) / _month_stem(month)
+    for suffix in (PARQUET_SUFFIX, NDJSON_SUFFIX):
+        path = base.with_name(base.name + suffix)
+        if path.exists():
+            return path
+    return None
+
+
+def archived_months(user_id, start_date=None, end_date=None):
+    """
+    Return (month, path) pairs for archived months overlapping a date range
+    A missing bound leaves that side of the range open.
+    """
+    if start_date is not None and end_date is not None:
+        found = []
+        for month in iter_months(start_date, end_date):
+            path = find_month_file(user_id, month)
+            if path is not None:
+                found.append((month, path))
+        return found
+
+    directory = _month_dir(user_id)
+    if not directory.is_dir():
+        return []
+
+    found = []
+    for path in directory.iterdir():
+        stem = path.name.split('.', 1)[0]
+        try:
+            month = datetime.strptime(stem, '%Y-%m').date()
+        except ValueError:
+            continue
+        if start_date is not None and month < month_start(start_date):
+            continue
+        if end_date is not None and month > end_date:
+            continue
+        found.append((month, path))
+    return sorted(found)
+
+
+# Serialization
+
+def _to_record(row):
+    """Normalize a values() row into plain JSON/Arrow-friendly types"""
+    record = {}
+    for field in FIELDS:
+        value = row[field]
+        if value is not None and field in UUID_FIELDS:
+            value = str(value)
+        record[field] = value
+    return record
+
+
+def _from_json(record):
+    for field in DATETIME_FIELDS:
+        if record.get(field):
+            record[field] = datetime.fromisoformat(record[field])
+    return record
+
+
+def _is_parquet(path):
+    if not Path(path).name.endswith(PARQUET_SUFFIX):
+        return False
+    if pq is None:
+        raise RuntimeError(f'pyarrow is required to read {path}')
+    return True
+
+
+def _parquet_batches(path, columns=None):
+    parquet = pq.ParquetFile(path, memory_map=True)
+    for batch in parquet.iter_batches(batch_size=BATCH_SIZE, columns=columns):
+        yield batch.to_pylist()
+
+
+def _ndjson_batches(path):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with gzip.GzipFile(fileobj=mapped, mode='rb') as stream:
+                batch = []
+                for line in stream:
+                    if line.strip():
+                        batch.append(_from_json(json.loads(line)))
+                    if len(batch) == BATCH_SIZE:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+
+
+def iter_month_batches(path, columns=None):
+    """
+    Yield the session records of an archive file in lists of up to BATCH_SIZE
+    columns limits the fields read from Parquet files (NDJSON rows are whole).
+    """
+    if _is_parquet(path):
+        return _parquet_batches(path, columns=columns)
+    return _ndjson_batches(path)
+
+
+def read_month_file(path, columns=None):
+    """Read every session record from an archive file (merging on write needs them all)"""
+    return [record for batch in iter_month_batches(path, columns=columns) for record in batch]
+
+
+def _atomic_write(path, write):
+    """Write through a temp file in the same directory, then rename"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    os.close(fd)
+    try:
+        write(tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def write_month_file(user_id, month, records):
+    """
+    Merge records into a user-month archive file
+
+    Records already present (same id) are replaced, so re-running an
+    interrupted archive job is safe.
+
+    Returns:
+        Path: the archive file that was written
+    """
+    existing_path = find_month_file(user_id, month)
+    merged = {}
+    if existing_path is not None:
+        for record in read_month_file(existing_path):
+            merged[record['id']] = record
+    for record in records:
+        merged[record['id']] = record
+    rows = sorted(merged.values(), key=lambda r: r['started_at'])
+
+    base = _month_dir(user_id) / _month_stem(month)
+    if pa is not None:
+        path = base.with_name(base.name + PARQUET_SUFFIX)
+        table = pa.Table.from_pylist(rows, schema=SCHEMA)
+        _atomic_write(path, lambda tmp: pq.write_table(table, tmp, compression='zstd'))
+    else:
+        path = base.with_name(base.name + NDJSON_SUFFIX)
+
+        def write_ndjson(tmp):
+            with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=_json_default, separators=(',', ':')))
+                    f.write('\n')
+
+        _atomic_write(path, write_ndjson)
+
+    # A month switches format if pyarrow was installed/removed in between
+    if existing_path is not None and existing_path != path:
+        existing_path.unlink()
+
+    return path
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Unserializable value: {value!r}')
+
+
+# Readers
+
+def iter_sessions(user_id, start_date=None, end_date=None):
+    """
+    Yield archived session records for a user between two local dates
+    (inclusive, either bound optional), ordered by started_at
+    """
+    for month, path in archived_months(user_id, start_date, end_date):
+        for batch in iter_month_batches(path):
+            for record in batch:
+                day = timezone.localtime(record['started_at']).date()
+                if start_date is not None and day < start_date:
+                    continue
+                if end_date is not None and day > end_date:
+                    continue
+                yield record
+
+
+def daily_focus_seconds(user_id, start_date, end_date, live=None):
+    """
+    Sum elapsed_time of archived completed sessions per local date
+
+    live is the queryset of sessions the caller also counts from
+    timer_sessions. Archived records whose id is still in it (an archive
+    run interrupted between writing the file and deleting the rows) are
+    skipped, so they are not counted twice. It is only queried for months
+    that have an archive file.
+
+    Returns:
+        dict: date -> seconds (empty if the range has no archived months)
+    """
+    totals = {}
+    for month, path in archived_months(user_id, start_date, end_date):
+        exclude = set()
+        if live is not None:
+            lower, upper = month_bounds(month)
+            exclude = {
+                str(pk) for pk in
+                live.filter(started_at__gte=lower, started_at__lt=upper).values_list('id', flat=True)
+            }
+        if _is_parquet(path):
+            month_totals = _parquet_daily_focus(path, exclude)
+        else:
+            month_totals = _ndjson_daily_focus(path, exclude)
+        for day, seconds in month_totals:
+            if start_date <= day <= end_date:
+                totals[day] = totals.get(day, 0) + seconds
+    return totals
+
+
+def _parquet_daily_focus(path, exclude=()):
+    """(local date, seconds) of completed sessions, summed on the Arrow columns"""
+    table = pq.read_table(
+        path,
+        columns=['id', 'started_at', 'elapsed_time'],
+        filters=[('status', '=', TimerSession.Status.COMPLETED)],
+        memory_map=True,
+    )
+    if exclude:
+        table = table.filter(pc.invert(pc.is_in(table['id'], value_set=pa.array(sorted(exclude), pa.string()))))
+    started_at = table['started_at'].cast(pa.timestamp('us', tz=timezone.get_current_timezone_name()))
+    days = pc.local_timestamp(started_at).cast(pa.date32())
+    seconds = pc.fill_null(table['elapsed_time'], 0)
+    sums = pa.table({'day': days, 'seconds': seconds}).group_by('day').aggregate([('seconds', 'sum')])
+    return zip(sums['day'].to_pylist(), sums['seconds_sum'].to_pylist())
+
+
+def _ndjson_daily_focus(path, exclude=()):
+    """(local date, seconds) of completed sessions, streamed record by record"""
+    totals = {}
+    for batch in _ndjson_batches(path):
+        for record in batch:
+            if record['status'] == TimerSession.Status.COMPLETED and record['id'] not in exclude:
+                day = timezone.localtime(record['started_at']).date()
+                totals[day] = totals.get(day, 0) + (record['elapsed_time'] or 0)
+    return totals.items()
+
+
+# Archival job
+
+def archive_sessions(cutoff=None, dry_run=False):
+    """
+    Move finished sessions started before cutoff into the archive
+
+    Works one user at a time: every user-month file is fully written
+    before the corresponding rows are deleted from timer_sessions.
+
+    Returns:
+        tuple: (archived session count, written month file count)
+    """
+    cutoff = cutoff or archive_cutoff()
+    finished = TimerSession.objects.filter(
+        started_at__lt=cutoff,
+        status__in=FINISHED_STATUSES,
+    )
+
+    user_ids = list(finished.order_by().values_list('user_id', flat=True).distinct())
+    archived = 0
+    files = 0
+
+    for user_id in user_ids:
+        rows = (
+            finished.filter(user_id=user_id)
+            .order_by('started_at')
+            .values(*FIELDS)
+            .iterator(chunk_size=2000)
+        )
+        archived_ids = []
+        by_month = groupby(rows, key=lambda r: month_start(timezone.localtime(r['started_at']).date()))
+        for month, month_rows in by_month:
+            records = [_to_record(row) for row in month_rows]
+            if not dry_run:
+                write_month_file(user_id, month, records)
+            archived_ids.extend(record['id'] for record in records)
+            files += 1
+
+        if not dry_run:
+            with transaction.atomic():
+                for start in range(0, len(archived_ids), 1000):
+                    TimerSession.objects.filter(id__in=archived_ids[start:start + 1000]).delete()
+        archived += len(archived_ids)
+
+    return archived, files
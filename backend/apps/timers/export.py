@@ -0,0 +1,159 @@
+"""
+Streaming export of a user's timer history (CSV / NDJSON)
+
+Rows are produced by generators over a server-side cursor so memory use
+stays constant regardless of how many sessions a user has.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from apps.plans.models import TimeBlock
+from . import archive
+from .models import TimerSession
+
+CHUNK_SIZE = 2000  # rows fetched per cursor round trip
+FLUSH_BYTES = 64 * 1024  # bytes buffered before yielding to the response
+
+COLUMNS = (
+    'id',
+    'time_block_id',
+    'time_block_title',
+    'scheduled_duration',
+    'elapsed_time',
+    'status',
+    'started_at',
+    'paused_at',
+    'completed_at',
+)
+
+DATETIME_COLUMNS = ('started_at', 'paused_at', 'completed_at')
+
+
+def _local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _live_rows(user, start_date=None, end_date=None):
+    """Rows still stored in timer_sessions"""
+    queryset = TimerSession.objects.filter(user=user)
+    if start_date is not None:
+        queryset = queryset.filter(started_at__gte=_local_midnight(start_date))
+    if end_date is not None:
+        queryset = queryset.filter(started_at__lt=_local_midnight(end_date + timedelta(days=1)))
+
+    rows = queryset.order_by('started_at').values(
+        'id',
+        'time_block_id',
+        'time_block__title',
+        'scheduled_duration',
+        'elapsed_time',
+        'status',
+        'started_at',
+        'paused_at',
+        'completed_at',
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    for row in rows:
+        row['time_block_title'] = row.pop('time_block__title')
+        yield row
+
+
+def _archived_rows(user, start_date=None, end_date=None):
+    """Rows moved to the cold archive, with block titles looked up per batch"""
+    for month, path in archive.archived_months(user.id, start_date, end_date):
+        for batch in archive.iter_month_batches(path):
+            records = []
+            for record in batch:
+                day = timezone.localtime(record['started_at']).date()
+                if start_date is not None and day < start_date:
+                    continue
+                if end_date is not None and day > end_date:
+                    continue
+                records.append(record)
+
+            block_ids = {record['time_block_id'] for record in records if record['time_block_id']}
+            titles = {}
+            if block_ids:
+                titles = {
+                    str(block_id): title
+                    for block_id, title in TimeBlock.objects.filter(id__in=block_ids).values_list('id', 'title')
+                }
+
+            for record in records:
+                yield {
+                    'id': record['id'],
+                    'time_block_id': record['time_block_id'],
+                    'time_block_title': titles.get(record['time_block_id']),
+                    'scheduled_duration': record['scheduled_duration'],
+                    'elapsed_time': record['elapsed_time'],
+                    'status': record['status'],
+                    'started_at': record['started_at'],
+                    'paused_at': record['paused_at'],
+                    'completed_at': record['completed_at'],
+                }
+
+
+def iter_rows(user, start_date=None, end_date=None):
+    """All of a user's sessions in chronological order (archive first)"""
+    yield from _archived_rows(user, start_date, end_date)
+    yield from _live_rows(user, start_date, end_date)
+
+
+def _format_value(column, value):
+    if value is None:
+        return None
+    if column in DATETIME_COLUMNS:
+        return timezone.localtime(value).isoformat()
+    if column in ('id', 'time_block_id'):
+        return str(value)
+    return value
+
+
+def iter_csv(rows):
+    """Encode rows as CSV text chunks (header first)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for row in rows:
+        writer.writerow([_format_value(column, row[column]) for column in COLUMNS])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson(rows):
+    """Encode rows as newline-delimited JSON chunks"""
+    parts = []
+    size = 0
+    for row in rows:
+        line = json.dumps(
+            {column: _format_value(column, row[column]) for column in COLUMNS},
+            ensure_ascii=False,
+            separators=(',', ':'),
+        ) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(parts).encode('utf-8')
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts).encode('utf-8')
+
+
+def gzip_stream(chunks):
+    """Compress a byte-chunk stream on the fly into a single gzip member"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
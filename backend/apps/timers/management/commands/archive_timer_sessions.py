@@ -0,0 +1,44 @@
+"""
+Move old finished timer sessions into the cold archive
+
+Usage:
+    python manage.py archive_timer_sessions
+    python manage.py archive_timer_sessions --older-than-days 730 --dry-run
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.timers import archive
+
+
+class Command(BaseCommand):
+    help = 'Archive finished timer sessions older than TIMER_ARCHIVE_AFTER_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=settings.TIMER_ARCHIVE_AFTER_DAYS,
+            help=f'Archive sessions older than this many days (default: {settings.TIMER_ARCHIVE_AFTER_DAYS})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count what would be archived without writing or deleting anything',
+        )
+
+    def handle(self, *args, **options):
+        days = options['older_than_days']
+        if days < 1:
+            raise CommandError('--older-than-days must be >= 1')
+
+        cutoff = archive.archive_cutoff(days=days)
+        archived, files = archive.archive_sessions(cutoff=cutoff, dry_run=options['dry_run'])
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {archived} sessions started before {timezone.localtime(cutoff):%Y-%m-%d} '
+            f'into {files} month files under {archive.archive_root()}'
+        ))
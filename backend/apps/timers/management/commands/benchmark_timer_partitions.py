@@ -0,0 +1,245 @@
+"""
+Benchmark date-bounded timer_sessions queries on a flat vs a partitioned table
+
+Usage:
+    python manage.py benchmark_timer_partitions
+    python manage.py benchmark_timer_partitions --users 200 --years 4 --per-day 8
+
+Generates a multi-year dataset into two temporary tables (a plain table
+with the pre-partitioning schema and a monthly range-partitioned copy),
+then times the queries issued by TimerSessionViewSet, DailyStatsView and
+the heatmap on both:
+
+    before: plain table, the old started_at__date filters
+    after:  partitioned table, the started_on/started_between ranges
+
+The SQL is compiled from the real querysets with the table name swapped.
+Everything runs in one transaction that is rolled back, so nothing is
+left in the database. PostgreSQL only.
+"""
+
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.timers import partitions
+from apps.timers.models import TimerSession
+
+FLAT_TABLE = 'bench_timer_sessions_flat'
+PARTITIONED_TABLE = 'bench_timer_sessions_part'
+
+COLUMNS = (
+    'id uuid NOT NULL, scheduled_duration integer NOT NULL, elapsed_time integer NOT NULL, '
+    'status varchar(20) NOT NULL, started_at timestamp with time zone NOT NULL, '
+    'paused_at timestamp with time zone NULL, completed_at timestamp with time zone NULL, '
+    'created_at timestamp with time zone NOT NULL, updated_at timestamp with time zone NOT NULL, '
+    'time_block_id uuid NULL, user_id uuid NOT NULL'
+)
+
+HEARTBEAT_SQL = 'UPDATE {table} SET elapsed_time = elapsed_time + 1, updated_at = now() WHERE id = %s'
+
+
+class Command(BaseCommand):
+    help = 'Compare date-bounded timer_sessions queries on a flat and a partitioned table (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Generated users (default: 100)')
+        parser.add_argument('--years', type=int, default=3, help='Years of history (default: 3)')
+        parser.add_argument('--per-day', type=int, default=6, help='Sessions per user per day (default: 6)')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per query (default: 50)')
+        parser.add_argument('--seed', type=int, default=26, help='Random seed for the sampled lookups')
+
+    def handle(self, *args, **options):
+        if not partitions.is_supported(connection):
+            raise CommandError('The benchmark needs PostgreSQL.')
+        for name in ('users', 'years', 'per_day', 'repeat'):
+            if options[name] < 1:
+                raise CommandError(f'--{name.replace("_", "-")} must be >= 1')
+
+        self.random = random.Random(options['seed'])
+        self.repeat = options['repeat']
+        last_day = timezone.localdate()
+        first_day = last_day - timedelta(days=365 * options['years'] - 1)
+        user_ids = [uuid.UUID(int=self.random.getrandbits(128), version=4) for _ in range(options['users'])]
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                self.cursor = cursor
+                started = time.perf_counter()
+                months = self.create_tables(first_day, last_day)
+                rows = self.generate(user_ids, first_day, last_day, options['per_day'])
+                self.stdout.write(
+                    f'{rows} sessions, {len(user_ids)} users, {first_day} .. {last_day}, '
+                    f'{months} monthly partitions (generated in {time.perf_counter() - started:.1f}s)\n'
+                )
+                self.run_queries(user_ids, first_day, last_day)
+            transaction.set_rollback(True)
+
+    # Dataset
+
+    def create_tables(self, first_day, last_day):
+        qn = connection.ops.quote_name
+        self.cursor.execute(f'CREATE TEMPORARY TABLE {qn(FLAT_TABLE)} ({COLUMNS}, PRIMARY KEY (id))')
+        self.cursor.execute(
+            f'CREATE TEMPORARY TABLE {qn(PARTITIONED_TABLE)} ({COLUMNS}, PRIMARY KEY (id, started_at)) '
+            f'PARTITION BY RANGE (started_at)'
+        )
+        self.cursor.execute(
+            f'CREATE TEMPORARY TABLE {qn(PARTITIONED_TABLE + "_default")} '
+            f'PARTITION OF {qn(PARTITIONED_TABLE)} DEFAULT'
+        )
+        months = 0
+        for month in partitions.iter_months(first_day, last_day):
+            lower, upper = partitions.month_bounds(month)
+            self.cursor.execute(
+                f'CREATE TEMPORARY TABLE {qn(PARTITIONED_TABLE + month.strftime("_p%Y_%m"))} '
+                f'PARTITION OF {qn(PARTITIONED_TABLE)} FOR VALUES FROM (%s) TO (%s)',
+                [lower, upper],
+            )
+            months += 1
+        for table in (FLAT_TABLE, PARTITIONED_TABLE):
+            self.cursor.execute(f'CREATE INDEX {qn(table + "_user_date")} ON {qn(table)} (user_id, started_at)')
+        return months
+
+    def generate(self, user_ids, first_day, last_day, per_day):
+        qn = connection.ops.quote_name
+        first_midnight = timezone.make_aware(datetime.combine(first_day, datetime.min.time()))
+        self.cursor.execute(
+            f'INSERT INTO {qn(FLAT_TABLE)} '
+            f'SELECT gen_random_uuid(), 1800, (random() * 1800)::int, '
+            f"  CASE WHEN random() < 0.85 THEN 'completed' ELSE 'cancelled' END, "
+            f"  started_at, NULL, started_at + interval '30 minutes', started_at, started_at, NULL, user_id "
+            f'FROM ('
+            f"  SELECT u.id AS user_id, %s::timestamptz + d.day * interval '1 day' "
+            f"    + (7 * 3600 + random() * 15 * 3600) * interval '1 second' AS started_at "
+            f'  FROM unnest(%s::uuid[]) AS u(id) '
+            f'  CROSS JOIN generate_series(0, %s) AS d(day) '
+            f'  CROSS JOIN generate_series(1, %s) AS n(slot)'
+            f') AS generated',
+            [first_midnight, [str(user_id) for user_id in user_ids], (last_day - first_day).days, per_day],
+        )
+        rows = self.cursor.rowcount
+        self.cursor.execute(f'INSERT INTO {qn(PARTITIONED_TABLE)} SELECT * FROM {qn(FLAT_TABLE)}')
+        for table in (FLAT_TABLE, PARTITIONED_TABLE):
+            self.cursor.execute(f'ANALYZE {qn(table)}')
+        self.cursor.execute(
+            f'SELECT id, started_at FROM {qn(FLAT_TABLE)} ORDER BY random() LIMIT %s', [self.repeat]
+        )
+        self.sessions = self.cursor.fetchall()
+        return rows
+
+    # Queries
+
+    def run_queries(self, user_ids, first_day, last_day):
+        def pick_user():
+            return self.random.choice(user_ids)
+
+        def pick_day():
+            return first_day + timedelta(days=self.random.randrange((last_day - first_day).days + 1))
+
+        def list_by_date(new):
+            day, sessions = pick_day(), TimerSession.objects.filter(user_id=pick_user())
+            sessions = sessions.started_on(day) if new else sessions.filter(started_at__date=day)
+            return sessions.order_by('-started_at').values('id', 'status', 'elapsed_time', 'started_at')
+
+        def daily_stats(new):
+            day = pick_day()
+            sessions = TimerSession.objects.filter(user_id=pick_user(), status='completed')
+            sessions = sessions.started_on(day) if new else sessions.filter(started_at__date=day)
+            return sessions.order_by().values('user_id').annotate(total=Sum('elapsed_time'))
+
+        def heatmap_year(new):
+            end = date(self.random.randint(first_day.year + 1, last_day.year), 12, 31)
+            start = end - timedelta(days=364)
+            sessions = TimerSession.objects.filter(user=pick_user(), status='completed')
+            if new:
+                sessions = sessions.started_between(start, end)
+            else:
+                sessions = sessions.filter(started_at__date__gte=start, started_at__date__lte=end)
+            return sessions.values('started_at__date').annotate(total_seconds=Sum('elapsed_time'))
+
+        def detail(new, hint):
+            session_id, started_at = self.random.choice(self.sessions)
+            sessions = TimerSession.objects.filter(pk=session_id)
+            if new and hint:
+                sessions = sessions.filter(started_at__gte=started_at, started_at__lt=started_at + timedelta(seconds=1))
+            return sessions.values('id', 'status', 'elapsed_time')
+
+        def heartbeat(new, hint):
+            session_id, started_at = self.random.choice(self.sessions)
+            sql, params = HEARTBEAT_SQL, [session_id]
+            if new and hint:
+                sql, params = sql + ' AND started_at = %s', [session_id, started_at]
+            return sql, params
+
+        cases = [
+            ('list ?date= (one day)', list_by_date),
+            ('daily stats (one day)', daily_stats),
+            ('heatmap (one year)', heatmap_year),
+            ('detail by id', lambda new: detail(new, hint=False)),
+            ('detail by id + started_at', lambda new: detail(new, hint=True)),
+            ('heartbeat UPDATE by id', lambda new: heartbeat(new, hint=False)),
+            ('heartbeat UPDATE + started_at', lambda new: heartbeat(new, hint=True)),
+        ]
+
+        header = f'{"query":<32}' + ''.join(
+            f'{column:>12}' for column in ('before p50', 'after p50', 'before p95', 'after p95', 'partitions')
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for label, build in cases:
+            before = self.time_query(build, new=False, table=FLAT_TABLE)
+            after = self.time_query(build, new=True, table=PARTITIONED_TABLE)
+            scanned = self.partitions_scanned(build(True), PARTITIONED_TABLE)
+            self.stdout.write(
+                f'{label:<32}{before[0]:>10.2f}ms{after[0]:>10.2f}ms'
+                f'{before[1]:>10.2f}ms{after[1]:>10.2f}ms{scanned:>12}'
+            )
+        self.stdout.write('\nbefore: plain table, started_at__date filters (and updates by id alone)')
+        self.stdout.write('after:  monthly partitions, started_on/started_between ranges')
+
+    def compile(self, query, table):
+        """SQL and params of a queryset (or an (sql, params) pair) against table"""
+        if isinstance(query, tuple):
+            sql, params = query
+            return sql.format(table=connection.ops.quote_name(table)), params
+        sql, params = query.query.sql_with_params()
+        qn = connection.ops.quote_name
+        return sql.replace(qn(TimerSession._meta.db_table), qn(table)), params
+
+    def time_query(self, build, new, table):
+        timings = []
+        for _ in range(self.repeat):
+            sql, params = self.compile(build(new), table)
+            started = time.perf_counter()
+            self.cursor.execute(sql, params)
+            if self.cursor.description is not None:
+                self.cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), statistics.quantiles(timings, n=20)[-1]
+
+    def partitions_scanned(self, query, table):
+        """Partitions left in the plan after planning-time pruning"""
+        sql, params = self.compile(query, table)
+        self.cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = self.cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        relations = set()
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            name = node.get('Relation Name', '')
+            if name.startswith(table + '_'):
+                relations.add(name)
+            nodes.extend(node.get('Plans', []))
+        return len(relations)
@@ -0,0 +1,117 @@
+"""
+Maintain monthly partitions of timer_sessions
+
+Usage:
+    python manage.py manage_timer_partitions
+    python manage.py manage_timer_partitions --months-ahead 6
+    python manage.py manage_timer_partitions --retain-months 24 --drop
+
+Run it from cron (e.g. daily) so next months' partitions always exist
+before sessions are written to them.
+
+--retain-months first moves the finished sessions of expired months into
+the cold archive (apps/timers/archive.py), so statistics keep reading
+them, and only detaches partitions left empty. A month still holding
+sessions (running or paused ones) is kept and reported.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.timers import archive, partitions
+from apps.timers.models import TimerSession
+
+
+class Command(BaseCommand):
+    help = 'Create future timer_sessions partitions and detach old ones (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Number of future months to create partitions for (default: 3)',
+        )
+        parser.add_argument(
+            '--retain-months',
+            type=int,
+            default=None,
+            help='Archive, then detach partitions older than this many months (default: keep all)',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop detached (empty) partitions instead of keeping them as standalone tables',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only print what would be done',
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_supported():
+            self.stdout.write('Partitioning requires PostgreSQL; nothing to do.')
+            return
+
+        if not partitions.is_partitioned():
+            raise CommandError('timer_sessions is not partitioned. Run "migrate timers" first.')
+
+        months_ahead = options['months_ahead']
+        retain_months = options['retain_months']
+        if months_ahead < 0:
+            raise CommandError('--months-ahead must be >= 0')
+        if retain_months is not None and retain_months < 1:
+            raise CommandError('--retain-months must be >= 1')
+
+        dry_run = options['dry_run']
+        current = partitions.month_start(timezone.localdate())
+        existing = set(partitions.list_partitions())
+
+        # Create upcoming partitions
+        last = partitions.add_months(current, months_ahead)
+        for month in partitions.iter_months(current, last):
+            if month in existing:
+                continue
+            name = partitions.partition_name(month)
+            if dry_run:
+                self.stdout.write(f'Would create {name}')
+            else:
+                partitions.create_partition(month)
+                self.stdout.write(self.style.SUCCESS(f'Created {name}'))
+
+        # Archive, then detach expired partitions
+        if retain_months is not None:
+            cutoff = partitions.add_months(current, -retain_months)
+            expired = [month for month in sorted(existing) if month < cutoff]
+            if not expired:
+                return
+
+            archived, files = archive.archive_sessions(
+                cutoff=partitions.month_bounds(cutoff)[0], dry_run=dry_run
+            )
+            verb = 'Would archive' if dry_run else 'Archived'
+            self.stdout.write(f'{verb} {archived} sessions into {files} month files')
+
+            action, done = ('drop', 'Dropped') if options['drop'] else ('detach', 'Detached')
+            for month in expired:
+                name = partitions.partition_name(month)
+                remaining = self.unarchived_sessions(month, dry_run)
+                if remaining:
+                    self.stdout.write(self.style.WARNING(
+                        f'Kept {name}: {remaining} sessions are not archived (still running or paused)'
+                    ))
+                elif dry_run:
+                    self.stdout.write(f'Would {action} {name}')
+                else:
+                    partitions.detach_partition(month, drop=options['drop'])
+                    self.stdout.write(self.style.SUCCESS(f'{done} {name}'))
+
+    def unarchived_sessions(self, month, dry_run):
+        """Sessions of a month that the archive run left (or would leave) in the table"""
+        lower, upper = partitions.month_bounds(month)
+        sessions = TimerSession.objects.filter(started_at__gte=lower, started_at__lt=upper)
+        if dry_run:
+            # Nothing was archived, so skip what the archive run would have moved
+            sessions = sessions.exclude(status__in=archive.FINISHED_STATUSES)
+        return sessions.count()
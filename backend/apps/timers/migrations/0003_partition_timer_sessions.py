@@ -0,0 +1,127 @@
+"""
+Convert timer_sessions into a monthly range-partitioned table on PostgreSQL
+
+The Django model state is unchanged: the primary key of the partitioned
+table becomes (id, started_at) because PostgreSQL requires the partition
+key in every unique constraint, while Django keeps treating id as the pk.
+Other database backends are left untouched.
+"""
+
+from django.db import migrations
+from django.utils import timezone
+
+from apps.timers import partitions
+
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    'id, scheduled_duration, elapsed_time, status, started_at, paused_at, '
+    'completed_at, created_at, updated_at, time_block_id, user_id'
+)
+
+INDEXES = (
+    ('idx_timer_user_date', 'user_id, started_at'),
+    ('idx_timer_block', 'time_block_id'),
+    ('idx_timer_status', 'status'),
+    ('idx_timer_completed', 'completed_at'),
+)
+
+
+def partition_timer_sessions(apps, schema_editor):
+    connection = schema_editor.connection
+    if not partitions.is_supported(connection) or partitions.is_partitioned(connection):
+        return
+
+    schema_editor.execute(
+        'CREATE TABLE timer_sessions_new ('
+        '  id uuid NOT NULL,'
+        '  scheduled_duration integer NOT NULL,'
+        '  elapsed_time integer NOT NULL,'
+        '  status varchar(20) NOT NULL,'
+        '  started_at timestamp with time zone NOT NULL,'
+        '  paused_at timestamp with time zone NULL,'
+        '  completed_at timestamp with time zone NULL,'
+        '  created_at timestamp with time zone NOT NULL,'
+        '  updated_at timestamp with time zone NOT NULL,'
+        '  time_block_id uuid NULL,'
+        '  user_id uuid NOT NULL,'
+        '  CONSTRAINT timer_sessions_new_pkey PRIMARY KEY (id, started_at)'
+        ') PARTITION BY RANGE (started_at)'
+    )
+    schema_editor.execute(
+        'CREATE TABLE timer_sessions_default PARTITION OF timer_sessions_new DEFAULT'
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT MIN(started_at) FROM timer_sessions')
+        oldest = cursor.fetchone()[0]
+
+    today = timezone.localdate()
+    first = timezone.localtime(oldest).date() if oldest else today
+    last = partitions.add_months(partitions.month_start(today), MONTHS_AHEAD)
+    for month in partitions.iter_months(first, last):
+        lower, upper = partitions.month_bounds(month)
+        schema_editor.execute(
+            f'CREATE TABLE {partitions.partition_name(month)} PARTITION OF timer_sessions_new '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [lower, upper],
+        )
+
+    schema_editor.execute(
+        f'INSERT INTO timer_sessions_new ({COLUMNS}) SELECT {COLUMNS} FROM timer_sessions'
+    )
+    schema_editor.execute('DROP TABLE timer_sessions')
+    schema_editor.execute('ALTER TABLE timer_sessions_new RENAME TO timer_sessions')
+    schema_editor.execute(
+        'ALTER TABLE timer_sessions RENAME CONSTRAINT timer_sessions_new_pkey TO timer_sessions_pkey'
+    )
+    schema_editor.execute(
+        'ALTER TABLE timer_sessions ADD CONSTRAINT timer_sessions_user_id_fk_users_id '
+        'FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    schema_editor.execute(
+        'ALTER TABLE timer_sessions ADD CONSTRAINT timer_sessions_time_block_id_fk_time_blocks_id '
+        'FOREIGN KEY (time_block_id) REFERENCES time_blocks (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    for name, columns in INDEXES:
+        schema_editor.execute(f'CREATE INDEX {name} ON timer_sessions ({columns})')
+
+
+def unpartition_timer_sessions(apps, schema_editor):
+    connection = schema_editor.connection
+    if not partitions.is_supported(connection) or not partitions.is_partitioned(connection):
+        return
+
+    schema_editor.execute(
+        'CREATE TABLE timer_sessions_flat (LIKE timer_sessions INCLUDING DEFAULTS)'
+    )
+    schema_editor.execute(
+        f'INSERT INTO timer_sessions_flat ({COLUMNS}) SELECT {COLUMNS} FROM timer_sessions'
+    )
+    # Dropping the parent drops every attached partition with it
+    schema_editor.execute('DROP TABLE timer_sessions')
+    schema_editor.execute('ALTER TABLE timer_sessions_flat RENAME TO timer_sessions')
+    schema_editor.execute('ALTER TABLE timer_sessions ADD PRIMARY KEY (id)')
+    schema_editor.execute(
+        'ALTER TABLE timer_sessions ADD CONSTRAINT timer_sessions_user_id_fk_users_id '
+        'FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    schema_editor.execute(
+        'ALTER TABLE timer_sessions ADD CONSTRAINT timer_sessions_time_block_id_fk_time_blocks_id '
+        'FOREIGN KEY (time_block_id) REFERENCES time_blocks (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    for name, columns in INDEXES:
+        schema_editor.execute(f'CREATE INDEX {name} ON timer_sessions ({columns})')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timers', '0002_initial'),
+        ('plans', '0002_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_timer_sessions, unpartition_timer_sessions),
+    ]
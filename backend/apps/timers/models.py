@@ -4,7 +4,9 @@ Based on database_erd.md specifications
 """
 
 import uuid
+from datetime import datetime, time, timedelta
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.contrib.auth import get_user_model
 from apps.plans.models import TimeBlock
@@ -12,6 +14,26 @@ from apps.plans.models import TimeBlock
 User = get_user_model()
 
 
+class TimerSessionQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for date-bounded session queries
+
+    Filters are expressed as half-open ranges on the raw started_at column
+    (instead of started_at__date) so PostgreSQL can prune the monthly
+    partitions of timer_sessions and use idx_timer_user_date.
+    """
+
+    def started_between(self, start_date, end_date):
+        """Sessions started between two local dates (inclusive)"""
+        lower = timezone.make_aware(datetime.combine(start_date, time.min))
+        upper = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+        return self.filter(started_at__gte=lower, started_at__lt=upper)
+
+    def started_on(self, day):
+        """Sessions started on a single local date"""
+        return self.started_between(day, day)
+
+
 class TimerSession(models.Model):
     """
     Timer session tracking
@@ -67,6 +89,8 @@ class TimerSession(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created At')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Updated At')
 
+    objects = TimerSessionQuerySet.as_manager()
+
     class Meta:
         db_table = 'timer_sessions'
         verbose_name = 'Timer Session'
@@ -94,25 +118,38 @@ class TimerSession(models.Model):
         """Calculate remaining time in seconds"""
         return max(self.scheduled_duration - self.elapsed_time, 0)
 
+    def save_fields(self, *fields):
+        """
+        Save fields (and updated_at) with an UPDATE that also filters on started_at
+
+        save(update_fields=...) updates by id alone, which makes PostgreSQL
+        probe every monthly partition of timer_sessions; the partition key
+        narrows the UPDATE to the session's own partition. started_at is
+        set on creation and never changed through these state methods.
+        """
+        self.updated_at = timezone.now()
+        values = {field: getattr(self, field) for field in (*fields, 'updated_at')}
+        type(self)._base_manager.filter(pk=self.pk, started_at=self.started_at).update(**values)
+
     def pause(self):
         """Pause the timer session"""
         from django.utils import timezone
         self.status = self.Status.PAUSED
         self.paused_at = timezone.now()
-        self.save(update_fields=['status', 'paused_at', 'updated_at'])
+        self.save_fields('status', 'paused_at')
 
     def resume(self):
         """Resume the timer session"""
         self.status = self.Status.RUNNING
         self.paused_at = None
-        self.save(update_fields=['status', 'paused_at', 'updated_at'])
+        self.save_fields('status', 'paused_at')
 
     def complete(self):
         """Mark timer session as completed"""
         from django.utils import timezone
         self.status = self.Status.COMPLETED
         self.completed_at = timezone.now()
-        self.save(update_fields=['status', 'completed_at', 'updated_at'])
+        self.save_fields('status', 'completed_at')
 
         # Update linked TimeBlock's actual_duration if exists
         if self.time_block:
@@ -122,9 +159,9 @@ class TimerSession(models.Model):
     def cancel(self):
         """Cancel the timer session"""
         self.status = self.Status.CANCELLED
-        self.save(update_fields=['status', 'updated_at'])
+        self.save_fields('status')
 
     def update_elapsed_time(self, elapsed_seconds):
         """Update elapsed time"""
         self.elapsed_time = min(elapsed_seconds, self.scheduled_duration)
-        self.save(update_fields=['elapsed_time', 'updated_at'])
+        self.save_fields('elapsed_time')
@@ -0,0 +1,178 @@
+"""
+Monthly range partitioning helpers for the timer_sessions table (PostgreSQL only)
+
+timer_sessions is declared as PARTITION BY RANGE (started_at) with one
+partition per calendar month (in settings.TIME_ZONE) plus a DEFAULT
+partition that catches rows outside of every monthly range.
+"""
+
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connection as default_connection, transaction
+
+PARENT_TABLE = 'timer_sessions'
+DEFAULT_PARTITION = 'timer_sessions_default'
+PARTITION_PREFIX = 'timer_sessions_p'
+
+
+def is_supported(connection=None):
+    """Partitioning is only available on PostgreSQL"""
+    connection = connection or default_connection
+    return connection.vendor == 'postgresql'
+
+
+def month_start(value):
+    """Return the first day of the month containing value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """Shift a month (first-day date) by count months"""
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def iter_months(first, last):
+    """Yield month starts from first to last (inclusive)"""
+    month = month_start(first)
+    last = month_start(last)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(month):
+    """timer_sessions_pYYYY_MM"""
+    return f'{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}'
+
+
+def month_bounds(month):
+    """
+    Return (lower, upper) aware datetimes for a month partition
+
+    Bounds are local midnights in settings.TIME_ZONE so that date-bounded
+    queries built with TimerSessionQuerySet.started_between() line up with
+    partition boundaries.
+    """
+    tz = ZoneInfo(settings.TIME_ZONE)
+    lower = datetime.combine(month, time.min, tzinfo=tz)
+    upper = datetime.combine(add_months(month, 1), time.min, tzinfo=tz)
+    return lower, upper
+
+
+def is_partitioned(connection=None):
+    """Check whether timer_sessions is already a partitioned table"""
+    connection = connection or default_connection
+    if not is_supported(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s)",
+            [PARENT_TABLE],
+        )
+        return cursor.fetchone()[0]
+
+
+def list_partitions(connection=None):
+    """
+    Return attached monthly partitions as a sorted list of month starts
+    The DEFAULT partition is not included
+    """
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s",
+            [PARENT_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        if not name.startswith(PARTITION_PREFIX):
+            continue
+        try:
+            year, month = name[len(PARTITION_PREFIX):].split('_')
+            months.append(date(int(year), int(month), 1))
+        except ValueError:
+            continue
+    return sorted(months)
+
+
+def create_partition(month, connection=None):
+    """
+    Create the partition for a month if it does not exist yet
+
+    Rows that already landed in the DEFAULT partition for that month are
+    moved into the new partition (PostgreSQL refuses to create a range
+    that overlaps rows held by the default partition).
+
+    Returns:
+        bool: True if a partition was created
+    """
+    connection = connection or default_connection
+    month = month_start(month)
+    if month in list_partitions(connection):
+        return False
+
+    name = partition_name(month)
+    lower, upper = month_bounds(month)
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {qn(DEFAULT_PARTITION)} '
+            f'WHERE started_at >= %s AND started_at < %s)',
+            [lower, upper],
+        )
+        has_stray_rows = cursor.fetchone()[0]
+
+        if has_stray_rows:
+            cursor.execute(
+                f'ALTER TABLE {qn(PARENT_TABLE)} DETACH PARTITION {qn(DEFAULT_PARTITION)}'
+            )
+
+        cursor.execute(
+            f'CREATE TABLE {qn(name)} PARTITION OF {qn(PARENT_TABLE)} '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [lower, upper],
+        )
+
+        if has_stray_rows:
+            cursor.execute(
+                f'INSERT INTO {qn(PARENT_TABLE)} SELECT * FROM {qn(DEFAULT_PARTITION)} '
+                f'WHERE started_at >= %s AND started_at < %s',
+                [lower, upper],
+            )
+            cursor.execute(
+                f'DELETE FROM {qn(DEFAULT_PARTITION)} '
+                f'WHERE started_at >= %s AND started_at < %s',
+                [lower, upper],
+            )
+            cursor.execute(
+                f'ALTER TABLE {qn(PARENT_TABLE)} ATTACH PARTITION {qn(DEFAULT_PARTITION)} DEFAULT'
+            )
+
+    return True
+
+
+def detach_partition(month, drop=False, connection=None):
+    """
+    Detach a monthly partition from timer_sessions
+
+    The detached table keeps its data (for archiving or manual inspection)
+    unless drop is True.
+    """
+    connection = connection or default_connection
+    name = partition_name(month_start(month))
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {qn(PARENT_TABLE)} DETACH PARTITION {qn(name)}')
+        if drop:
+            cursor.execute(f'DROP TABLE {qn(name)}')
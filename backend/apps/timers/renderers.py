@@ -0,0 +1,46 @@
+"""
+Renderers for timer session exports
+
+They let DRF content negotiation accept ?format=csv / ?format=ndjson.
+Successful exports bypass rendering with a StreamingHttpResponse, so these
+renderers only ever encode error payloads (e.g. validation errors).
+"""
+
+import csv
+import io
+import json
+
+from rest_framework import renderers
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """text/csv renderer (errors become a single "detail" column)"""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if isinstance(data, dict):
+            writer.writerow(data.keys())
+            writer.writerow(data.values())
+        else:
+            writer.writerow([data])
+        return buffer.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """application/x-ndjson renderer (errors become a single JSON line)"""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, ensure_ascii=False, default=str) + '\n').encode(self.charset)
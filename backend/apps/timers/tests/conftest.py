@@ -0,0 +1,30 @@
+"""Timer session fixtures"""
+
+from datetime import datetime
+
+import pytest
+from django.utils import timezone
+
+from apps.timers.models import TimerSession
+
+
+@pytest.fixture
+def make_session(user):
+    """Create a session of user started at a local datetime"""
+
+    def make(started_at, elapsed=1500, status=TimerSession.Status.COMPLETED, owner=None):
+        return TimerSession.objects.create(
+            user=owner or user,
+            scheduled_duration=1500,
+            elapsed_time=elapsed,
+            status=status,
+            started_at=timezone.make_aware(started_at) if isinstance(started_at, datetime) else started_at,
+        )
+
+    return make
+
+
+@pytest.fixture
+def archive_root(settings, tmp_path):
+    settings.TIMER_ARCHIVE_ROOT = str(tmp_path / 'archive')
+    return tmp_path / 'archive'
@@ -0,0 +1,90 @@
+"""Cold archive: month files are written before rows are deleted, and readers count each session once"""
+
+from datetime import date, datetime
+
+import pytest
+from django.utils import timezone
+
+from apps.timers import archive
+from apps.timers.models import TimerSession
+
+pytestmark = pytest.mark.django_db
+
+JANUARY = date(2024, 1, 1)
+CUTOFF = timezone.make_aware(datetime(2024, 2, 1))
+
+
+@pytest.fixture(params=['parquet', 'ndjson'])
+def file_format(request, monkeypatch):
+    """Archive files written as Parquet, or as NDJSON as without pyarrow"""
+    if request.param == 'ndjson':
+        monkeypatch.setattr(archive, 'pa', None)
+    return request.param
+
+
+def record(session):
+    row = TimerSession.objects.filter(pk=session.pk).values(*archive.FIELDS).get()
+    return archive._to_record(row)
+
+
+def test_archive_writes_month_files_then_deletes_rows(archive_root, make_session, user, file_format):
+    done = make_session(datetime(2024, 1, 10, 9), elapsed=1800)
+    cancelled = make_session(datetime(2024, 1, 10, 11), elapsed=300, status=TimerSession.Status.CANCELLED)
+    paused = make_session(datetime(2024, 1, 11, 9), status=TimerSession.Status.PAUSED)
+    recent = make_session(datetime(2024, 2, 2, 9))
+
+    assert archive.archive_sessions(cutoff=CUTOFF) == (2, 1)
+
+    path = archive.find_month_file(user.id, JANUARY)
+    assert path.name == f'2024-01{".parquet" if file_format == "parquet" else ".ndjson.gz"}'
+    assert {r['id'] for r in archive.read_month_file(path)} == {str(done.pk), str(cancelled.pk)}
+    # Unfinished and recent sessions stay in the table
+    assert set(TimerSession.objects.values_list('pk', flat=True)) == {paused.pk, recent.pk}
+
+
+def test_rerun_after_an_interrupted_run_merges_by_id(archive_root, make_session, user, file_format):
+    first = make_session(datetime(2024, 1, 10, 9), elapsed=1800)
+    second = make_session(datetime(2024, 1, 12, 9), elapsed=600)
+    # An earlier run wrote the file (with an older copy of `first`) and died before deleting
+    stale = {**record(first), 'elapsed_time': 1}
+    archive.write_month_file(user.id, JANUARY, [stale])
+
+    assert archive.archive_sessions(cutoff=CUTOFF) == (2, 1)
+
+    records = archive.read_month_file(archive.find_month_file(user.id, JANUARY))
+    assert sorted((r['id'], r['elapsed_time']) for r in records) == sorted(
+        [(str(first.pk), 1800), (str(second.pk), 600)]
+    )
+    assert not TimerSession.objects.exists()
+
+
+def test_daily_focus_seconds(archive_root, make_session, user, file_format):
+    make_session(datetime(2024, 1, 10, 9), elapsed=1800)
+    make_session(datetime(2024, 1, 10, 23, 30), elapsed=600)  # still the 10th in local time
+    make_session(datetime(2024, 1, 11, 9), elapsed=900)
+    make_session(datetime(2024, 1, 11, 10), elapsed=500, status=TimerSession.Status.CANCELLED)
+    archive.archive_sessions(cutoff=CUTOFF)
+
+    assert archive.daily_focus_seconds(user.id, date(2024, 1, 1), date(2024, 1, 31)) == {
+        date(2024, 1, 10): 2400,
+        date(2024, 1, 11): 900,
+    }
+    assert archive.daily_focus_seconds(user.id, date(2024, 1, 11), date(2024, 1, 11)) == {date(2024, 1, 11): 900}
+    assert archive.daily_focus_seconds(user.id, date(2023, 12, 1), date(2023, 12, 31)) == {}
+
+
+def test_daily_stats_count_sessions_in_both_places_once(archive_root, make_session, user, api_client, file_format):
+    archived = make_session(datetime(2024, 1, 10, 9), elapsed=1800)
+    live = make_session(datetime(2024, 1, 10, 14), elapsed=1200)
+    # Interrupted run: both written, only one deleted so far
+    archive.write_month_file(user.id, JANUARY, [record(archived), record(live)])
+    archived.delete()
+
+    response = api_client.get('/api/stats/daily/', {'date': '2024-01-10'})
+
+    assert response.status_code == 200
+    assert response.json()['total_focus_time'] == (1800 + 1200) // 60
+    completed = TimerSession.objects.filter(user=user, status=TimerSession.Status.COMPLETED)
+    assert archive.daily_focus_seconds(user.id, date(2024, 1, 1), date(2024, 1, 31), live=completed) == {
+        date(2024, 1, 10): 1800
+    }
@@ -0,0 +1,95 @@
+"""Timer history export: CSV and NDJSON, gzip, date filters and user scoping"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+from django.utils import timezone
+
+from apps.plans.models import DailyPlan, TimeBlock
+from apps.timers import archive
+from apps.timers.export import COLUMNS
+
+pytestmark = pytest.mark.django_db
+
+EXPORT_URL = '/api/timer/sessions/export/'
+
+
+def download(api_client, **params):
+    response = api_client.get(EXPORT_URL, params)
+    assert response.status_code == 200
+    return response, b''.join(response.streaming_content)
+
+
+@pytest.fixture
+def sessions(make_session, user, django_user_model):
+    """Three sessions of user on March 1-3 (the first one on a block) and one of another user"""
+    plan = DailyPlan.objects.create(user=user, date=date(2025, 3, 1))
+    block = TimeBlock.objects.create(daily_plan=plan, period='am', hour=9, title='Essay')
+    first = make_session(datetime(2025, 3, 1, 9), elapsed=1200)
+    first.time_block = block
+    first.save()
+    second = make_session(datetime(2025, 3, 2, 9))
+    third = make_session(datetime(2025, 3, 3, 9))
+
+    other = django_user_model.objects.create_user(email='other@example.com', username='other')
+    make_session(datetime(2025, 3, 2, 10), owner=other)
+    return [first, second, third]
+
+
+def test_csv_export(api_client, sessions):
+    response, body = download(api_client, format='csv')
+
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    assert response['Content-Disposition'].startswith('attachment; filename="timer-sessions-')
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    assert tuple(rows[0]) == COLUMNS
+    # Other users' sessions are never exported
+    assert [row['id'] for row in rows] == [str(session.pk) for session in sessions]
+    assert rows[0]['time_block_title'] == 'Essay'
+    assert rows[0]['elapsed_time'] == '1200'
+    assert rows[0]['started_at'] == '2025-03-01T09:00:00+09:00'
+    assert rows[1]['time_block_id'] == rows[1]['paused_at'] == ''
+
+
+def test_ndjson_export_includes_archived_sessions(api_client, sessions, archive_root):
+    archive.archive_sessions(cutoff=timezone.make_aware(datetime(2025, 3, 2)))
+
+    response, body = download(api_client, format='ndjson')
+
+    assert response['Content-Type'] == 'application/x-ndjson; charset=utf-8'
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert [line['id'] for line in lines] == [str(session.pk) for session in sessions]
+    assert lines[0]['time_block_title'] == 'Essay'
+    assert lines[1]['time_block_id'] is None
+
+
+def test_gzip_export(api_client, sessions):
+    response, body = download(api_client, format='ndjson', compress='gzip')
+
+    assert response['Content-Type'] == 'application/gzip'
+    assert response['Content-Disposition'].endswith('.ndjson.gz"')
+    assert len(gzip.decompress(body).decode().splitlines()) == 3
+
+
+def test_date_filters(api_client, sessions):
+    _, body = download(api_client, format='ndjson', **{'from': '2025-03-02', 'to': '2025-03-02'})
+    assert [json.loads(line)['id'] for line in body.decode().splitlines()] == [str(sessions[1].pk)]
+
+    _, body = download(api_client, format='ndjson', **{'from': '2025-03-03'})
+    assert [json.loads(line)['id'] for line in body.decode().splitlines()] == [str(sessions[2].pk)]
+
+
+@pytest.mark.parametrize('params', [
+    {'from': '2025-13-01'},
+    {'from': '2025-03-03', 'to': '2025-03-01'},
+    {'compress': 'zip'},
+])
+def test_invalid_parameters_are_rejected(api_client, params):
+    response = api_client.get(EXPORT_URL, {'format': 'csv', **params})
+
+    assert response.status_code == 400
+    assert response.content.decode().startswith('detail')
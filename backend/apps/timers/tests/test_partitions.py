@@ -0,0 +1,87 @@
+"""Monthly partitions of timer_sessions on PostgreSQL: pruning and manage_timer_partitions"""
+
+from datetime import date, datetime, time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from apps.timers import archive, partitions
+from apps.timers.models import TimerSession
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(connection.vendor != 'postgresql', reason='timer_sessions is partitioned on PostgreSQL only'),
+]
+
+JANUARY, FEBRUARY = date(2024, 1, 1), date(2024, 2, 1)
+
+
+def scanned(queryset):
+    """Names of the timer_sessions partitions in the query plan"""
+    plan = queryset.explain()
+    return {
+        name for name in
+        [partitions.partition_name(month) for month in partitions.list_partitions()] + [partitions.DEFAULT_PARTITION]
+        if name in plan
+    }
+
+
+def test_started_between_prunes_to_the_months_it_covers(make_session, user):
+    for month in (JANUARY, FEBRUARY):
+        partitions.create_partition(month)
+    make_session(datetime(2024, 1, 31, 23, 30))
+
+    sessions = TimerSession.objects.filter(user=user)
+
+    assert scanned(sessions.started_between(date(2024, 1, 10), date(2024, 1, 31))) == {'timer_sessions_p2024_01'}
+    # Month bounds are local midnights: the last local day of January stays in January
+    assert sessions.started_on(date(2024, 1, 31)).count() == 1
+    assert scanned(sessions.started_between(date(2024, 1, 31), date(2024, 2, 1))) == {
+        'timer_sessions_p2024_01', 'timer_sessions_p2024_02',
+    }
+    # Unbounded queries scan every partition
+    assert partitions.DEFAULT_PARTITION in scanned(sessions)
+
+
+def test_command_creates_upcoming_partitions():
+    current = partitions.month_start(timezone.localdate())
+    out = StringIO()
+
+    call_command('manage_timer_partitions', months_ahead=5, stdout=out)
+
+    upcoming = list(partitions.iter_months(current, partitions.add_months(current, 5)))
+    assert set(upcoming) <= set(partitions.list_partitions())
+    assert f'Created {partitions.partition_name(upcoming[-1])}' in out.getvalue()
+
+    # A second run has nothing to create
+    out = StringIO()
+    call_command('manage_timer_partitions', months_ahead=5, stdout=out)
+    assert 'Created' not in out.getvalue()
+
+
+def test_command_archives_then_detaches_expired_months(archive_root, make_session, user):
+    current = partitions.month_start(timezone.localdate())
+    finished, busy = partitions.add_months(current, -5), partitions.add_months(current, -4)
+    for month in (finished, busy):
+        partitions.create_partition(month)
+    done = make_session(datetime.combine(finished.replace(day=10), time(9)), elapsed=1800)
+    make_session(datetime.combine(busy.replace(day=10), time(9)), status=TimerSession.Status.PAUSED)
+    out = StringIO()
+
+    call_command('manage_timer_partitions', retain_months=3, stdout=out)
+
+    # The finished month was archived, then detached (kept as a standalone table)
+    assert finished not in partitions.list_partitions()
+    assert [r['id'] for r in archive.read_month_file(archive.find_month_file(user.id, finished))] == [str(done.pk)]
+    assert f'Detached {partitions.partition_name(finished)}' in out.getvalue()
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {partitions.partition_name(finished)}')
+        assert cursor.fetchone()[0] == 0
+
+    # The month with a paused session stays attached
+    assert busy in partitions.list_partitions()
+    assert TimerSession.objects.filter(user=user).count() == 1
+    assert f'Kept {partitions.partition_name(busy)}: 1 sessions are not archived' in out.getvalue()
@@ -5,9 +5,15 @@ Views for timers app
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from datetime import datetime
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import datetime, timedelta
 
+from apps.common.idempotency import IdempotencyMixin
+from . import export
 from .models import TimerSession
+from .renderers import CSVRenderer, NDJSONRenderer
 from .serializers import (
     TimerSessionSerializer,
     TimerSessionCreateSerializer,
@@ -16,7 +22,7 @@ from .serializers import (
 )
 
 
-class TimerSessionViewSet(viewsets.ModelViewSet):
+class TimerSessionViewSet(IdempotencyMixin, viewsets.ModelViewSet):
     """
     ViewSet for TimerSession model
     Provides CRUD operations for timer sessions
@@ -24,11 +30,13 @@ class TimerSessionViewSet(viewsets.ModelViewSet):
 
     serializer_class = TimerSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Heartbeats only need the user id: take it from the token claims (no user lookup)
+    trusted_claims_actions = ('update_elapsed',)
 
     def get_queryset(self):
         """Return only current user's timer sessions"""
         queryset = TimerSession.objects.filter(
-            user=self.request.user
+            user_id=self.request.user.pk
         ).select_related('time_block', 'time_block__daily_plan').order_by('-started_at')
 
         # Filter by status if provided
@@ -41,7 +49,7 @@ class TimerSessionViewSet(viewsets.ModelViewSet):
         if date_param:
             try:
                 filter_date = datetime.strptime(date_param, '%Y-%m-%d').date()
-                queryset = queryset.filter(started_at__date=filter_date)
+                queryset = queryset.started_on(filter_date)
             except ValueError:
                 pass
 
@@ -50,6 +58,24 @@ class TimerSessionViewSet(viewsets.ModelViewSet):
         if time_block_id:
             queryset = queryset.filter(time_block_id=time_block_id)
 
+        # Detail routes: the session's started_at (as returned by this API)
+        # narrows the id lookup to one monthly partition on PostgreSQL
+        started_at_param = self.request.query_params.get('started_at')
+        if self.detail and started_at_param:
+            try:
+                # An unencoded '+' in the UTC offset arrives as a space
+                started_at = parse_datetime(started_at_param.replace(' ', '+'))
+            except ValueError:
+                started_at = None
+            if started_at is not None:
+                if timezone.is_naive(started_at):
+                    started_at = timezone.make_aware(started_at)
+                # Responses carry whole seconds
+                queryset = queryset.filter(
+                    started_at__gte=started_at,
+                    started_at__lt=started_at + timedelta(seconds=1),
+                )
+
         return queryset
 
     def get_serializer_class(self):
@@ -194,7 +220,60 @@ class TimerSessionViewSet(viewsets.ModelViewSet):
         """
         from datetime import date
 
-        today_sessions = self.get_queryset().filter(started_at__date=date.today())
+        today_sessions = self.get_queryset().started_on(date.today())
 
         serializer = TimerSessionListSerializer(today_sessions, many=True)
         return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='export',
+            renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        Stream the user's full timer history as a file
+        GET /api/timer/sessions/export/?format=csv|ndjson
+        Query: from=YYYY-MM-DD, to=YYYY-MM-DD, compress=gzip
+        """
+        dates = {}
+        for param in ('from', 'to'):
+            value = request.query_params.get(param)
+            if not value:
+                dates[param] = None
+                continue
+            try:
+                dates[param] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                return Response(
+                    {'detail': f'Invalid {param} date. Use YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        if dates['from'] and dates['to'] and dates['from'] > dates['to']:
+            return Response(
+                {'detail': 'from must be on or before to'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        compress = request.query_params.get('compress')
+        if compress not in (None, '', 'gzip'):
+            return Response(
+                {'detail': 'Unsupported compress value. Use gzip'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        renderer = request.accepted_renderer
+        rows = export.iter_rows(request.user, dates['from'], dates['to'])
+        if renderer.format == 'ndjson':
+            chunks = export.iter_ndjson(rows)
+        else:
+            chunks = export.iter_csv(rows)
+
+        filename = f'timer-sessions-{timezone.localdate():%Y%m%d}.{renderer.format}'
+        content_type = f'{renderer.media_type}; charset=utf-8'
+        if compress == 'gzip':
+            chunks = export.gzip_stream(chunks)
+            filename += '.gz'
+            content_type = 'application/gzip'
+
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
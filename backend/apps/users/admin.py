@@ -19,13 +19,13 @@ class UserAdmin(BaseUserAdmin):
     fieldsets = (
         (None, {'fields': ('email', 'username', 'password')}),
         ('OAuth', {'fields': ('oauth_provider', 'oauth_id', 'profile_image')}),
-        ('Preferences', {'fields': ('timezone',)}),
+        ('Preferences', {'fields': ('timezone', 'auto_rollover', 'last_rollover_on')}),
         ('Premium', {'fields': ('is_premium', 'premium_expires_at')}),
         ('Permissions', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
 
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('last_rollover_on', 'created_at', 'updated_at')
 
     add_fieldsets = (
         (None, {
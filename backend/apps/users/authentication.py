@@ -0,0 +1,63 @@
+"""
+JWT authentication without a users query per request
+
+simplejwt's JWTAuthentication loads the user with one SELECT on every
+request. CachedJWTAuthentication resolves it through apps/users/cache.py
+instead (per-process LRU, then the shared cache), with the same checks.
+
+Hot endpoints that only need the user id can skip the lookup altogether by
+listing their actions in trusted_claims_actions; request.user is then a
+simplejwt TokenUser built from the signed token claims. The token was
+issued to an active user and expires after ACCESS_TOKEN_LIFETIME, which is
+how long a deactivated user can keep using those actions.
+"""
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import cache as user_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication resolving users from the cache"""
+
+    trust_claims = False
+
+    def authenticate(self, request):
+        # Authenticators are instantiated per request, so this flag is request-scoped
+        view = (request.parser_context or {}).get('view')
+        self.trust_claims = getattr(view, 'action', None) in getattr(view, 'trusted_claims_actions', ())
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.trust_claims:
+            return TokenUser(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        try:
+            user = user_cache.get_user(user_id, self.load_user)
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
+
+    def load_user(self, user_id):
+        """One query for the user and the preferences UserSerializer nests"""
+        return self.user_model.objects.select_related('notification_preferences').get(
+            **{api_settings.USER_ID_FIELD: user_id}
+        )
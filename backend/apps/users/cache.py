@@ -0,0 +1,107 @@
+"""
+Cache of authenticated users (see authentication.CachedJWTAuthentication)
+
+Users are cached pickled, with their notification preferences, in two layers:
+
+    1. a per-process LRU (AUTH_USER_LOCAL_TTL, a few seconds)
+    2. the shared Django cache (AUTH_USER_CACHE_TTL)
+
+Each user has a random version in the shared cache, and a shared entry is
+only served while it carries the current version. User and
+NotificationPreferences saves give the user a new version on commit and
+evict the local entry, so the writing process sees the change right away
+and other processes within AUTH_USER_LOCAL_TTL. A version read before the
+database keeps a load that races a write from caching the old row.
+"""
+
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _entry_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def _version_key(user_id):
+    return f'auth_user_version:{user_id}'
+
+
+class LocalUserCache:
+    """Thread-safe per-process LRU of pickled users with a short TTL"""
+
+    def __init__(self):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, data = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return data
+
+    def set(self, user_id, data):
+        key = str(user_id)
+        with self._lock:
+            self._items[key] = (time.monotonic() + settings.AUTH_USER_LOCAL_TTL, data)
+            self._items.move_to_end(key)
+            while len(self._items) > settings.AUTH_USER_LOCAL_SIZE:
+                self._items.popitem(last=False)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._items.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+local_users = LocalUserCache()
+
+
+def get_user(user_id, load):
+    """
+    User with this id from the cache, or load(user_id) (then cached)
+
+    Every call returns a fresh unpickled instance, so callers may change it.
+    Raises whatever load raises (e.g. User.DoesNotExist), uncached.
+    """
+    data = local_users.get(user_id)
+    if data is None:
+        cached = cache.get_many([_entry_key(user_id), _version_key(user_id)])
+        version = cached.get(_version_key(user_id))
+        entry = cached.get(_entry_key(user_id))
+        if entry is not None and version is not None and entry[0] == version:
+            data = entry[1]
+        else:
+            if version is None:
+                cache.add(_version_key(user_id), uuid.uuid4().hex, None)
+                version = cache.get(_version_key(user_id))
+            data = pickle.dumps(load(user_id), pickle.HIGHEST_PROTOCOL)
+            cache.set(_entry_key(user_id), (version, data), settings.AUTH_USER_CACHE_TTL)
+        local_users.set(user_id, data)
+    return pickle.loads(data)
+
+
+def invalidate_user(user_id):
+    """Stop serving the cached copy of a user once the current transaction commits"""
+
+    def invalidate():
+        cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+        local_users.delete(user_id)
+
+    transaction.on_commit(invalidate)
@@ -0,0 +1,201 @@
+"""
+Load-test the Kakao login endpoint and its effect on other requests
+
+Usage:
+    export DJANGO_SETTINGS_MODULE=config.settings.development  # wsgi/asgi default to production (HTTPS only)
+    python manage.py serve_oauth_stub --delay 1 &
+
+    # sync views
+    KAKAO_USER_INFO_URL=http://127.0.0.1:8765/v2/user/me \
+    gunicorn config.wsgi -k gthread --workers 1 --threads 8 &
+    python manage.py loadtest_oauth_login --url http://127.0.0.1:8000 --logins 100
+
+    # async views (ASYNC_OAUTH_LOGIN)
+    ASYNC_OAUTH_LOGIN=True DB_CONN_MAX_AGE=0 KAKAO_USER_INFO_URL=http://127.0.0.1:8765/v2/user/me \
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker --workers 1 &
+    python manage.py loadtest_oauth_login --url http://127.0.0.1:8000 --logins 100
+
+Sends --logins Kakao logins at once (at most --concurrency in flight)
+while a user with a running timer sends a heartbeat (update-elapsed) every
+--heartbeat-interval seconds. Prints login throughput and the p50/p99
+latency of logins and heartbeats. On PostgreSQL it also prints the peak
+number of connections to the database.
+
+The heartbeat user is created in this settings module's database, and
+every user the run created is deleted afterwards. Run it against the
+database the server under test uses. Never point it at production.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.timers.models import TimerSession
+
+from .serve_oauth_stub import EMAIL_DOMAIN
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+User = get_user_model()
+
+KAKAO_LOGIN_PATH = '/api/auth/kakao/'
+HEARTBEAT_PATH = '/api/timer/sessions/{id}/update-elapsed/'
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+class Command(BaseCommand):
+    help = 'Send a burst of Kakao logins (against serve_oauth_stub) and time logins and timer heartbeats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server under test')
+        parser.add_argument('--logins', type=int, default=100, help='Logins to send (default: 100)')
+        parser.add_argument(
+            '--concurrency', type=int, default=None, help='Logins in flight at once (default: all of them)'
+        )
+        parser.add_argument(
+            '--heartbeat-interval', type=float, default=0.2, help='Seconds between heartbeats (default: 0.2)'
+        )
+        parser.add_argument('--timeout', type=float, default=120, help='Per-request timeout in seconds')
+
+    def handle(self, *args, **options):
+        if httpx is None:
+            raise CommandError('The load test needs httpx (pip install httpx).')
+        if options['logins'] < 1:
+            raise CommandError('--logins must be >= 1')
+        concurrency = options['concurrency'] or options['logins']
+        if concurrency < 1 or options['heartbeat_interval'] <= 0:
+            raise CommandError('--concurrency and --heartbeat-interval must be positive')
+
+        run = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(email=f'heartbeat-{run}@{EMAIL_DOMAIN}', username='loadtest')
+        session = TimerSession.objects.create(
+            user=user, scheduled_duration=3600, status=TimerSession.Status.RUNNING, started_at=timezone.now()
+        )
+        access = str(RefreshToken.for_user(user).access_token)
+
+        # A log line per query and per request would slow the driver down
+        loggers = [logging.getLogger(name) for name in ('django.db.backends', 'httpx', 'httpcore')]
+        levels = [logger.level for logger in loggers]
+        sampler = ConnectionSampler() if connection.vendor == 'postgresql' else None
+        try:
+            for logger in loggers:
+                logger.setLevel(logging.WARNING)
+            if sampler:
+                sampler.start()
+            result = asyncio.run(self.drive(options, concurrency, run, session.pk, access))
+        finally:
+            if sampler:
+                sampler.stop()
+            deleted, _ = User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+            for logger, level in zip(loggers, levels):
+                logger.setLevel(level)
+
+        self.report(options, concurrency, result, sampler)
+        self.stdout.write(f'\nDeleted {deleted} rows created by the run (users @{EMAIL_DOMAIN} and their data)')
+
+    async def drive(self, options, concurrency, run, session_id, access):
+        url = options['url'].rstrip('/')
+        timeout = httpx.Timeout(options['timeout'])
+        logins_done = asyncio.Event()
+        gate = asyncio.Semaphore(concurrency)
+        logins, heartbeats, statuses = [], [], {}
+
+        async def login(client, index):
+            async with gate:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        KAKAO_LOGIN_PATH, json={'access_token': f'loadtest-{run}-{index}'}
+                    )
+                    code = response.status_code
+                except httpx.HTTPError as exc:
+                    code = type(exc).__name__
+                logins.append(time.perf_counter() - started)
+                statuses[code] = statuses.get(code, 0) + 1
+
+        async def heartbeat_loop(client):
+            path = HEARTBEAT_PATH.format(id=session_id)
+            elapsed = 0
+            while not logins_done.is_set():
+                elapsed += 1
+                started = time.perf_counter()
+                try:
+                    await client.post(path, json={'elapsed_seconds': elapsed})
+                except httpx.HTTPError:
+                    pass
+                heartbeats.append(time.perf_counter() - started)
+                try:
+                    await asyncio.wait_for(logins_done.wait(), options['heartbeat_interval'])
+                except asyncio.TimeoutError:
+                    pass
+
+        login_limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=login_limits) as login_client, \
+                httpx.AsyncClient(base_url=url, timeout=timeout, headers={'Authorization': f'Bearer {access}'}) \
+                as heartbeat_client:
+            beats = asyncio.create_task(heartbeat_loop(heartbeat_client))
+            started = time.perf_counter()
+            await asyncio.gather(*(login(login_client, index) for index in range(options['logins'])))
+            wall = time.perf_counter() - started
+            logins_done.set()
+            await beats
+
+        return {'wall': wall, 'logins': logins, 'heartbeats': heartbeats, 'statuses': statuses}
+
+    def report(self, options, concurrency, result, sampler):
+        wall, logins, heartbeats = result['wall'], result['logins'], result['heartbeats']
+        statuses = ', '.join(f'{code}: {count}' for code, count in sorted(result['statuses'].items(), key=str))
+        self.stdout.write(
+            f'{len(logins)} logins ({concurrency} in flight) against {options["url"]}: '
+            f'{wall:.1f}s, {len(logins) / wall:.1f} logins/s [{statuses}]'
+        )
+        for label, timings in (('login', logins), ('heartbeat', heartbeats)):
+            if timings:
+                self.stdout.write(
+                    f'{label:<10} n={len(timings):<5} p50 {percentile(timings, 0.5) * 1000:>8.0f}ms'
+                    f'  p99 {percentile(timings, 0.99) * 1000:>8.0f}ms  max {max(timings) * 1000:>8.0f}ms'
+                )
+        if sampler:
+            self.stdout.write(f'peak DB connections: {sampler.peak}')
+
+
+class ConnectionSampler(threading.Thread):
+    """Samples the number of connections to the current PostgreSQL database"""
+
+    def __init__(self, interval=0.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            with connections['default'].cursor() as cursor:
+                while not self.stopped.is_set():
+                    cursor.execute(
+                        'SELECT count(*) - 1 FROM pg_stat_activity WHERE datname = current_database()'
+                    )
+                    self.peak = max(self.peak, cursor.fetchone()[0])
+                    self.stopped.wait(self.interval)
+        finally:
+            connections['default'].close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
@@ -0,0 +1,91 @@
+"""
+Stand-in Kakao profile endpoint for login load tests
+
+Usage:
+    python manage.py serve_oauth_stub
+    python manage.py serve_oauth_stub --port 8765 --delay 1.5
+
+Answers GET /v2/user/me after --delay seconds with a profile derived from
+the bearer token (same token, same user), so every token of a load test
+run logs in its own user. Point the server under test at it with
+
+    KAKAO_USER_INFO_URL=http://127.0.0.1:8765/v2/user/me
+
+and drive it with loadtest_oauth_login. Plain HTTP on localhost only.
+"""
+
+import hashlib
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILE_PATH = '/v2/user/me'
+EMAIL_DOMAIN = 'loadtest.example.com'  # every stub user's email; loadtest_oauth_login deletes them
+
+
+def profile(access_token):
+    """Kakao profile response of a token"""
+    kakao_id = int(hashlib.sha256(access_token.encode()).hexdigest()[:12], 16)
+    return {
+        'id': kakao_id,
+        'kakao_account': {
+            'email': f'kakao-{kakao_id}@{EMAIL_DOMAIN}',
+            'profile': {'nickname': f'loadtest {kakao_id}'},
+        },
+    }
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # a whole burst of logins connects at once
+
+
+class Command(BaseCommand):
+    help = 'Serve a stand-in Kakao profile endpoint with a fixed delay (login load tests)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765, help='Port on 127.0.0.1 (default: 8765)')
+        parser.add_argument(
+            '--delay', type=float, default=1.0, help='Seconds before each profile response (default: 1.0)'
+        )
+
+    def handle(self, *args, **options):
+        delay = options['delay']
+        if delay < 0:
+            raise CommandError('--delay must be >= 0')
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                token = self.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+                if self.path != PROFILE_PATH or not token:
+                    self.reply(401, {'msg': 'this access token does not exist'})
+                    return
+                time.sleep(delay)
+                self.reply(200, profile(token))
+
+            def reply(self, code, body):
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(code)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the server under test timed out
+
+            def log_message(self, *args):
+                pass
+
+        server = StubServer(('127.0.0.1', options['port']), Handler)
+        self.stdout.write(
+            f'Kakao stub on http://127.0.0.1:{options["port"]}{PROFILE_PATH} ({delay}s per profile), Ctrl+C to stop'
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
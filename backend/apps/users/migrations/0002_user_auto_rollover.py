@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='auto_rollover',
+            field=models.BooleanField(default=False, help_text="Copy yesterday's unfinished time blocks into today after local midnight", verbose_name='Roll Over Unfinished Blocks'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_rollover_on',
+            field=models.DateField(blank=True, null=True, verbose_name='Last Rollover Date'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('auto_rollover', True)), fields=['timezone', 'id'], name='idx_user_rollover'),
+        ),
+    ]
@@ -3,11 +3,14 @@ User and NotificationPreferences models for TIME BLOCK
 Based on database_erd.md specifications
 """
 
+import secrets
 import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
 
+from .cache import invalidate_user
+
 
 class UserManager(BaseUserManager):
     """Custom user manager for email-based authentication"""
@@ -67,6 +70,18 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     # User preferences
     timezone = models.CharField(max_length=50, default='Asia/Seoul', verbose_name='Timezone')
+    auto_rollover = models.BooleanField(
+        default=False,
+        verbose_name='Roll Over Unfinished Blocks',
+        help_text="Copy yesterday's unfinished time blocks into today after local midnight"
+    )
+    last_rollover_on = models.DateField(null=True, blank=True, verbose_name='Last Rollover Date')
+
+    # Secret of the read-only ICS subscription URL (/calendar/<token>.ics); NULL = disabled
+    calendar_token = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False,
+        verbose_name='Calendar Feed Token'
+    )
 
     # Premium subscription
     is_premium = models.BooleanField(default=False, verbose_name='Premium Member')
@@ -95,6 +110,11 @@ class User(AbstractBaseUser, PermissionsMixin):
             models.Index(fields=['email'], name='idx_user_email'),
             models.Index(fields=['oauth_provider', 'oauth_id'], name='idx_user_oauth'),
             models.Index(fields=['is_premium', 'premium_expires_at'], name='idx_user_premium'),
+            models.Index(
+                fields=['timezone', 'id'],
+                condition=models.Q(auto_rollover=True),
+                name='idx_user_rollover'
+            ),
         ]
         constraints = [
             # Ensure oauth_id is unique per provider
@@ -114,6 +134,28 @@ class User(AbstractBaseUser, PermissionsMixin):
     def get_short_name(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        """Save and stop authentication from serving the cached copy"""
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            invalidate_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        invalidate_user(self.pk)
+        return super().delete(*args, **kwargs)
+
+    def rotate_calendar_token(self):
+        """Issue a new calendar feed token; the previous feed URL stops working"""
+        self.calendar_token = secrets.token_urlsafe(32)
+        self.save(update_fields=['calendar_token', 'updated_at'])
+        return self.calendar_token
+
+    def disable_calendar_feed(self):
+        """Revoke the calendar feed token"""
+        self.calendar_token = None
+        self.save(update_fields=['calendar_token', 'updated_at'])
+
     @property
     def is_oauth_user(self):
         """Check if user registered via OAuth"""
@@ -172,6 +214,15 @@ class NotificationPreferences(models.Model):
     def __str__(self):
         return f'Notification Preferences for {self.user.email}'
 
+    def save(self, *args, **kwargs):
+        """Save; the cached user carries these preferences"""
+        super().save(*args, **kwargs)
+        invalidate_user(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        invalidate_user(self.user_id)
+        return super().delete(*args, **kwargs)
+
     def get_default_flash_pattern(self):
         """Return default flash pattern if not set"""
         return self.flash_pattern or {
@@ -1,18 +1,349 @@
 """
 OAuth 2.0 authentication helpers for Google and Kakao
+
+Provider calls share one pooled requests.Session (keep-alive), so a login
+does not pay a new TCP/TLS handshake. Google's ID token signing certs are
+cached in memory for the max-age Google sends with them (GoogleCertCache).
+Kakao profile lookups have short connect/read timeouts, go through a
+CircuitBreaker, and are cached per access token for a minute.
+
+The a-prefixed variants (averify_token, ...) serve the async login views
+(settings.ASYNC_OAUTH_LOGIN) with httpx instead of requests.
 """
 
+import asyncio
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+import weakref
+
 import requests
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from requests.adapters import HTTPAdapter
+from google.auth import jwt as google_jwt
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import APIException, AuthenticationFailed
+
+from .cache import invalidate_user
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - only the async login views need it
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+CERTS_TIMEOUT = 5  # seconds
+CERTS_DEFAULT_MAX_AGE = 60 * 60  # seconds, when the response has no max-age
+CERTS_REFRESH_AHEAD = 0.2  # refresh in the background during the last fifth of max-age
+CERTS_MIN_REFETCH_INTERVAL = 30  # seconds between refetches for unknown key ids
+KAKAO_BREAKER_FAILURES = 5  # consecutive failures that open the circuit
+KAKAO_BREAKER_RESET = 30  # seconds the circuit stays open before a trial call
+
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+def pooled_session():
+    """requests.Session keeping connections to the providers alive"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.OAUTH_HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+http = pooled_session()
+
+# httpx.AsyncClient pools are bound to the event loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def async_http():
+    """Pooled httpx.AsyncClient of the running event loop"""
+    if httpx is None:
+        raise ImproperlyConfigured('httpx is required when ASYNC_OAUTH_LOGIN is enabled')
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        limits = httpx.Limits(max_keepalive_connections=settings.OAUTH_HTTP_POOL_SIZE)
+        client = _async_clients[loop] = httpx.AsyncClient(limits=limits)
+    return client
+
+
+class ProviderError(requests.RequestException):
+    """The provider answered, but with a server error (5xx or 429)"""
+
+
+class ProviderUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Login provider is temporarily unavailable, try again shortly.'
+    default_code = 'provider_unavailable'
+
+    def __init__(self, detail=None, retry_after=None):
+        super().__init__(detail)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a provider keeps failing (per process)
+
+    closed     calls go through; failure_threshold consecutive failures open it
+    open       calls raise ProviderUnavailable for reset_timeout seconds
+    half-open  one trial call goes through; success closes the circuit,
+               failure opens it again
+
+    Only failure_exceptions count as failures: a provider rejecting a bad
+    token is a healthy answer.
+    """
+
+    def __init__(self, name, failure_threshold, reset_timeout, failure_exceptions=(requests.RequestException,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_exceptions = failure_exceptions
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if self._trial or time.monotonic() - self._opened_at < self.reset_timeout:
+            return 'open'
+        return 'half-open'
+
+    def call(self, fn, *args, **kwargs):
+        self._before()
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except self.failure_exceptions:
+            failed = True
+            raise
+        finally:
+            self._record(failed)
+
+    async def acall(self, fn, *args, **kwargs):
+        """call() for coroutine functions"""
+        self._before()
+        failed = False
+        try:
+            return await fn(*args, **kwargs)
+        except self.failure_exceptions:
+            failed = True
+            raise
+        finally:
+            self._record(failed)
+
+    def reset(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def _before(self):
+        """Raise while open; let one trial call through once reset_timeout passed"""
+        with self._lock:
+            if self._opened_at is not None:
+                remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+                if self._trial or remaining > 0:
+                    raise ProviderUnavailable(
+                        f'{self.name} login is temporarily unavailable, try again shortly.',
+                        retry_after=max(math.ceil(remaining), 1),
+                    )
+                self._trial = True
+
+    def _record(self, failed):
+        with self._lock:
+            self._trial = False
+            if not failed:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning('%s circuit opened after %d failures', self.name, self._failures)
+                self._opened_at = time.monotonic()
+
+
+class GoogleCertCache:
+    """
+    Google's ID token signing certs ({key id: PEM}), cached per process
+
+    Fresh certs are served from memory. During the last CERTS_REFRESH_AHEAD
+    of their max-age one background thread refetches them, so logins only
+    wait on the download when the cache is cold or expired. If a refetch
+    fails the old certs stay in use (Google keeps old keys published well
+    past their rotation).
+
+    aget()/arefetch() download with httpx for the async views. They skip
+    self._lock, which must not block the event loop, so concurrent cold
+    loads may each fetch once.
+    """
+
+    def __init__(self):
+        self._certs = None
+        self._fetched_at = 0.0
+        self._refresh_at = 0.0
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if self._certs is None or now >= self._expires_at:
+            with self._lock:
+                # Another thread may have fetched while this one waited
+                if self._certs is None or time.monotonic() >= self._expires_at:
+                    self._fetch()
+        elif now >= self._refresh_at and self._refreshing.acquire(blocking=False):
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return self._certs
+
+    async def aget(self):
+        """get() for async views"""
+        now = time.monotonic()
+        if self._certs is None or now >= self._expires_at:
+            await self._afetch()
+        elif now >= self._refresh_at and self._refreshing.acquire(blocking=False):
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return self._certs
+
+    def refetch(self):
+        """
+        Refetch for a token signed with a key id not in the certs (Google
+        rotated its keys), at most every CERTS_MIN_REFETCH_INTERVAL
+
+        Returns:
+            bool: Whether the certs were refetched
+        """
+        with self._lock:
+            if time.monotonic() - self._fetched_at < CERTS_MIN_REFETCH_INTERVAL:
+                return False
+            self._fetch()
+            return True
+
+    async def arefetch(self):
+        """refetch() for async views"""
+        if time.monotonic() - self._fetched_at < CERTS_MIN_REFETCH_INTERVAL:
+            return False
+        # Claimed before awaiting, so concurrent logins do not refetch too
+        self._fetched_at = time.monotonic()
+        await self._afetch()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._certs = None
+            self._fetched_at = self._refresh_at = self._expires_at = 0.0
+
+    def _refresh_in_background(self):
+        try:
+            with self._lock:
+                self._fetch()
+        finally:
+            self._refreshing.release()
+
+    def _fetch(self):
+        """Download the certs; callers hold self._lock"""
+        try:
+            response = http.get(settings.GOOGLE_OAUTH2_CERTS_URL, timeout=CERTS_TIMEOUT)
+            response.raise_for_status()
+            certs = response.json()
+        except (requests.RequestException, ValueError):
+            self._keep_stale()
+        else:
+            self._store(certs, response.headers)
+
+    async def _afetch(self):
+        client = async_http()
+        try:
+            response = await client.get(settings.GOOGLE_OAUTH2_CERTS_URL, timeout=CERTS_TIMEOUT)
+            response.raise_for_status()
+            certs = response.json()
+        except (httpx.HTTPError, ValueError):
+            self._keep_stale()
+        else:
+            self._store(certs, response.headers)
+
+    def _keep_stale(self):
+        """Called from an except block: re-raise unless there are certs to fall back on"""
+        if self._certs is None:
+            raise
+        logger.warning('Could not refresh Google certs, keeping the cached ones', exc_info=True)
+        # Retry on the next login after the minimum interval, not on every one
+        now = time.monotonic()
+        self._fetched_at = now
+        self._refresh_at = self._expires_at = now + CERTS_MIN_REFETCH_INTERVAL
+
+    def _store(self, certs, headers):
+        now = time.monotonic()
+        match = MAX_AGE_RE.search(headers.get('Cache-Control', ''))
+        max_age = int(match.group(1)) if match else CERTS_DEFAULT_MAX_AGE
+        # A shared cache on the way may have held the response for a while
+        age = headers.get('Age', '0')
+        lifetime = max(max_age - (int(age) if age.isdigit() else 0), 0)
+
+        self._certs = certs
+        self._fetched_at = now
+        self._refresh_at = now + lifetime * (1 - CERTS_REFRESH_AHEAD)
+        self._expires_at = now + lifetime
 
 
 class GoogleOAuth:
     """Google OAuth 2.0 authentication handler"""
 
+    certs = GoogleCertCache()
+
+    @classmethod
+    def decode(cls, token):
+        """Verify an ID token's signature, expiry and audience against the cached certs"""
+        certs = cls.certs.get()
+        if google_jwt.decode_header(token).get('kid') not in certs and cls.certs.refetch():
+            certs = cls.certs.get()
+        return google_jwt.decode(token, certs=certs, audience=settings.GOOGLE_CLIENT_ID)
+
+    @classmethod
+    async def adecode(cls, token):
+        """decode() for async views"""
+        certs = await cls.certs.aget()
+        if google_jwt.decode_header(token).get('kid') not in certs and await cls.certs.arefetch():
+            certs = await cls.certs.aget()
+        return google_jwt.decode(token, certs=certs, audience=settings.GOOGLE_CLIENT_ID)
+
+    @staticmethod
+    def user_data(idinfo):
+        """User data of verified ID token claims"""
+        # Verify token issuer
+        if idinfo['iss'] not in GOOGLE_ISSUERS:
+            raise AuthenticationFailed('Invalid token issuer')
+
+        # Extract user information
+        user_data = {
+            'email': idinfo.get('email'),
+            'username': idinfo.get('name', idinfo.get('email').split('@')[0]),
+            'oauth_id': idinfo.get('sub'),
+            'profile_image': idinfo.get('picture'),
+            'oauth_provider': 'google',
+        }
+
+        # Verify email is present
+        if not user_data['email']:
+            raise AuthenticationFailed('Email not provided by Google')
+
+        return user_data
+
     @staticmethod
     def verify_token(token):
         """
@@ -28,32 +359,17 @@ class GoogleOAuth:
             AuthenticationFailed: If token is invalid
         """
         try:
-            # Verify the token
-            idinfo = id_token.verify_oauth2_token(
-                token,
-                google_requests.Request(),
-                settings.GOOGLE_CLIENT_ID
-            )
-
-            # Verify token issuer
-            if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
-                raise AuthenticationFailed('Invalid token issuer')
-
-            # Extract user information
-            user_data = {
-                'email': idinfo.get('email'),
-                'username': idinfo.get('name', idinfo.get('email').split('@')[0]),
-                'oauth_id': idinfo.get('sub'),
-                'profile_image': idinfo.get('picture'),
-                'oauth_provider': 'google',
-            }
-
-            # Verify email is present
-            if not user_data['email']:
-                raise AuthenticationFailed('Email not provided by Google')
-
-            return user_data
+            return GoogleOAuth.user_data(GoogleOAuth.decode(token))
+        except ValueError as e:
+            raise AuthenticationFailed(f'Invalid Google token: {str(e)}')
+        except Exception as e:
+            raise AuthenticationFailed(f'Google authentication failed: {str(e)}')
 
+    @staticmethod
+    async def averify_token(token):
+        """verify_token() for async views"""
+        try:
+            return GoogleOAuth.user_data(await GoogleOAuth.adecode(token))
         except ValueError as e:
             raise AuthenticationFailed(f'Invalid Google token: {str(e)}')
         except Exception as e:
@@ -63,7 +379,73 @@ class GoogleOAuth:
 class KakaoOAuth:
     """Kakao OAuth 2.0 authentication handler"""
 
-    KAKAO_USER_INFO_URL = 'https://kapi.kakao.com/v2/user/me'
+    KAKAO_USER_INFO_URL = settings.KAKAO_USER_INFO_URL
+
+    breaker = CircuitBreaker('Kakao', KAKAO_BREAKER_FAILURES, KAKAO_BREAKER_RESET)
+
+    @staticmethod
+    def profile_cache_key(access_token):
+        return f'kakao_profile:{hashlib.sha256(access_token.encode()).hexdigest()}'
+
+    @staticmethod
+    def request_headers(access_token):
+        return {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/x-www-form-urlencoded;charset=utf-8'
+        }
+
+    @staticmethod
+    def fetch_profile(access_token):
+        """GET the token's profile from Kakao; ProviderError when Kakao itself failed"""
+        response = http.get(
+            KakaoOAuth.KAKAO_USER_INFO_URL,
+            headers=KakaoOAuth.request_headers(access_token),
+            timeout=(settings.KAKAO_CONNECT_TIMEOUT, settings.KAKAO_READ_TIMEOUT)
+        )
+        if response.status_code >= 500 or response.status_code == 429:
+            raise ProviderError(f'Kakao API returned {response.status_code}', response=response)
+        return response
+
+    @staticmethod
+    async def afetch_profile(access_token):
+        """fetch_profile() with httpx, for async views"""
+        client = async_http()
+        try:
+            response = await client.get(
+                KakaoOAuth.KAKAO_USER_INFO_URL,
+                headers=KakaoOAuth.request_headers(access_token),
+                timeout=httpx.Timeout(settings.KAKAO_READ_TIMEOUT, connect=settings.KAKAO_CONNECT_TIMEOUT)
+            )
+        except httpx.HTTPError as e:
+            # The breaker and verify_token handle requests' exception types
+            raise ProviderError(f'{type(e).__name__}: {e}') from e
+        if response.status_code >= 500 or response.status_code == 429:
+            raise ProviderError(f'Kakao API returned {response.status_code}')
+        return response
+
+    @staticmethod
+    def user_data(response):
+        """User data of a Kakao profile response"""
+        if response.status_code != 200:
+            raise AuthenticationFailed('Invalid Kakao token')
+
+        user_info = response.json()
+
+        # Extract user information
+        kakao_account = user_info.get('kakao_account', {})
+        profile = kakao_account.get('profile', {})
+
+        email = kakao_account.get('email')
+        if not email:
+            raise AuthenticationFailed('Email not provided by Kakao')
+
+        return {
+            'email': email,
+            'username': profile.get('nickname', email.split('@')[0]),
+            'oauth_id': str(user_info.get('id')),
+            'profile_image': profile.get('profile_image_url'),
+            'oauth_provider': 'kakao',
+        }
 
     @staticmethod
     def verify_token(access_token):
@@ -78,67 +460,242 @@ class KakaoOAuth:
 
         Raises:
             AuthenticationFailed: If token is invalid
+            ProviderUnavailable: While the Kakao circuit is open
         """
-        try:
-            # Request user info from Kakao API
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/x-www-form-urlencoded;charset=utf-8'
-            }
-
-            response = requests.get(
-                KakaoOAuth.KAKAO_USER_INFO_URL,
-                headers=headers,
-                timeout=10
-            )
-
-            if response.status_code != 200:
-                raise AuthenticationFailed('Invalid Kakao token')
-
-            user_info = response.json()
-
-            # Extract user information
-            kakao_account = user_info.get('kakao_account', {})
-            profile = kakao_account.get('profile', {})
+        # Rapid re-logins with the same token skip the Kakao round trip
+        cache_key = KakaoOAuth.profile_cache_key(access_token)
+        user_data = cache.get(cache_key)
+        if user_data is not None:
+            return user_data
 
-            email = kakao_account.get('email')
-            if not email:
-                raise AuthenticationFailed('Email not provided by Kakao')
+        try:
+            response = KakaoOAuth.breaker.call(KakaoOAuth.fetch_profile, access_token)
+            user_data = KakaoOAuth.user_data(response)
+        except ProviderUnavailable:
+            raise
+        except requests.RequestException as e:
+            raise AuthenticationFailed(f'Kakao API request failed: {str(e)}')
+        except Exception as e:
+            raise AuthenticationFailed(f'Kakao authentication failed: {str(e)}')
 
-            user_data = {
-                'email': email,
-                'username': profile.get('nickname', email.split('@')[0]),
-                'oauth_id': str(user_info.get('id')),
-                'profile_image': profile.get('profile_image_url'),
-                'oauth_provider': 'kakao',
-            }
+        cache.set(cache_key, user_data, settings.KAKAO_PROFILE_CACHE_TTL)
+        return user_data
 
+    @staticmethod
+    async def averify_token(access_token):
+        """verify_token() for async views"""
+        cache_key = KakaoOAuth.profile_cache_key(access_token)
+        user_data = await cache.aget(cache_key)
+        if user_data is not None:
             return user_data
 
+        try:
+            response = await KakaoOAuth.breaker.acall(KakaoOAuth.afetch_profile, access_token)
+            user_data = KakaoOAuth.user_data(response)
+        except ProviderUnavailable:
+            raise
         except requests.RequestException as e:
             raise AuthenticationFailed(f'Kakao API request failed: {str(e)}')
         except Exception as e:
             raise AuthenticationFailed(f'Kakao authentication failed: {str(e)}')
 
+        await cache.aset(cache_key, user_data, settings.KAKAO_PROFILE_CACHE_TTL)
+        return user_data
+
+
+# The find-or-link-or-create statement (PostgreSQL). Each CTE only acts when
+# the ones before it found nothing; the statement returns one row (the user
+# and its preferences) unless its INSERT lost a race to a concurrent login.
+# The conflict target is unique_oauth_provider_id (a partial unique index, so
+# it is inferred from its columns and predicate, not named ON CONSTRAINT):
+# only a concurrent login of the same account is skipped, any other
+# violation raises.
+OAUTH_UPSERT_SQL = """
+WITH found AS (
+    SELECT {user_columns} FROM users
+    WHERE oauth_provider = %(oauth_provider)s AND oauth_id = %(oauth_id)s
+),
+refreshed AS (
+    UPDATE users SET profile_image = %(profile_image)s, updated_at = %(now)s
+    WHERE id IN (SELECT id FROM found)
+        AND %(profile_image)s IS NOT NULL AND profile_image IS DISTINCT FROM %(profile_image)s
+    RETURNING {user_columns}
+),
+linked AS (
+    UPDATE users SET
+        oauth_provider = %(oauth_provider)s,
+        oauth_id = %(oauth_id)s,
+        profile_image = COALESCE(%(profile_image)s, profile_image),
+        updated_at = %(now)s
+    WHERE email = %(email)s AND NOT EXISTS (SELECT 1 FROM found)
+    RETURNING {user_columns}
+),
+created AS (
+    INSERT INTO users ({user_columns})
+    SELECT {user_values}
+    WHERE NOT EXISTS (SELECT 1 FROM found) AND NOT EXISTS (SELECT 1 FROM linked)
+    ON CONFLICT (oauth_provider, oauth_id) WHERE oauth_provider IS NOT NULL DO NOTHING
+    RETURNING {user_columns}
+),
+created_preferences AS (
+    INSERT INTO notification_preferences ({preferences_columns})
+    SELECT {preferences_values} FROM created
+    RETURNING {preferences_columns}
+),
+account AS (
+    SELECT 'refreshed' AS outcome, * FROM refreshed
+    UNION ALL SELECT 'found', * FROM found WHERE NOT EXISTS (SELECT 1 FROM refreshed)
+    UNION ALL SELECT 'linked', * FROM linked
+    UNION ALL SELECT 'created', * FROM created
+)
+SELECT account.*, preferences.*
+FROM account
+LEFT JOIN LATERAL (
+    SELECT {preferences_columns} FROM notification_preferences WHERE user_id = account.id
+    UNION ALL SELECT * FROM created_preferences WHERE user_id = account.id
+) preferences ON TRUE
+"""
+
+OAUTH_UPSERT_ATTEMPTS = 3  # a login that loses the insert race finds the winner's row on retry
+# A racing first login can also win on the email index, which is not the
+# conflict target: that violation is retried too (the retry links or finds it)
+EMAIL_UNIQUE_INDEX = 'users_email_key'
+
+_upsert_sql = {}  # connection alias -> OAUTH_UPSERT_SQL with this schema's columns and casts
+
 
 def get_or_create_oauth_user(user_data):
     """
     Get or create user from OAuth provider data
 
+    Finds the user by provider and OAuth ID, else links the account with the
+    same email, else creates the user with default notification preferences.
+    On PostgreSQL this is a single statement (OAUTH_UPSERT_SQL); elsewhere
+    the ORM lookups are retried when the insert loses a race. Simultaneous first logins of the
+    same account end up with one user either way.
+
     Args:
         user_data (dict): User data from OAuth provider
 
     Returns:
-        User: User instance
+        User: User instance, with notification_preferences loaded
     """
+    from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    for attempt in range(1, OAUTH_UPSERT_ATTEMPTS + 1):
+        if connection.vendor == 'postgresql':
+            try:
+                # A savepoint (only inside an outer transaction) keeps it usable for the retry
+                with transaction.atomic(using=connection.alias):
+                    user = upsert_oauth_user(user_data, connection)
+            except IntegrityError as exc:
+                if attempt == OAUTH_UPSERT_ATTEMPTS or EMAIL_UNIQUE_INDEX not in str(exc):
+                    raise
+                continue
+            if user is not None:
+                return user
+            continue
+        try:
+            return find_link_or_create_oauth_user(user_data)
+        except IntegrityError:
+            if attempt == OAUTH_UPSERT_ATTEMPTS:
+                raise
+
+    raise IntegrityError(f'Could not create the {user_data["oauth_provider"]} user {user_data["oauth_id"]}')
+
+
+def upsert_oauth_user(user_data, connection):
+    """
+    Run OAUTH_UPSERT_SQL for user_data
+
+    Returns:
+        User: The found, linked or created user, or None if a concurrent
+        login created it first (retry to find it)
+    """
+    from .models import User, NotificationPreferences
+
+    # Built in Python so field defaults (id, timestamps, JSON) match an ORM insert
+    new_user = User(
+        email=user_data['email'],
+        username=user_data['username'],
+        oauth_provider=user_data['oauth_provider'],
+        oauth_id=user_data['oauth_id'],
+        profile_image=user_data.get('profile_image'),
+    )
+    new_preferences = NotificationPreferences(user=new_user)
+
+    user_fields = User._meta.concrete_fields
+    preferences_fields = NotificationPreferences._meta.concrete_fields
+    params = {
+        'oauth_provider': user_data['oauth_provider'],
+        'oauth_id': user_data['oauth_id'],
+        'email': user_data['email'],
+        'profile_image': user_data.get('profile_image') or None,
+        'now': timezone.now(),
+    }
+    for instance, fields, prefix in ((new_user, user_fields, 'u'), (new_preferences, preferences_fields, 'p')):
+        for index, field in enumerate(fields):
+            if field.column != 'user_id':
+                params[f'{prefix}{index}'] = field.get_db_prep_save(field.pre_save(instance, True), connection)
+
+    sql = _upsert_sql.get(connection.alias)
+    if sql is None:
+        qn = connection.ops.quote_name
+
+        def insert_values(fields, prefix):
+            return ', '.join(
+                'created.id' if field.column == 'user_id'
+                else f'CAST(%({prefix}{index})s AS {field.db_type(connection)})'
+                for index, field in enumerate(fields)
+            )
+
+        sql = _upsert_sql[connection.alias] = OAUTH_UPSERT_SQL.format(
+            user_columns=', '.join(qn(field.column) for field in user_fields),
+            user_values=insert_values(user_fields, 'u'),
+            preferences_columns=', '.join(qn(field.column) for field in preferences_fields),
+            preferences_values=insert_values(preferences_fields, 'p'),
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+
+    outcome, values = row[0], row[1:]
+
+    def from_row(model, fields, values):
+        values = [
+            field.from_db_value(value, None, connection) if hasattr(field, 'from_db_value') else value
+            for field, value in zip(fields, values)
+        ]
+        return model.from_db(connection.alias, [field.attname for field in fields], values)
+
+    user = from_row(User, user_fields, values[:len(user_fields)])
+    preferences_values = values[len(user_fields):]
+    if preferences_values[0] is not None:
+        preferences = from_row(NotificationPreferences, preferences_fields, preferences_values)
+        preferences.user = user  # caches user.notification_preferences too
+
+    if outcome in ('refreshed', 'linked'):
+        invalidate_user(user.pk)
+    return user
+
+
+def find_link_or_create_oauth_user(user_data):
+    """get_or_create_oauth_user() with ORM lookups (databases other than PostgreSQL)"""
+    from django.db import transaction
+
     from .models import User, NotificationPreferences
 
     oauth_provider = user_data['oauth_provider']
     oauth_id = user_data['oauth_id']
     email = user_data['email']
+    users = User.objects.select_related('notification_preferences')
 
     # Try to find user by OAuth provider and ID
-    user = User.objects.filter(
+    user = users.filter(
         oauth_provider=oauth_provider,
         oauth_id=oauth_id
     ).first()
@@ -151,7 +708,7 @@ def get_or_create_oauth_user(user_data):
         return user
 
     # Try to find user by email (for linking existing accounts)
-    user = User.objects.filter(email=email).first()
+    user = users.filter(email=email).first()
 
     if user:
         # Link existing account to OAuth provider
@@ -162,16 +719,17 @@ def get_or_create_oauth_user(user_data):
         user.save(update_fields=['oauth_provider', 'oauth_id', 'profile_image', 'updated_at'])
         return user
 
-    # Create new user
-    user = User.objects.create(
-        email=email,
-        username=user_data['username'],
-        oauth_provider=oauth_provider,
-        oauth_id=oauth_id,
-        profile_image=user_data.get('profile_image'),
-    )
-
-    # Create default notification preferences
-    NotificationPreferences.objects.create(user=user)
+    # Create new user (a concurrent login creating it first raises IntegrityError)
+    with transaction.atomic():
+        user = User.objects.create(
+            email=email,
+            username=user_data['username'],
+            oauth_provider=oauth_provider,
+            oauth_id=oauth_id,
+            profile_image=user_data.get('profile_image'),
+        )
+
+        # Create default notification preferences
+        NotificationPreferences.objects.create(user=user)
 
     return user
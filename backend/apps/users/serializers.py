@@ -57,6 +57,7 @@ class UserSerializer(serializers.ModelSerializer):
             'oauth_id',
             'profile_image',
             'timezone',
+            'auto_rollover',
             'is_premium',
             'premium_expires_at',
             'is_oauth_user',
@@ -144,7 +145,7 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = ['username', 'profile_image', 'timezone']
+        fields = ['username', 'profile_image', 'timezone', 'auto_rollover']
 
 
 class ChangePasswordSerializer(serializers.Serializer):
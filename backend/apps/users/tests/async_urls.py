@@ -0,0 +1,10 @@
+"""URLconf routing the login endpoints to the async views (settings.ASYNC_OAUTH_LOGIN)"""
+
+from django.urls import path
+
+from apps.users.views import google_login_async, kakao_login_async
+
+urlpatterns = [
+    path('api/auth/google/', google_login_async),
+    path('api/auth/kakao/', kakao_login_async),
+]
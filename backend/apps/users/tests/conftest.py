@@ -0,0 +1,73 @@
+"""Stand-in login provider for the OAuth tests (plain HTTP on localhost)"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubProvider:
+    """
+    Serves Google's certs and Kakao's profile endpoint
+
+    Tests change certs, max_age, profile, status and delay between requests;
+    calls counts the requests per path.
+    """
+
+    def __init__(self):
+        self.certs = {'k1': 'PEM'}
+        self.max_age = 3600
+        self.profile = {'id': 1, 'kakao_account': {'email': 'kakao@example.com', 'profile': {'nickname': 'kakao'}}}
+        self.status = 200
+        self.delay = 0.0
+        self.calls = {}
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.calls[self.path] = stub.calls.get(self.path, 0) + 1
+                if self.path == '/certs':
+                    self.reply(200, stub.certs, {'Cache-Control': f'public, max-age={stub.max_age}'})
+                    return
+                time.sleep(stub.delay)
+                self.reply(stub.status, stub.profile if stub.status == 200 else {'msg': 'error'})
+
+            def reply(self, code, body, headers=None):
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(code)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    for name, value in (headers or {}).items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (timeout tests)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def stub_provider(settings, monkeypatch):
+    """A running StubProvider, with the certs and Kakao profile URLs pointing at it"""
+    from apps.users.oauth import KakaoOAuth
+
+    stub = StubProvider()
+    thread = threading.Thread(target=stub.server.serve_forever, daemon=True)
+    thread.start()
+    settings.GOOGLE_OAUTH2_CERTS_URL = f'{stub.url}/certs'
+    monkeypatch.setattr(KakaoOAuth, 'KAKAO_USER_INFO_URL', f'{stub.url}/v2/user/me')
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
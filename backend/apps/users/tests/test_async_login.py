@@ -0,0 +1,116 @@
+"""Async login views: the full login flow against the stub providers"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient
+from google.auth import crypt, jwt as google_jwt
+
+from apps.users.oauth import CircuitBreaker, GoogleCertCache, GoogleOAuth, KakaoOAuth
+
+pytestmark = [
+    pytest.mark.anyio,
+    # oauth_login runs in a worker thread (sync_to_async), outside the test's transaction
+    pytest.mark.django_db(transaction=True),
+    pytest.mark.urls('apps.users.tests.async_urls'),
+]
+
+CLIENT_ID = 'timelock-test.apps.googleusercontent.com'
+
+User = get_user_model()
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture
+def google_key(stub_provider, settings, monkeypatch):
+    """Signing key of a self-signed cert that the stub serves as Google's 'k1'"""
+    settings.GOOGLE_CLIENT_ID = CLIENT_ID
+    monkeypatch.setattr(GoogleOAuth, 'certs', GoogleCertCache())
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'k1')])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(1).not_valid_before(now - timedelta(days=1)).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    stub_provider.certs = {'k1': cert.public_bytes(serialization.Encoding.PEM).decode()}
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL, serialization.NoEncryption()
+    )
+    return crypt.RSASigner.from_string(pem, key_id='k1')
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker('Kakao', 1, 30)
+    monkeypatch.setattr(KakaoOAuth, 'breaker', breaker)
+    return breaker
+
+
+def id_token(signer, **claims):
+    now = int(time.time())
+    payload = {
+        'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'iat': now, 'exp': now + 600,
+        'sub': 'google-1', 'email': 'google@example.com', 'name': 'google',
+    }
+    return google_jwt.encode(signer, {**payload, **claims}).decode()
+
+
+async def test_google_login_creates_the_user_and_issues_tokens(stub_provider, google_key):
+    client = AsyncClient()
+
+    response = await client.post(
+        '/api/auth/google/', {'id_token': id_token(google_key)}, content_type='application/json'
+    )
+
+    assert response.status_code == 200, response.content
+    body = response.json()
+    assert body['access'] and body['refresh']
+    assert body['user']['email'] == 'google@example.com'
+    assert await User.objects.filter(oauth_provider='google', oauth_id='google-1').aexists()
+
+    # A second login reuses the cached certs and the same user
+    response = await client.post(
+        '/api/auth/google/', {'id_token': id_token(google_key)}, content_type='application/json'
+    )
+    assert response.json()['user']['id'] == body['user']['id']
+    assert stub_provider.calls == {'/certs': 1}
+
+    response = await client.post(
+        '/api/auth/google/', {'id_token': id_token(google_key, aud='someone-else')}, content_type='application/json'
+    )
+    assert response.status_code == 401
+
+
+async def test_kakao_login_and_provider_outage(stub_provider, breaker):
+    client = AsyncClient()
+
+    response = await client.post('/api/auth/kakao/', {'access_token': 'token-1'})
+    assert response.status_code == 200, response.content
+    assert response.json()['user']['email'] == 'kakao@example.com'
+
+    # Kakao rejects the token: 401, and the circuit stays closed
+    stub_provider.status = 401
+    response = await client.post('/api/auth/kakao/', {'access_token': 'token-2'})
+    assert response.status_code == 401
+    assert breaker.state == 'closed'
+
+    # Kakao is down: the first failure opens the circuit, the next login fails fast
+    stub_provider.status = 503
+    assert (await client.post('/api/auth/kakao/', {'access_token': 'token-3'})).status_code == 401
+    response = await client.post('/api/auth/kakao/', {'access_token': 'token-4'})
+    assert response.status_code == 503
+    assert int(response['Retry-After']) >= 1
+    assert stub_provider.calls == {'/v2/user/me': 3}
@@ -0,0 +1,64 @@
+"""JWT authentication: users come from the cache until a write invalidates them"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.timers.models import TimerSession
+
+pytestmark = pytest.mark.django_db
+
+ME_URL = '/api/auth/users/me/'
+
+
+@pytest.fixture
+def token_client(user):
+    """API client sending a real access token (force_authenticate would skip the authenticator)"""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def users_queries(context):
+    table = connection.ops.quote_name('users')
+    return [query['sql'] for query in context.captured_queries if f'FROM {table}' in query['sql']]
+
+
+def test_user_save_invalidates_the_cached_user(token_client, user, django_capture_on_commit_callbacks):
+    assert token_client.get(ME_URL).status_code == 200
+
+    with CaptureQueriesContext(connection) as context:
+        response = token_client.get(ME_URL)
+    assert response.status_code == 200
+    assert users_queries(context) == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.username = 'renamed'
+        user.save()
+
+    with CaptureQueriesContext(connection) as context:
+        response = token_client.get(ME_URL)
+    assert response.json()['username'] == 'renamed'
+    assert len(users_queries(context)) == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.is_active = False
+        user.save()
+
+    assert token_client.get(ME_URL).status_code == 401
+
+
+def test_trusted_claims_action_does_not_load_the_user(token_client, user):
+    session = TimerSession.objects.create(user=user, scheduled_duration=1500, started_at=timezone.now())
+
+    with CaptureQueriesContext(connection) as context:
+        response = token_client.post(
+            f'/api/timer/sessions/{session.pk}/update-elapsed/', {'elapsed_seconds': 120}, format='json'
+        )
+
+    assert response.status_code == 200, response.content
+    assert response.json()['elapsed_time'] == 120
+    assert users_queries(context) == []
@@ -0,0 +1,39 @@
+"""GoogleCertCache: certs are downloaded once per max-age"""
+
+import time
+
+import pytest
+
+from apps.users.oauth import GoogleCertCache
+
+
+@pytest.fixture
+def certs():
+    return GoogleCertCache()
+
+
+def test_certs_are_fetched_once_while_cached(stub_provider, certs):
+    assert certs.get() == {'k1': 'PEM'}
+    assert certs.get() == {'k1': 'PEM'}
+    assert stub_provider.calls == {'/certs': 1}
+
+
+def test_certs_are_refetched_after_max_age(stub_provider, certs):
+    stub_provider.max_age = 1
+    assert certs.get() == {'k1': 'PEM'}
+
+    # Google rotated its keys; the cached ones are served until they expire
+    stub_provider.certs = {'k2': 'PEM'}
+    assert certs.get() == {'k1': 'PEM'}
+    assert stub_provider.calls == {'/certs': 1}
+
+    time.sleep(1.1)
+    assert certs.get() == {'k2': 'PEM'}
+    assert stub_provider.calls == {'/certs': 2}
+
+
+def test_unknown_key_refetch_is_rate_limited(stub_provider, certs):
+    certs.get()
+    # Just fetched: a token with an unknown key id does not trigger another download
+    assert certs.refetch() is False
+    assert stub_provider.calls == {'/certs': 1}
@@ -0,0 +1,67 @@
+"""Kakao profile lookups: timeouts and the circuit breaker, against a stub Kakao"""
+
+import time
+
+import pytest
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.users.oauth import CircuitBreaker, KakaoOAuth, ProviderUnavailable
+
+PROFILE_PATH = '/v2/user/me'
+FAILURES = 3
+RESET = 0.5  # seconds
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker('Kakao', FAILURES, RESET)
+    monkeypatch.setattr(KakaoOAuth, 'breaker', breaker)
+    return breaker
+
+
+def test_slow_profile_times_out(stub_provider, breaker, settings):
+    settings.KAKAO_READ_TIMEOUT = 0.2
+    stub_provider.delay = 2
+
+    started = time.monotonic()
+    with pytest.raises(AuthenticationFailed, match='Kakao API request failed'):
+        KakaoOAuth.verify_token('slow')
+
+    assert time.monotonic() - started < 1
+    assert breaker.state == 'closed'  # one failure is below the threshold
+
+
+def test_circuit_opens_after_consecutive_failures(stub_provider, breaker):
+    stub_provider.status = 503
+    for attempt in range(FAILURES):
+        with pytest.raises(AuthenticationFailed):
+            KakaoOAuth.verify_token(f'token-{attempt}')
+    assert breaker.state == 'open'
+
+    # Open: fail fast without calling Kakao
+    with pytest.raises(ProviderUnavailable) as excinfo:
+        KakaoOAuth.verify_token('token-open')
+    assert excinfo.value.retry_after >= 1
+    assert stub_provider.calls == {PROFILE_PATH: FAILURES}
+
+
+def test_half_open_trial_closes_or_reopens_the_circuit(stub_provider, breaker):
+    stub_provider.status = 503
+    for attempt in range(FAILURES):
+        with pytest.raises(AuthenticationFailed):
+            KakaoOAuth.verify_token(f'token-{attempt}')
+
+    # A failing trial call opens the circuit again
+    time.sleep(RESET + 0.1)
+    assert breaker.state == 'half-open'
+    with pytest.raises(AuthenticationFailed):
+        KakaoOAuth.verify_token('trial-1')
+    assert breaker.state == 'open'
+
+    # Kakao recovered: the next trial succeeds and closes the circuit
+    stub_provider.status = 200
+    time.sleep(RESET + 0.1)
+    assert KakaoOAuth.verify_token('trial-2')['email'] == 'kakao@example.com'
+    assert breaker.state == 'closed'
+    assert KakaoOAuth.verify_token('after')['oauth_provider'] == 'kakao'
+    assert stub_provider.calls == {PROFILE_PATH: FAILURES + 3}
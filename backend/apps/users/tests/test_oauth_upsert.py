@@ -0,0 +1,110 @@
+"""OAuth login on PostgreSQL: one statement per login, one user per account under races"""
+
+import threading
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.users.models import NotificationPreferences, User
+from apps.users.oauth import get_or_create_oauth_user
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='OAUTH_UPSERT_SQL is PostgreSQL only'
+)
+
+THREADS = 8
+
+
+def kakao(oauth_id='1', email='kakao@example.com', **extra):
+    return {
+        'email': email, 'username': 'kakao', 'oauth_id': oauth_id, 'oauth_provider': 'kakao',
+        'profile_image': None, **extra,
+    }
+
+
+def statements(context):
+    """Captured queries without the savepoint around the upsert"""
+    return [
+        query['sql'] for query in context.captured_queries
+        if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))
+    ]
+
+
+@pytest.mark.django_db
+def test_each_login_is_one_statement(user):
+    # Created
+    with CaptureQueriesContext(connection) as context:
+        created = get_or_create_oauth_user(kakao())
+    assert len(statements(context)) == 1
+    assert NotificationPreferences.objects.filter(user=created).exists()
+
+    # Found (a new profile image is saved by the same statement)
+    with CaptureQueriesContext(connection) as context:
+        found = get_or_create_oauth_user(kakao(profile_image='https://example.com/me.png'))
+    assert len(statements(context)) == 1
+    assert found.pk == created.pk
+    assert found.notification_preferences.user_id == created.pk
+    assert User.objects.get(pk=created.pk).profile_image == 'https://example.com/me.png'
+
+    # Linked by email
+    with CaptureQueriesContext(connection) as context:
+        linked = get_or_create_oauth_user(kakao(oauth_id='2', email=user.email))
+    assert len(statements(context)) == 1
+    assert linked.pk == user.pk
+    assert (linked.oauth_provider, linked.oauth_id) == ('kakao', '2')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_simultaneous_first_logins_create_one_user():
+    barrier = threading.Barrier(THREADS)
+    results, errors = [], []
+
+    def login():
+        try:
+            barrier.wait()
+            results.append(get_or_create_oauth_user(kakao()).pk)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=login) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(set(results)) == 1 and len(results) == THREADS
+    assert User.objects.filter(oauth_provider='kakao', oauth_id='1').count() == 1
+    assert NotificationPreferences.objects.filter(user_id=results[0]).count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_email_taken_by_a_racing_insert_is_retried_and_linked():
+    from django.db import transaction
+
+    inserted, release = threading.Event(), threading.Event()
+    racer = {}
+
+    def racing_signup():
+        try:
+            with transaction.atomic():
+                racer['user'] = User.objects.create_user(email='kakao@example.com', username='racer')
+                inserted.set()
+                release.wait(5)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=racing_signup)
+    thread.start()
+    inserted.wait(5)
+    # The login's INSERT waits on the uncommitted email, then violates users_email_key
+    threading.Timer(0.3, release.set).start()
+    user = get_or_create_oauth_user(kakao())
+    thread.join()
+
+    assert user.pk == racer['user'].pk
+    assert (user.oauth_provider, user.oauth_id) == ('kakao', '1')
+    assert User.objects.count() == 1
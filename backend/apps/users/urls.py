@@ -2,6 +2,7 @@
 URL configuration for users app
 """
 
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
@@ -11,8 +12,16 @@ from .views import (
     NotificationPreferencesViewSet,
     GoogleLoginView,
     KakaoLoginView,
+    google_login_async,
+    kakao_login_async,
 )
 
+# ASGI deployments serve OAuth logins without holding a worker thread per provider call
+if settings.ASYNC_OAUTH_LOGIN:
+    google_login, kakao_login = google_login_async, kakao_login_async
+else:
+    google_login, kakao_login = GoogleLoginView.as_view(), KakaoLoginView.as_view()
+
 # Create router
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
@@ -24,8 +33,8 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
     # OAuth endpoints
-    path('google/', GoogleLoginView.as_view(), name='google_login'),
-    path('kakao/', KakaoLoginView.as_view(), name='kakao_login'),
+    path('google/', google_login, name='google_login'),
+    path('kakao/', kakao_login, name='kakao_login'),
 
     # Router URLs
     path('', include(router.urls)),
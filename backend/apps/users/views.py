@@ -2,12 +2,22 @@
 Views for users app
 """
 
+import json
+import threading
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
+from django.db import connections
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from apps.plans.models import invalidate_calendar_feed
 
 from .models import NotificationPreferences
 from .serializers import (
@@ -17,7 +27,7 @@ from .serializers import (
     ChangePasswordSerializer,
     NotificationPreferencesSerializer,
 )
-from .oauth import GoogleOAuth, KakaoOAuth, get_or_create_oauth_user
+from .oauth import GoogleOAuth, KakaoOAuth, ProviderUnavailable, get_or_create_oauth_user
 
 User = get_user_model()
 
@@ -61,6 +71,9 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer = UserUpdateSerializer(user, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            if 'timezone' in serializer.validated_data:
+                # Feed times are rendered in the user's timezone
+                invalidate_calendar_feed(user.pk)
             return Response(UserSerializer(user).data)
 
     @action(detail=False, methods=['post'], url_path='change-password')
@@ -123,6 +136,22 @@ class NotificationPreferencesViewSet(viewsets.ReadOnlyModelViewSet):
         return NotificationPreferences.objects.filter(user=self.request.user)
 
 
+def oauth_login(user_data):
+    """
+    Get or create the user of verified OAuth data and issue its JWT pair
+
+    Returns:
+        dict: Login response body ({'access', 'refresh', 'user'})
+    """
+    user = get_or_create_oauth_user(user_data)
+    refresh = RefreshToken.for_user(user)
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'user': UserSerializer(user).data
+    }
+
+
 class GoogleLoginView(APIView):
     """
     Google OAuth 2.0 login endpoint
@@ -159,17 +188,7 @@ class GoogleLoginView(APIView):
             # Verify Google token and get user data
             user_data = GoogleOAuth.verify_token(id_token)
 
-            # Get or create user
-            user = get_or_create_oauth_user(user_data)
-
-            # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
-
-            return Response({
-                'access': str(refresh.access_token),
-                'refresh': str(refresh),
-                'user': UserSerializer(user).data
-            }, status=status.HTTP_200_OK)
+            return Response(oauth_login(user_data), status=status.HTTP_200_OK)
 
         except Exception as e:
             return Response(
@@ -214,20 +233,90 @@ class KakaoLoginView(APIView):
             # Verify Kakao token and get user data
             user_data = KakaoOAuth.verify_token(access_token)
 
-            # Get or create user
-            user = get_or_create_oauth_user(user_data)
-
-            # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
-
-            return Response({
-                'access': str(refresh.access_token),
-                'refresh': str(refresh),
-                'user': UserSerializer(user).data
-            }, status=status.HTTP_200_OK)
+            return Response(oauth_login(user_data), status=status.HTTP_200_OK)
 
+        except ProviderUnavailable as e:
+            return Response(
+                {'error': str(e.detail)},
+                status=e.status_code,
+                headers={'Retry-After': str(e.retry_after)}
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_401_UNAUTHORIZED
             )
+
+
+# Async login views (settings.ASYNC_OAUTH_LOGIN, served through config.asgi).
+# The provider call awaits httpx on the event loop instead of holding a
+# worker thread; only oauth_login() (ORM + JWT) runs in the sync thread.
+
+# Under ASGI every request runs its sync code in its own thread with its own
+# DB connection, so a spike of logins returning from the provider at once
+# would open as many connections; at most this many log in at a time
+ASYNC_LOGIN_DB_SLOTS = 8
+async_login_db_slots = threading.BoundedSemaphore(ASYNC_LOGIN_DB_SLOTS)
+
+
+@sync_to_async
+def oauth_login_in_slot(user_data):
+    """oauth_login() within async_login_db_slots, closing its connection after"""
+    with async_login_db_slots:
+        try:
+            return oauth_login(user_data)
+        finally:
+            connections.close_all()
+
+
+def login_param(request, name):
+    """A field of a JSON or form-encoded login body"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data.get(name) if isinstance(data, dict) else None
+    return request.POST.get(name)
+
+
+@csrf_exempt
+@require_POST
+async def google_login_async(request):
+    """
+    Google OAuth 2.0 login endpoint (async GoogleLoginView)
+    POST /api/auth/google/
+    """
+    id_token = login_param(request, 'id_token')
+
+    if not id_token:
+        return JsonResponse({'error': 'id_token is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        user_data = await GoogleOAuth.averify_token(id_token)
+        return JsonResponse(await oauth_login_in_slot(user_data), status=status.HTTP_200_OK)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+@csrf_exempt
+@require_POST
+async def kakao_login_async(request):
+    """
+    Kakao OAuth 2.0 login endpoint (async KakaoLoginView)
+    POST /api/auth/kakao/
+    """
+    access_token = login_param(request, 'access_token')
+
+    if not access_token:
+        return JsonResponse({'error': 'access_token is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        user_data = await KakaoOAuth.averify_token(access_token)
+        return JsonResponse(await oauth_login_in_slot(user_data), status=status.HTTP_200_OK)
+    except ProviderUnavailable as e:
+        response = JsonResponse({'error': str(e.detail)}, status=e.status_code)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,20 @@
+"""
+ASGI config for TIME BLOCK project.
+
+Serves the async OAuth login views (ASYNC_OAUTH_LOGIN), e.g.
+    ASYNC_OAUTH_LOGIN=True DB_CONN_MAX_AGE=0 \
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+
+Persistent DB connections do not work under ASGI (each request gets its
+own), hence DB_CONN_MAX_AGE=0. That makes every other (sync) endpoint open
+a connection per request, so route only /api/auth/google/ and
+/api/auth/kakao/ to this process and keep the rest on config.wsgi.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.production')
+
+application = get_asgi_application()
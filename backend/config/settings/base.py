@@ -6,6 +6,7 @@ Base settings shared across all environments.
 import os
 from pathlib import Path
 from decouple import config
+from corsheaders.defaults import default_headers
 from datetime import timedelta
 
 # Build paths
@@ -67,6 +68,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -87,7 +89,9 @@ else:
             'PASSWORD': config('DB_PASSWORD', default=''),
             'HOST': config('DB_HOST', default='localhost'),
             'PORT': config('DB_PORT', default='5432'),
-            'CONN_MAX_AGE': 600,  # 10 minutes connection pooling
+            # 10 minutes connection pooling; set 0 under ASGI (config.asgi), where
+            # connections are per request and persistent ones are never reused
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
             'OPTIONS': {
                 'connect_timeout': 10,
             }
@@ -133,7 +137,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -165,6 +169,11 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Cached user lookup of CachedJWTAuthentication (see apps/users/cache.py)
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60 * 5, cast=int)  # seconds in the shared cache
+AUTH_USER_LOCAL_TTL = config('AUTH_USER_LOCAL_TTL', default=5, cast=int)  # seconds in the per-process LRU
+AUTH_USER_LOCAL_SIZE = 1024  # users per process
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -172,11 +181,48 @@ CORS_ALLOWED_ORIGINS = config(
     cast=lambda v: [s.strip() for s in v.split(',')]
 )
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'if-none-match', 'if-modified-since')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed', 'ETag', 'Last-Modified']
+
+# Idempotency-Key handling for mutating API actions (apps/common/idempotency.py)
+# Stored responses live in the default cache, so production needs a shared
+# cache (Redis) for retries to be recognised across workers
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=60 * 60 * 24, cast=int)  # seconds
+IDEMPOTENCY_LOCK_TIMEOUT = 30  # seconds a running request may hold a key
+IDEMPOTENCY_WAIT_TIMEOUT = 10  # seconds a duplicate waits before answering 409
+
+# Brain dump delta autosave (see apps/plans/autosave.py)
+BRAIN_DUMP_COALESCE_SECONDS = config('BRAIN_DUMP_COALESCE_SECONDS', default=5, cast=int)  # one DB write per window
+BRAIN_DUMP_BUFFER_TTL = 60 * 60 * 24  # seconds coalesced text may stay in the cache
+BRAIN_DUMP_LOCK_TIMEOUT = 5  # seconds a patch may hold a plan's lock
+BRAIN_DUMP_LOCK_WAIT = 2  # seconds a patch waits for the lock before answering 409
 
 # OAuth 2.0 settings
 GOOGLE_CLIENT_ID = config('GOOGLE_CLIENT_ID', default='')
 GOOGLE_CLIENT_SECRET = config('GOOGLE_CLIENT_SECRET', default='')
 KAKAO_REST_API_KEY = config('KAKAO_REST_API_KEY', default='')
+GOOGLE_OAUTH2_CERTS_URL = config('GOOGLE_OAUTH2_CERTS_URL', default='https://www.googleapis.com/oauth2/v1/certs')
+# serve_oauth_stub stands in for it in load tests
+KAKAO_USER_INFO_URL = config('KAKAO_USER_INFO_URL', default='https://kapi.kakao.com/v2/user/me')
+OAUTH_HTTP_POOL_SIZE = config('OAUTH_HTTP_POOL_SIZE', default=10, cast=int)  # keep-alive connections per provider host
+KAKAO_CONNECT_TIMEOUT = config('KAKAO_CONNECT_TIMEOUT', default=2, cast=float)  # seconds
+KAKAO_READ_TIMEOUT = config('KAKAO_READ_TIMEOUT', default=3, cast=float)  # seconds
+KAKAO_PROFILE_CACHE_TTL = config('KAKAO_PROFILE_CACHE_TTL', default=60, cast=int)  # seconds a token's profile is reused
+# Serve the Google/Kakao login endpoints from async views (needs httpx and config.asgi)
+ASYNC_OAUTH_LOGIN = config('ASYNC_OAUTH_LOGIN', default=False, cast=bool)
+
+# Timer session cold archive
+# Finished sessions older than TIMER_ARCHIVE_AFTER_DAYS are moved to
+# per user-month files under TIMER_ARCHIVE_ROOT (see apps/timers/archive.py)
+TIMER_ARCHIVE_ROOT = config('TIMER_ARCHIVE_ROOT', default=os.path.join(BASE_DIR, 'archive', 'timer_sessions'))
+TIMER_ARCHIVE_AFTER_DAYS = config('TIMER_ARCHIVE_AFTER_DAYS', default=365, cast=int)
+
+# Nightly rollover of unfinished blocks (see apps/plans/rollover.py)
+PLAN_ROLLOVER_CHUNK_SIZE = config('PLAN_ROLLOVER_CHUNK_SIZE', default=1000, cast=int)  # users per transaction
+
+# ICS subscription feed (see apps/plans/feed.py); writes invalidate it right away,
+# the TTL only bounds how long the date window and non-model writes may lag
+CALENDAR_FEED_TTL = config('CALENDAR_FEED_TTL', default=60 * 60, cast=int)  # seconds
 
 # Frontend URL (for redirects, email links, etc.)
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:3000')
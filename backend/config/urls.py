@@ -7,6 +7,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
 
+from apps.plans.views import calendar_feed
+
 
 def api_root(request):
     """API root endpoint - shows available endpoints"""
@@ -24,11 +26,15 @@ def api_root(request):
                 'daily_plans': '/api/plans/daily-plans/',
                 'today': '/api/plans/daily-plans/today/',
                 'time_blocks': '/api/plans/time-blocks/',
+                'templates': '/api/plans/templates/',
+                'categories': '/api/plans/categories/',
+                'calendar_feed': '/api/plans/calendar-feed/',
             },
             'timer': {
                 'sessions': '/api/timer/sessions/',
                 'active': '/api/timer/sessions/active/',
                 'today': '/api/timer/sessions/today/',
+                'export': '/api/timer/sessions/export/',
             },
             'statistics': {
                 'daily': '/api/stats/daily/',
@@ -54,6 +60,9 @@ urlpatterns = [
     path('api/plans/', include('apps.plans.urls')),
     path('api/timer/', include('apps.timers.urls')),
     path('api/stats/', include('apps.statistics.urls')),
+
+    # ICS subscription feed (token in the URL, no JWT)
+    path('calendar/<str:token>.ics', calendar_feed, name='calendar_feed'),
 ]
 
 # Serve media files in development
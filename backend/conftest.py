@@ -0,0 +1,36 @@
+"""
+Shared pytest fixtures
+
+Run from backend/ with ``pytest``. Tests use the configured database
+(PostgreSQL, or SQLite with USE_SQLITE=1); PostgreSQL-only behaviour is
+skipped on SQLite.
+"""
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from apps.users.cache import local_users
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty shared and per-process caches"""
+    cache.clear()
+    local_users.clear()
+    yield
+    cache.clear()
+    local_users.clear()
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(email='user@example.com', username='user')
+
+
+@pytest.fixture
+def api_client(user):
+    """API client authenticated as user (no token round trip)"""
+    client = APIClient()
+    client.force_authenticate(user)
+    return client